@@ -1,36 +1,285 @@
-from flask import Flask, jsonify, request
+import math
+import os
+import threading
+from functools import wraps
+
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-from game_logic import SlantGame
-from cpu_ai import GreedyAI
+from game_logic import SlantGame, ALL_STATE_FIELDS
+from game_events import format_event, stream
+from game_store import GameStore
+from grading import DIFFICULTY_BANDS
+from metrics import Metrics, instrument_app, instrument_game
+from parallel import default_search
+from puzzle_pool import PuzzlePool
+from puzzle_store import PuzzleStore
+from solve_jobs import SolveJob, SolveRunner
 
 app = Flask(__name__)
 CORS(app) # Enable CORS for frontend
 
-game = SlantGame(size=5)
-selected_strategy = 1  # Default to strategy 1
+# Board sizes kept pre-generated in the background (add larger sizes here)
+POOL_SIZES = [3, 5, 7, 9]
+POOL_DEPTH = 4  # Ready puzzles kept per size and difficulty band (and for no band)
+# Largest board /api/new_game accepts: other sizes are generated inline on
+# the request thread, and generation time grows steeply with the size
+MAX_SIZE = 15
+
+# Offline-generated puzzle library (see puzzle_store.py); missing files are fine
+PUZZLE_LIBRARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles')
+
+# Per-client games: LRU + idle TTL eviction under a count and memory cap
+MAX_GAMES = 10000
+GAME_TTL_SECONDS = 60 * 60
+GAME_MEMORY_CAP = 256 * 1024 * 1024
+
+MAX_BATCH_MOVES = 10000  # Moves accepted by one /api/moves request
+
+# Autoplay: the CPU answers a human move after this delay (seconds) and pushes
+# it over /api/events. Another human move in the meantime (a correction)
+# restarts the wait.
+CPU_REPLY_DELAY = 0.3
+EVENT_KEEPALIVE_SECONDS = 15
+
+# Strategy 4 (tree search) thinks for budget_ms per move; /api/set_strategy
+# accepts up to this much (the request holds the game's lock meanwhile)
+MAX_MCTS_BUDGET_MS = 2000
+
+# Background solves: worker threads, default / max wall-clock budget per job,
+# and finished jobs remembered per game for polling
+SOLVE_WORKERS = 2
+SOLVE_BUDGET_SECONDS = 10
+MAX_SOLVE_BUDGET_SECONDS = 60
+SOLVE_JOBS_KEPT = 8
+
+# /api/metrics and the timing hooks behind it; SLANT_METRICS=0 leaves every
+# route and SlantGame method uninstrumented. Per-call timing of the loop
+# check (hot in the solver and CPU players) is opt-in: SLANT_METRICS=full
+METRICS_MODE = os.environ.get('SLANT_METRICS', '1')
+METRICS_ENABLED = METRICS_MODE != '0'
+
+puzzle_store = PuzzleStore(PUZZLE_LIBRARY)
+puzzle_pool = PuzzlePool(sizes=POOL_SIZES, depth=POOL_DEPTH, store=puzzle_store)
+
+games = GameStore(max_games=MAX_GAMES, ttl=GAME_TTL_SECONDS, max_bytes=GAME_MEMORY_CAP)
+solve_runner = SolveRunner(workers=SOLVE_WORKERS)
+
+metrics = Metrics() if METRICS_ENABLED else None
+if metrics is not None:
+    instrument_app(app, metrics)
+    instrument_game(SlantGame, metrics, per_call=METRICS_MODE == 'full')
+    metrics.gauge(lambda: [('slant_games_live', (), len(games))] + [
+        ('slant_pool_depth', (('size', str(size)),), depth)
+        for size, depth in puzzle_pool.stats()['depth'].items()])
+
+# Fork the solver's worker processes while this is still the only thread;
+# once the pool and request threads exist, searches stay serial (parallel.py)
+default_search().start()
+puzzle_pool.start() # After instrumentation so background generation is measured too
+
+def _body():
+    """The JSON body if it is an object, else {} (no body, not JSON, or an array)."""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+def _game_id():
+    """game_id from the JSON body or query string; ValueError unless it is a string."""
+    game_id = _body().get('game_id') or request.args.get('game_id')
+    if game_id is not None and not isinstance(game_id, str):
+        raise ValueError("game_id must be a string")
+    return game_id
+
+def _param(name):
+    return _body().get(name, request.args.get(name))
+
+def _state_format():
+    """
+    `fields` (list or "grid,status,scores") and `compact` from the JSON body
+    or query string, as to_dict() arguments. Raises ValueError on unknown fields.
+    """
+    fields = _param('fields')
+    if isinstance(fields, str):
+        fields = [f for f in fields.split(',') if f]
+    elif fields is not None and not isinstance(fields, list):
+        raise ValueError("fields must be a list or a comma-separated string")
+    unknown = [f for f in fields or () if f not in ALL_STATE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown state fields: {', '.join(unknown)}")
+    compact = _param('compact')
+    if isinstance(compact, str):
+        compact = compact.lower() in ('1', 'true', 'yes')
+    return fields or None, bool(compact)
+
+def _state(game):
+    """
+    State for a response: a delta against the client's last seen `since`
+    version when it sent one (full snapshot if it is too far behind),
+    otherwise the full to_dict().
+    """
+    since = _param('since')
+    try:
+        since = int(since) if since is not None else None
+    except (TypeError, ValueError):
+        since = None
+    fields, compact = _state_format()
+    if since is None:
+        return game.to_dict(fields, compact)
+    return game.to_delta(since, fields, compact)
+
+def with_session(view):
+    """Resolves game_id (JSON body or query string) and runs the view under that game's lock."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            game_id = _game_id()
+            _state_format()  # Reject bad `fields` before the view changes anything
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        session = games.get(game_id)
+        if session is None:
+            return jsonify({"error": "Unknown or expired game_id"}), 404
+        with session.lock:
+            return view(session, *args, **kwargs)
+    return wrapper
+
+def _publish(session, event='state', **extra):
+    """Pushes what changed since the last push to the game's event streams."""
+    game = session.game
+    if len(session.events):
+        session.events.publish(event, {**extra, "state": game.to_delta(session.pushed_version)})
+    session.pushed_version = game.version
+
+def _play_cpu(session):
+    """Makes the CPU's move (or pass) with the session's strategy; returns the move dict or None."""
+    game = session.game
+    move = session.cpu_ai().get_best_move()  # Selected strategy, candidates kept between turns
+    if move:
+        cr, cc, ctype = move
+        game.apply_move(cr, cc, ctype, player='CPU')
+        cpu_move = {"row": cr, "col": cc, "type": ctype}
+        _publish(session, 'cpu_move', cpu_move=cpu_move)
+        return cpu_move
+    # CPU Pass
+    game.turn = 'HUMAN' # Toggle back
+    _publish(session, 'cpu_pass', message="CPU Passed (No Moves)")
+    return None
+
+def _schedule_cpu_reply(session):
+    """In autoplay mode, answers the human after CPU_REPLY_DELAY (called under session.lock)."""
+    if session.cpu_timer is not None:
+        session.cpu_timer.cancel()
+        session.cpu_timer = None
+    game = session.game
+    if not session.autoplay or game.status != "RUNNING" or game.turn != 'CPU':
+        return
+    timer = threading.Timer(CPU_REPLY_DELAY, _cpu_reply, args=(session, game.version))
+    timer.daemon = True
+    session.cpu_timer = timer
+    timer.start()
+
+def _cpu_reply(session, version):
+    with session.lock:
+        # Skip if the game moved on (or went away) while we were waiting for the lock
+        if session.closed or session.game.version != version or session.cpu_timer is None:
+            return
+        session.cpu_timer = None
+        if session.game.turn == 'CPU' and session.game.status == "RUNNING":
+            _play_cpu(session)
 
 @app.route('/api/state', methods=['GET'])
-def get_state():
-    return jsonify(game.to_dict())
+@with_session
+def get_state(session):
+    return jsonify(_state(session.game))
 
 @app.route('/api/new_game', methods=['POST'])
 def new_game():
-    global game
-    data = request.json or {}
+    data = _body()
     size = data.get('size', 5)
-    game = SlantGame(size=size)
-    return jsonify(game.to_dict())
+    if data.get('game_id') is not None and not isinstance(data['game_id'], str):
+        return jsonify({"error": "game_id must be a string"}), 400
+    for name in ('size', 'index', 'seed'):
+        value = data.get(name)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            return jsonify({"error": f"{name} must be an integer"}), 400
+    if not 1 <= size <= MAX_SIZE:
+        return jsonify({"error": f"size must be from 1 to {MAX_SIZE}"}), 400
+    if data.get('index') is not None or data.get('seed') is not None:
+        # Specific puzzle from the on-disk library
+        try:
+            game = SlantGame.from_store(puzzle_store, size, index=data.get('index'), seed=data.get('seed'))
+        except KeyError as e:
+            return jsonify({"error": str(e.args[0])}), 404
+    else:
+        # A difficulty band is served from puzzles generated for it and graded
+        difficulty = data.get('difficulty')
+        if difficulty is not None and difficulty not in DIFFICULTY_BANDS:
+            return jsonify({"error": f"difficulty must be one of {', '.join(DIFFICULTY_BANDS)}"}), 400
+        game = puzzle_pool.new_game(size, difficulty)  # Falls back to inline generation if the pool is empty
+        if game is None:
+            return jsonify({"error": f"No {difficulty} puzzle of size {size} could be generated"}), 404
+
+    # Starting over replaces the caller's previous game but keeps its strategy
+    strategy, autoplay = 1, False
+    previous = games.remove(data['game_id']) if data.get('game_id') else None
+    if previous is not None:
+        strategy, autoplay = previous.strategy, previous.autoplay
+
+    session = games.create(game, strategy=strategy, autoplay=autoplay)
+    try:
+        state = game.to_dict(*_state_format())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({**state, "game_id": session.id})
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    return jsonify({
+        "pool": puzzle_pool.stats(),
+        "library": {size: puzzle_store.count(size) for size in POOL_SIZES},
+        "games": games.stats(),
+    })
+
+@app.route('/api/events', methods=['GET'])
+@with_session
+def events(session):
+    """
+    Server-Sent Events for one game: a full 'state' snapshot on connect, then
+    'state' deltas after every change, 'cpu_move' / 'cpu_pass' when the CPU
+    plays. The stream ends when the game is replaced or expires.
+    """
+    channel = session.events
+    q = channel.subscribe()
+    snapshot = session.game.to_dict()
+
+    def generate():
+        try:
+            yield format_event('state', {"state": {**snapshot, "full": True}})
+            yield from stream(q, keepalive=EVENT_KEEPALIVE_SECONDS)
+        finally:
+            channel.unsubscribe(q)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    if metrics is None:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/move', methods=['POST'])
-def make_move():
+@with_session
+def make_move(session):
     # Human move
-    data = request.json
+    game = session.game
+    data = request.json or {}
     r = data.get('row')
     c = data.get('col')
     move_type = data.get('type') # 'L', 'R', or None/CLEAR
     
-    if r is None or c is None:
-        return jsonify({"error": "Invalid params"}), 400
+    error = game.move_error((r, c, move_type)) # Same checks as /api/moves entries
+    if error is not None:
+        return jsonify({"error": error}), 400
     
     # Handle "CLEAR" string from frontend if used
     if move_type == "CLEAR":
@@ -44,65 +293,173 @@ def make_move():
     # The frontend will show visual errors (red markers).
     success = game.apply_move(r, c, move_type, check_validity=False, player='HUMAN')
     if not success:
-        return jsonify({"error": "Invalid move", "state": game.to_dict()}), 400
+        return jsonify({"error": "Invalid move", "state": _state(game)}), 400
         
     # Wait, we need to ensure corrections invoke apply_move in a way that checks self?
     # Yes, apply_move now handles is_correction internally to Undo first.
+    _publish(session)
+    _schedule_cpu_reply(session)
     
     return jsonify({
         "success": True,
-        "state": game.to_dict()
+        "state": _state(game)
     })
 
+@app.route('/api/moves', methods=['POST'])
+@with_session
+def make_moves(session):
+    # Batch of human moves (replays, imports, bots): one round trip, one final state
+    game = session.game
+    data = request.json or {}
+    moves = data.get('moves')
+    if not isinstance(moves, list):
+        return jsonify({"error": "Expected 'moves': [[row, col, type], ...]"}), 400
+    if len(moves) > MAX_BATCH_MOVES:
+        return jsonify({"error": f"At most {MAX_BATCH_MOVES} moves per batch"}), 400
+
+    # Moves may also be sent as {"row", "col", "type"} objects
+    moves = [(m.get('row'), m.get('col'), m.get('type')) if isinstance(m, dict) else m for m in moves]
+    atomic = bool(data.get('atomic', False))
+    results = game.apply_moves(moves, check_validity=bool(data.get('check_validity', False)),
+                               player='HUMAN', atomic=atomic)
+
+    ok = all(success for success, _ in results)
+    _publish(session)
+    _schedule_cpu_reply(session)
+    body = {
+        "success": ok,
+        "applied": sum(1 for success, _ in results if success) if ok or not atomic else 0,
+        "results": [{"success": True} if success else {"success": False, "error": error}
+                    for success, error in results],
+        "state": _state(game),
+    }
+    if atomic and not ok:
+        body["rolled_back"] = True
+        return jsonify(body), 400
+    return jsonify(body)
+
 @app.route('/api/cpu_move', methods=['POST'])
-def cpu_move():
-    global selected_strategy
+@with_session
+def cpu_move(session):
+    game = session.game
     if game.turn != 'CPU':
-        return jsonify({"success": False, "message": "Not CPU turn", "state": game.to_dict()})
+        return jsonify({"success": False, "message": "Not CPU turn", "state": _state(game)})
 
-    ai = GreedyAI(game, strategy=selected_strategy)  # Use selected strategy
-    move = ai.get_best_move()
-    
+    move = _play_cpu(session)
     if move:
-        cr, cc, ctype = move
-        game.apply_move(cr, cc, ctype, player='CPU')
         return jsonify({
             "success": True, 
-            "cpu_move": {"row": cr, "col": cc, "type": ctype},
-            "state": game.to_dict()
+            "cpu_move": move,
+            "state": _state(game)
         })
     else:
-        # CPU Pass
-        game.turn = 'HUMAN' # Toggle back
-        return jsonify({"success": True, "message": "CPU Passed (No Moves)", "state": game.to_dict()})
+        return jsonify({"success": True, "message": "CPU Passed (No Moves)", "state": _state(game)})
 
 @app.route('/api/undo', methods=['POST'])
-def undo_move():
+@with_session
+def undo_move(session):
+    game = session.game
     if game.undo():
-        return jsonify({"success": True, "state": game.to_dict()})
+        _publish(session)
+        return jsonify({"success": True, "state": _state(game)})
     else:
-        return jsonify({"error": "Nothing to undo", "state": game.to_dict()}), 400
+        return jsonify({"error": "Nothing to undo", "state": _state(game)}), 400
 
 @app.route('/api/set_strategy', methods=['POST'])
-def set_strategy():
-    global selected_strategy
+@with_session
+def set_strategy(session):
     data = request.json or {}
     strategy = data.get('strategy', 1)
     
     # Validate strategy number
-    if strategy not in [1, 2, 3]:
-        return jsonify({"error": "Invalid strategy. Must be 1, 2, or 3"}), 400
+    if strategy not in [1, 2, 3, 4]:
+        return jsonify({"error": "Invalid strategy. Must be 1, 2, 3 or 4"}), 400
+    budget_ms = data.get('budget_ms', session.ai_budget_ms)
+    if not isinstance(budget_ms, int) or not 10 <= budget_ms <= MAX_MCTS_BUDGET_MS:
+        return jsonify({"error": f"budget_ms must be an integer from 10 to {MAX_MCTS_BUDGET_MS}"}), 400
     
-    selected_strategy = strategy
-    return jsonify({"success": True, "strategy": selected_strategy})
+    session.strategy = strategy
+    session.ai_budget_ms = budget_ms
+    if 'autoplay' in data:
+        # Multiplayer: CPU replies are pushed over /api/events instead of polled
+        session.autoplay = bool(data['autoplay'])
+        _schedule_cpu_reply(session)
+    return jsonify({"success": True, "strategy": session.strategy, "autoplay": session.autoplay,
+                    "budget_ms": session.ai_budget_ms})
+
+@app.route('/api/hint', methods=['GET', 'POST'])
+@with_session
+def get_hint(session):
+    """
+    The next logically forced cell and the rule behind it (see hints.py);
+    the board is left as it is. `hint` is null once the board is full.
+    """
+    return jsonify({"hint": session.hinter().next_hint()})
 
 @app.route('/api/solve', methods=['POST'])
-def solve_game():
-    # Attempt to solve the game from current state
-    if game.solve_game(randomize=False):
-        return jsonify({"success": True, "state": game.to_dict(), "message": "Solved!"})
-    else:
-        return jsonify({"success": False, "state": game.to_dict(), "message": "No solution found"}), 400
+@with_session
+def solve_game(session):
+    """
+    Starts solving the current position in the background and returns the
+    job right away (202). Poll GET /api/solve/<job_id>; the solution is put
+    on the board only if nothing changed while the job ran.
+    """
+    data = request.get_json(silent=True) or {}
+    running = next((job for job in session.solve_jobs.values() if not job.done), None)
+    if running is not None:
+        return jsonify(running.to_dict()), 202 # One solve per game at a time
+
+    budget = SOLVE_BUDGET_SECONDS
+    if data.get('budget_ms') is not None:
+        try:
+            budget_ms = float(data['budget_ms'])
+        except (TypeError, ValueError):
+            budget_ms = math.nan
+        if not (math.isfinite(budget_ms) and budget_ms > 0): # No nan, inf or negative budgets
+            return jsonify({"error": "budget_ms must be a positive number"}), 400
+        budget = min(budget_ms / 1000, MAX_SOLVE_BUDGET_SECONDS)
+
+    job = SolveJob(session.game, session.lock, budget, on_solved=lambda job: _publish(session))
+    session.solve_jobs[job.id] = job
+    while len(session.solve_jobs) > SOLVE_JOBS_KEPT:
+        oldest_id, oldest = next(iter(session.solve_jobs.items()))
+        if not oldest.done:
+            break
+        del session.solve_jobs[oldest_id]
+    solve_runner.submit(job)
+    return jsonify(job.to_dict()), 202
+
+SOLVE_MESSAGES = {
+    'solved': "Solved!",
+    'unsolvable': "No solution found",
+    'timeout': "Solver ran out of time",
+    'cancelled': "Solve cancelled",
+    'stale': "Board changed while solving; solution not applied",
+    'failed': "Solver error",
+}
+
+def _solve_job_response(session, job_id):
+    job = session.solve_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown solve job"}), 404
+    body = job.to_dict()
+    if job.done:
+        body["state"] = _state(session.game)
+        body["message"] = SOLVE_MESSAGES.get(job.status, job.status)
+    return jsonify(body)
+
+@app.route('/api/solve/<job_id>', methods=['GET'])
+@with_session
+def solve_progress(session, job_id):
+    return _solve_job_response(session, job_id)
+
+@app.route('/api/solve/<job_id>/cancel', methods=['POST'])
+@with_session
+def cancel_solve(session, job_id):
+    job = session.solve_jobs.get(job_id)
+    if job is not None:
+        job.cancel()
+    return _solve_job_response(session, job_id)
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    app.run(debug=True, port=5000, threaded=True) # Event streams hold a thread each
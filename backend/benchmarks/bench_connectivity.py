@@ -0,0 +1,67 @@
+"""
+Loop-check benchmark: connectivity index vs. the original BFS reachability.
+
+Fills 80% of boards of increasing size with random loop-free slashes, then times
+one full sweep of loop checks (every empty cell, both slash types) the way
+GreedyAI does per CPU move.
+
+Run from backend/:  python benchmarks/bench_connectivity.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_logic import SlantGame
+
+SIZES = [9, 12, 15, 20, 30]
+REPEATS = 5
+
+
+def mostly_filled_board(size, seed):
+    random.seed(seed)
+    game = SlantGame(size, generate=False)
+    cells = [(r, c) for r in range(size) for c in range(size)]
+    random.shuffle(cells)
+    for r, c in cells[:len(cells) * 4 // 5]:
+        for mv in random.sample(['L', 'R'], 2):
+            if not game.is_cycle_created(r, c, mv):
+                game.apply_move(r, c, mv, check_validity=False)
+                break
+    return game
+
+
+def sweep(game, check):
+    found = 0
+    for r in range(game.size):
+        for c in range(game.size):
+            if game.grid[r][c] is None:
+                for mv in ('L', 'R'):
+                    if check(r, c, mv):
+                        found += 1
+    return found
+
+
+def best_of(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'size':>5} {'bfs ms':>10} {'index ms':>10} {'speedup':>8}")
+    for size in SIZES:
+        game = mostly_filled_board(size, seed=size)
+        assert sweep(game, game.is_cycle_created) == sweep(game, game._is_cycle_created_bfs)
+        bfs = best_of(lambda: sweep(game, game._is_cycle_created_bfs))
+        index = best_of(lambda: sweep(game, game.is_cycle_created))
+        print(f"{size:>5} {bfs * 1000:>10.2f} {index * 1000:>10.2f} {bfs / index:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Parallel search scaling: serial PropagationSolver vs. ParallelSearch with
+1, 2, 4, ... workers (up to the core count, or WORKERS below).
+
+Workloads are solution counts on sparsely clued boards (the expensive part
+of generation is proving uniqueness) and a first-solution solve. Every
+parallel result is checked against the serial one.
+
+Run from backend/:  python benchmarks/bench_parallel.py [max_workers]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_logic import SlantGame
+from parallel import ParallelSearch
+from solver import PropagationSolver
+
+# (size, fraction of nodes clued, count limit)
+WORKLOADS = [(7, 0.20, 20000), (9, 0.25, 20000), (12, 0.30, 5000)]
+REPEATS = 3
+
+
+def sparse_puzzle(size, fraction, seed):
+    random.seed(seed)
+    game = SlantGame(size, generate=False)
+    game.solve_game(randomize=True)
+    degrees = dict(game.node_degrees.items())
+    nodes = list(degrees)
+    random.shuffle(nodes)
+    puzzle = SlantGame(size, generate=False)
+    puzzle.constraints = {node: degrees[node] for node in nodes[:int(len(nodes) * fraction)]}
+    return puzzle
+
+
+def best_of(fn):
+    best, result = float('inf'), None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv):
+    max_workers = int(argv[1]) if len(argv) > 1 else (os.cpu_count() or 1)
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != max_workers:
+        worker_counts.append(max_workers)
+    print(f"cores: {os.cpu_count()}, workers: {worker_counts}")
+
+    searches = {w: ParallelSearch(w) for w in worker_counts}
+    try:
+        for size, fraction, limit in WORKLOADS:
+            game = sparse_puzzle(size, fraction, seed=size)
+            for label, serial, parallel in (
+                (f"count<={limit}", lambda: PropagationSolver(game).count(limit),
+                 lambda s: s.count(game, limit)),
+                ("solve", lambda: PropagationSolver(game).solve(),
+                 lambda s: s.solve(game)),
+            ):
+                base, expected = best_of(serial)
+                print(f"{size}x{size} {label}: serial {base * 1000:.1f} ms")
+                for w in worker_counts:
+                    searches[w].count(game, 1) # Start the pool outside the timing
+                    t, result = best_of(lambda: parallel(searches[w]))
+                    assert result == expected, (size, label, w)
+                    print(f"    {w:>3} workers {t * 1000:>10.1f} ms {base / t:>6.2f}x")
+    finally:
+        for search in searches.values():
+            search.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,79 @@
+"""
+Transposition table: puzzle generation and solution counts with and
+without it.
+
+Generation runs the same seeds both ways (the table doesn't change any
+count, so the puzzles must come out identical) and reports the table's
+hit rate over all uniqueness counts. The table is forced on for every
+size here, including those below GENERATION_TABLE_MIN_SIZE. The count workloads are sparsely
+clued boards with many solutions, where whole subtrees repeat.
+
+Run from backend/:  python benchmarks/bench_transposition.py [seeds]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_logic
+from bench_parallel import sparse_puzzle
+from game_logic import SlantGame
+from solver import PropagationSolver, TranspositionTable
+
+GENERATION_SIZES = [7, 9, 12]
+# (size, fraction of nodes clued, count limit)
+COUNT_WORKLOADS = [(7, 0.20, 20000), (9, 0.25, 20000), (12, 0.30, 5000)]
+
+
+def generate(size, seeds, entries):
+    game_logic.GENERATION_TABLE_ENTRIES = entries
+    game_logic.GENERATION_TABLE_MIN_SIZE = 0 # Measure every size, whatever the default cut-off
+    puzzles, probes, hits = [], 0, 0
+    start = time.perf_counter()
+    for seed in seeds:
+        random.seed(seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game = SlantGame(size)
+        puzzles.append((bytes(game.board.clues), game.unique))
+        if game.transposition_stats:
+            probes += game.transposition_stats['probes']
+            hits += game.transposition_stats['hits']
+    return time.perf_counter() - start, puzzles, probes, hits
+
+
+def main(argv):
+    seeds = range(int(argv[1]) if len(argv) > 1 else 10)
+    entries, min_size = game_logic.GENERATION_TABLE_ENTRIES, game_logic.GENERATION_TABLE_MIN_SIZE
+    try:
+        for size in GENERATION_SIZES:
+            base, expected, _, _ = generate(size, seeds, 0)
+            t, puzzles, probes, hits = generate(size, seeds, entries)
+            assert puzzles == expected, size
+            rate = hits / probes if probes else 0.0
+            print(f"generate {size}x{size} x{len(seeds)}: {base * 1000:8.0f} ms -> {t * 1000:8.0f} ms "
+                  f"{base / t:5.2f}x  hit rate {rate:.1%} ({hits}/{probes})")
+    finally:
+        game_logic.GENERATION_TABLE_ENTRIES, game_logic.GENERATION_TABLE_MIN_SIZE = entries, min_size
+
+    for size, fraction, limit in COUNT_WORKLOADS:
+        game = sparse_puzzle(size, fraction, seed=size)
+        start = time.perf_counter()
+        expected = PropagationSolver(game).count(limit)
+        base = time.perf_counter() - start
+        table = TranspositionTable()
+        start = time.perf_counter()
+        result = PropagationSolver(game, table=table).count(limit)
+        t = time.perf_counter() - start
+        assert result == expected, (size, limit)
+        stats = table.stats()
+        print(f"count<={limit} {size}x{size}: {base * 1000:8.1f} ms -> {t * 1000:8.1f} ms "
+              f"{base / t:5.1f}x  hit rate {stats['hit_rate']:.1%}, {stats['entries']} entries")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
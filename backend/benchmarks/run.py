@@ -0,0 +1,292 @@
+"""
+Benchmark suite: generation, solving, AI moves, move throughput and
+serialization, with fixed seeds so runs are comparable.
+
+Every case is timed `repeat` times (a fresh seeded setup before each
+sample, not timed) and reported as median / p90 / p99 / min in ms. Results
+can be written as JSON and compared against an earlier run; a case whose
+median is more than --threshold slower than the baseline (and slower by
+more than NOISE_FLOOR_MS) is flagged and the exit status is 1.
+
+Run from backend/:
+    python benchmarks/run.py --out results.json
+    python benchmarks/run.py --quick --only construct,solve
+    python benchmarks/run.py --compare baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from board import CELL_SYMBOLS
+from cpu_ai import GreedyAI, IncrementalAI
+from game_logic import SlantGame
+from hints import Hinter
+
+SEED = 1234
+NOISE_FLOOR_MS = 0.05
+
+CONSTRUCT_SIZES = list(range(3, 16))
+SOLVER_SIZES = [5, 7, 9, 12]
+LARGE_SIZES = [50, 100] # Solved from a fully clued grid: generating these takes too long
+AI_SIZES = [5, 9]
+MOVE_SIZES = [5, 9, 15]
+STATE_SIZES = [5, 9, 15]
+MOVES_PER_SAMPLE = 100
+
+
+def quiet(fn, *args, **kwargs):
+    """Runs fn with generation's progress prints swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def percentile(samples, q):
+    """q-th percentile (0-100) with linear interpolation."""
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(samples, ops=1):
+    ms = [s * 1000 for s in samples]
+    result = {
+        'samples': len(ms),
+        'median_ms': percentile(ms, 50),
+        'p90_ms': percentile(ms, 90),
+        'p99_ms': percentile(ms, 99),
+        'min_ms': min(ms),
+        'mean_ms': sum(ms) / len(ms),
+    }
+    if ops > 1:
+        result['ops_per_sec'] = ops / (result['median_ms'] / 1000)
+    return result
+
+
+# ---------------------------------------------------------------- fixtures
+
+_puzzles = {}
+
+def puzzle(size):
+    """The fixed puzzle for `size` (generated once from SEED)."""
+    if size not in _puzzles:
+        random.seed(SEED + size)
+        _puzzles[size] = quiet(SlantGame, size).export_puzzle()
+    return _puzzles[size]
+
+
+def fully_clued(size):
+    """A random solution of `size` with every node's degree given as a clue."""
+    key = ('full', size)
+    if key not in _puzzles:
+        random.seed(SEED + size)
+        game = SlantGame(size, generate=False)
+        game.solve_game(randomize=True)
+        degrees = dict(game.node_degrees.items())
+        game._initialize_empty_state()
+        game.constraints = degrees
+        _puzzles[key] = game.export_puzzle()
+    return _puzzles[key]
+
+
+def half_played(size, seed):
+    """Fixed puzzle with half its cells filled from the solution."""
+    game = SlantGame(size, puzzle=puzzle(size))
+    solution = game.export_puzzle().solution
+    rng = random.Random(seed)
+    cells = rng.sample(range(size * size), size * size // 2)
+    game.apply_moves([(i // size, i % size, CELL_SYMBOLS[solution[i]]) for i in cells])
+    return game
+
+
+# ------------------------------------------------------------------- cases
+# Each case: (name, setup(seed) -> zero-arg callable to time, ops per sample, repeats)
+
+def cases(quick):
+    few = 3 if quick else 10
+    out = []
+
+    for size in CONSTRUCT_SIZES:
+        repeats = few if size <= 9 else max(2, few // 3)
+        def setup(seed, size=size):
+            random.seed(seed)
+            return lambda: quiet(SlantGame, size)
+        out.append((f"construct/{size}", setup, 1, repeats))
+
+    for size in SOLVER_SIZES:
+        def setup(seed, size=size):
+            game = SlantGame(size, puzzle=puzzle(size))
+            return lambda: game.count_solutions(limit=2)
+        out.append((f"count_solutions/{size}", setup, 1, few))
+
+        def setup(seed, size=size):
+            game = SlantGame(size, puzzle=puzzle(size))
+            return lambda: game.solve_game()
+        out.append((f"solve_game/{size}", setup, 1, few))
+
+    for size in LARGE_SIZES:
+        def setup(seed, size=size):
+            game = SlantGame(size, puzzle=fully_clued(size))
+            return lambda: game.solve_game()
+        out.append((f"solve_large/{size}", setup, 1, max(2, few // 3)))
+
+    for size in MOVE_SIZES + LARGE_SIZES:
+        def setup(seed, size=size):
+            # Warm hinter (cache built by an earlier hint), then one more move
+            source = puzzle(size) if size in MOVE_SIZES else fully_clued(size)
+            game = SlantGame(size, puzzle=source)
+            hinter = Hinter(game)
+            hint = hinter.next_hint()
+            game.apply_move(hint['row'], hint['col'], hint['type'], check_validity=False)
+            return hinter.next_hint
+        out.append((f"hint/{size}", setup, 1, few))
+
+    for size in AI_SIZES:
+        for strategy in (1, 2, 3):
+            def setup(seed, size=size, strategy=strategy):
+                game = half_played(size, seed)
+                ai = GreedyAI(game, strategy=strategy)
+                random.seed(seed)
+                return ai.get_best_move
+            out.append((f"cpu_move/strategy{strategy}/{size}", setup, 1, few))
+
+            def setup(seed, size=size, strategy=strategy):
+                # Session AI one move after its last turn: catch up on that move, then pick
+                game = half_played(size, seed)
+                ai = IncrementalAI(game, strategy)
+                move = ai.get_best_move()
+                if move:
+                    game.apply_move(*move, player='CPU', check_validity=False)
+                random.seed(seed)
+                return ai.get_best_move
+            out.append((f"cpu_move_session/strategy{strategy}/{size}", setup, 1, few))
+
+    for size in MOVE_SIZES:
+        def setup(seed, size=size):
+            game = SlantGame(size, puzzle=puzzle(size))
+            rng = random.Random(seed)
+            moves = [(rng.randrange(size), rng.randrange(size), rng.choice('LR'))
+                     for _ in range(MOVES_PER_SAMPLE)]
+            def run():
+                for r, c, mv in moves:
+                    game.apply_move(r, c, mv, check_validity=False)
+                for _ in moves:
+                    game.undo()
+            return run
+        out.append((f"apply_undo/{size}", setup, 2 * MOVES_PER_SAMPLE, few))
+
+    for size in STATE_SIZES:
+        def setup(seed, size=size):
+            game = half_played(size, seed)
+            game.apply_move(0, 0, 'L', check_validity=False) # New version: nothing cached
+            return game.to_dict
+        out.append((f"to_dict/{size}", setup, 1, few * 5))
+
+        def setup(seed, size=size):
+            game = half_played(size, seed)
+            game.to_dict()
+            return game.to_dict
+        out.append((f"to_dict_cached/{size}", setup, 1, few * 5))
+    return out
+
+
+def run_case(setup, ops, repeats):
+    samples, games = [], []
+    for i in range(repeats):
+        fn = setup(SEED + i)
+        start = time.perf_counter()
+        value = fn()
+        samples.append(time.perf_counter() - start)
+        if isinstance(value, SlantGame):
+            games.append(value)
+    result = summarize(samples, ops)
+    if games:
+        # Generation quality next to its cost: retries and how often uniqueness was reached
+        result['attempts_mean'] = sum(g.generation_attempts for g in games) / len(games)
+        result['unique_rate'] = sum(1 for g in games if g.unique) / len(games)
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Prints median vs baseline per case; returns the names that regressed."""
+    regressions = []
+    print(f"\n{'case':<28} {'base ms':>10} {'now ms':>10} {'change':>8}")
+    for name, now in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = now['median_ms'] / base['median_ms'] - 1 if base['median_ms'] else 0.0
+        slower = now['median_ms'] - base['median_ms']
+        flag = ""
+        if change > threshold and slower > NOISE_FLOOR_MS:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<28} {base['median_ms']:>10.3f} {now['median_ms']:>10.3f} {change * 100:>+7.1f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slant benchmark suite")
+    parser.add_argument('--quick', action='store_true', help="fewer samples per case")
+    parser.add_argument('--only', help="comma-separated case name prefixes, e.g. construct,to_dict")
+    parser.add_argument('--repeat', type=int, help="samples per case (overrides defaults)")
+    parser.add_argument('--out', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="baseline JSON from an earlier --out")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="flag cases whose median is this fraction slower (default 0.15)")
+    args = parser.parse_args(argv)
+
+    prefixes = args.only.split(',') if args.only else None
+    results = {}
+    print(f"{'case':<28} {'median':>9} {'p90':>9} {'p99':>9} {'min':>9}  (ms)")
+    for name, setup, ops, repeats in cases(args.quick):
+        if prefixes and not any(name.startswith(p) for p in prefixes):
+            continue
+        result = run_case(setup, ops, args.repeat or repeats)
+        results[name] = result
+        extra = ""
+        if 'ops_per_sec' in result:
+            extra = f"  {result['ops_per_sec']:,.0f} ops/s"
+        elif 'attempts_mean' in result:
+            extra = f"  {result['attempts_mean']:.1f} attempts, {result['unique_rate']:.0%} unique"
+        print(f"{name:<28} {result['median_ms']:>9.3f} {result['p90_ms']:>9.3f} "
+              f"{result['p99_ms']:>9.3f} {result['min_ms']:>9.3f}{extra}")
+
+    if args.out:
+        report = {
+            'meta': {
+                'seed': SEED,
+                'quick': args.quick,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'results': results,
+        }
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nWrote {len(results)} results to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,309 @@
+from collections.abc import MutableMapping
+
+# Cell codes
+EMPTY, L, R = 0, 1, 2
+CELL_SYMBOLS = (None, 'L', 'R')
+CELL_CODES = {None: EMPTY, 'L': L, 'R': R}
+
+# Owner codes
+OWNER_NAMES = (None, 'HUMAN', 'CPU')
+OWNER_CODES = {None: 0, 'HUMAN': 1, 'CPU': 2}
+
+NO_CLUE = 255
+
+# Fixed adjacency slots: every node has at most one neighbour per diagonal.
+NW, NE, SW, SE = 1, 2, 4, 8
+
+
+class Board:
+    """
+    Compact storage for one Slant board.
+
+    Cells and owners are flat bytearrays indexed r * size + c, and node data
+    (degree, clue, adjacency) are flat bytearrays indexed r * (size + 1) + c.
+    Adjacency is a 4-bit mask per node (one slot per diagonal direction), so
+    adding or removing an edge is two bit flips.
+
+    place() / remove() and set_clue() keep running counts of filled cells
+    and of clues that are met or overfull, so completion is checked without
+    scanning. Code that writes the arrays directly calls recount() after.
+    """
+    __slots__ = ('size', 'nodes_size', 'cells', 'owners', 'degrees', 'clues',
+                 'adjacency', 'clue_count', 'filled', 'clues_met', 'clues_over')
+
+    def __init__(self, size):
+        self.size = size
+        self.nodes_size = size + 1
+        nodes = self.nodes_size * self.nodes_size
+        self.cells = bytearray(size * size)
+        self.owners = bytearray(size * size)
+        self.degrees = bytearray(nodes)
+        self.clues = bytearray([NO_CLUE]) * nodes
+        self.adjacency = bytearray(nodes)
+        self.clue_count = 0
+        self.filled = 0
+        self.clues_met = 0
+        self.clues_over = 0
+
+    def clear_cells(self):
+        # In place: row and map views hold references to these arrays.
+        for data in (self.cells, self.owners, self.degrees, self.adjacency):
+            data[:] = bytes(len(data))
+        self.recount()
+
+    def clear_clues(self):
+        self.clues[:] = bytes([NO_CLUE]) * len(self.clues)
+        self.clue_count = 0
+        self.clues_met = 0
+        self.clues_over = 0
+
+    def set_clue(self, node, value):
+        had = self.clues[node] != NO_CLUE
+        self._count_clue(node, -1)
+        if value is None:
+            self.clues[node] = NO_CLUE
+            if had:
+                self.clue_count -= 1
+        else:
+            self.clues[node] = value
+            if not had:
+                self.clue_count += 1
+        self._count_clue(node, 1)
+
+    def recount(self):
+        """Recomputes the running counts from the arrays (after direct writes)."""
+        self.filled = len(self.cells) - self.cells.count(EMPTY)
+        self.clue_count = self.clues_met = self.clues_over = 0
+        for degree, clue in zip(self.degrees, self.clues):
+            if clue != NO_CLUE:
+                self.clue_count += 1
+                if degree == clue:
+                    self.clues_met += 1
+                elif degree > clue:
+                    self.clues_over += 1
+
+    def _count_clue(self, node, sign):
+        clue = self.clues[node]
+        if clue != NO_CLUE:
+            degree = self.degrees[node]
+            if degree == clue:
+                self.clues_met += sign
+            elif degree > clue:
+                self.clues_over += sign
+
+    def _add_degree(self, node, delta):
+        self._count_clue(node, -1)
+        self.degrees[node] += delta
+        self._count_clue(node, 1)
+
+    def place(self, i, value):
+        """Puts slash `value` into empty cell i (cell, adjacency, degrees, counts). Returns its ends."""
+        self.cells[i] = value
+        self.filled += 1
+        self.link(i, value)
+        u, v = self.slash_ends(i, value)
+        self._add_degree(u, 1)
+        self._add_degree(v, 1)
+        return u, v
+
+    def remove(self, i):
+        """Empties cell i; returns the ends of the slash it held."""
+        value = self.cells[i]
+        self.unlink(i, value)
+        u, v = self.slash_ends(i, value)
+        self._add_degree(u, -1)
+        self._add_degree(v, -1)
+        self.cells[i] = EMPTY
+        self.filled -= 1
+        return u, v
+
+    @property
+    def solved(self):
+        """Every cell filled and every clue met (loops are the caller's check)."""
+        return self.filled == len(self.cells) and self.clues_met == self.clue_count
+
+    def slash_ends(self, i, value):
+        """Node ids joined by slash `value` in cell i."""
+        r, c = divmod(i, self.size)
+        tl = r * self.nodes_size + c
+        if value == L:
+            return tl, tl + self.nodes_size + 1
+        return tl + self.nodes_size, tl + 1
+
+    def edge_cell(self, a, b):
+        """Cell index of the slash joining nodes a and b."""
+        ra, ca = divmod(a, self.nodes_size)
+        rb, cb = divmod(b, self.nodes_size)
+        return min(ra, rb) * self.size + min(ca, cb)
+
+    def link(self, i, value):
+        a, b = self.slash_ends(i, value)
+        if value == L:
+            self.adjacency[a] |= SE
+            self.adjacency[b] |= NW
+        else:
+            self.adjacency[a] |= NE
+            self.adjacency[b] |= SW
+
+    def unlink(self, i, value):
+        a, b = self.slash_ends(i, value)
+        if value == L:
+            self.adjacency[a] &= ~SE
+            self.adjacency[b] &= ~NW
+        else:
+            self.adjacency[a] &= ~NE
+            self.adjacency[b] &= ~SW
+
+    def neighbors(self, node):
+        ns = self.nodes_size
+        mask = self.adjacency[node]
+        result = []
+        if mask & NW: result.append(node - ns - 1)
+        if mask & NE: result.append(node - ns + 1)
+        if mask & SW: result.append(node + ns - 1)
+        if mask & SE: result.append(node + ns + 1)
+        return result
+
+    def edges(self):
+        """Yields every edge once as (a, b) node ids."""
+        ns = self.nodes_size
+        for node, mask in enumerate(self.adjacency):
+            if mask & SE: yield node, node + ns + 1
+            if mask & SW: yield node, node + ns - 1
+
+
+class Puzzle:
+    """
+    A ready-to-play puzzle: the clue array (NO_CLUE where hidden) and the
+    solution cells it was generated from, both as bytes in Board layout,
+    plus its grading.Grade when it has been graded.
+    """
+    __slots__ = ('size', 'clues', 'solution', 'unique', 'grade')
+
+    def __init__(self, size, clues, solution, unique=True, grade=None):
+        self.size = size
+        self.clues = bytes(clues)
+        self.solution = bytes(solution) if solution is not None else None
+        self.unique = unique
+        self.grade = grade
+
+    def __repr__(self):
+        band = self.grade.band if self.grade is not None else None
+        return f"Puzzle(size={self.size}, unique={self.unique}, band={band})"
+
+
+class CellRow:
+    """
+    One row of a flat cell array, indexable like the old list-of-lists rows.
+    Read-only: a cell write also has to update edges, degrees, counters and
+    loops, so moves go through SlantGame.apply_move().
+    """
+    __slots__ = ('data', 'offset', 'size', 'symbols', 'codes')
+
+    def __init__(self, data, offset, size, symbols, codes):
+        self.data = data
+        self.offset = offset
+        self.size = size
+        self.symbols = symbols
+        self.codes = codes
+
+    def __getitem__(self, c):
+        if isinstance(c, slice):
+            return [self.symbols[v] for v in self.data[self.offset:self.offset + self.size][c]]
+        if c < 0:
+            c += self.size
+        if not 0 <= c < self.size:
+            raise IndexError(c)
+        return self.symbols[self.data[self.offset + c]]
+
+    def __setitem__(self, c, value):
+        raise TypeError("board rows are read-only; use SlantGame.apply_move()")
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(self[:])
+
+
+class NodeMap(MutableMapping):
+    """
+    Dict-style view keyed by (r, c) over a flat node array. Nodes holding
+    `missing` are treated as absent (used for clues).
+
+    Only clues can be written: through Board.set_clue(), then on_change()
+    (the game drops its grade and bumps its version). Degrees follow the
+    cells and are read-only.
+    """
+
+    def __init__(self, board, field, missing=None, on_change=None):
+        self.board = board
+        self.field = field
+        self.missing = missing
+        self.on_change = on_change
+
+    def _index(self, node):
+        r, c = node
+        ns = self.board.nodes_size
+        if not (0 <= r < ns and 0 <= c < ns):
+            raise KeyError(node)
+        return r * ns + c
+
+    def __getitem__(self, node):
+        value = getattr(self.board, self.field)[self._index(node)]
+        if value == self.missing:
+            raise KeyError(node)
+        return value
+
+    def get(self, node, default=None):
+        try:
+            return self[node]
+        except KeyError:
+            return default
+
+    def __contains__(self, node):
+        try:
+            self[node]
+        except (KeyError, TypeError, ValueError):
+            return False
+        return True
+
+    def __setitem__(self, node, value):
+        if self.field != 'clues':
+            raise TypeError(f"{self.field} are read-only")
+        self.board.set_clue(self._index(node), value)
+        if self.on_change is not None:
+            self.on_change()
+
+    def __delitem__(self, node):
+        if self.field != 'clues':
+            raise TypeError(f"{self.field} are read-only")
+        if node not in self:
+            raise KeyError(node)
+        self.board.set_clue(self._index(node), None)
+        if self.on_change is not None:
+            self.on_change()
+
+    def __iter__(self):
+        ns = self.board.nodes_size
+        data = getattr(self.board, self.field)
+        for index, value in enumerate(data):
+            if value != self.missing:
+                yield divmod(index, ns)
+
+    def __len__(self):
+        if self.field == 'clues':
+            return self.board.clue_count
+        return len(getattr(self.board, self.field))
+
+    def copy(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.copy())
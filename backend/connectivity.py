@@ -0,0 +1,200 @@
+from collections import deque
+
+
+class RollbackUnionFind:
+    """
+    Connectivity index over the grid nodes, kept in sync with the edge set.
+
+    Union by size without path compression, so every union can be undone by
+    popping the trail. Removing the most recently added edge is a rollback;
+    removing any other edge marks the index stale and it is rebuilt lazily
+    from the edge list the next time it is queried.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.parent = list(range(n))
+        self.weight = [1] * n
+        # Each entry is (child_root, parent_root) for a real union, or None
+        # when the edge joined two nodes that were already connected.
+        self.trail = []
+        self.trail_edges = []
+        self.stale = False
+
+    def reset(self):
+        self.parent = list(range(self.n))
+        self.weight = [1] * self.n
+        self.trail = []
+        self.trail_edges = []
+        self.stale = False
+
+    def find(self, a):
+        parent = self.parent
+        while parent[a] != a:
+            a = parent[a]
+        return a
+
+    def connected(self, a, b):
+        return self.find(a) == self.find(b)
+
+    def add_edge(self, a, b):
+        """Record edge a-b. Returns True if it joined two components."""
+        if self.stale:
+            return False
+        ra, rb = self.find(a), self.find(b)
+        self.trail_edges.append((a, b))
+        if ra == rb:
+            self.trail.append(None)
+            return False
+        if self.weight[ra] < self.weight[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.weight[ra] += self.weight[rb]
+        self.trail.append((rb, ra))
+        return True
+
+    def remove_edge(self, a, b):
+        """
+        Forget edge a-b. O(1) when it is the last edge added, otherwise the
+        index goes stale until the next rebuild.
+        """
+        if self.stale:
+            return
+        if self.trail_edges and self.trail_edges[-1] in ((a, b), (b, a)):
+            self.trail_edges.pop()
+            entry = self.trail.pop()
+            if entry is not None:
+                child, root = entry
+                self.parent[child] = child
+                self.weight[root] -= self.weight[child]
+            return
+        self.stale = True
+
+    def rebuild(self, edges):
+        self.reset()
+        for a, b in edges:
+            self.add_edge(a, b)
+
+
+class LoopTracker:
+    """
+    The cells on loops, kept up to date per move.
+
+    `loops` maps the cell whose slash closed a loop to the cells of that loop.
+    The recorded loops form a basis of the graph's cycle space (each one
+    holds an edge none of the others do), so their union is exactly the set
+    of edges that lie on some loop, whatever its shape.
+
+    Placing a slash that joins two already connected nodes costs one BFS for
+    the path between them. Removing a slash that is on no loop, or on just
+    one, changes nothing else; only a slash shared by several loops makes the
+    loops of its component be recomputed.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.loops = {}   # closing cell -> tuple of cells on the loop
+        self.through = {} # cell -> closing cells of the loops it is on
+
+    def reset(self):
+        self.loops.clear()
+        self.through.clear()
+
+    def cells(self):
+        """Every cell on a loop as sorted (r, c) pairs."""
+        return [divmod(i, self.board.size) for i in sorted(self.through)]
+
+    def add(self, i, a, b):
+        """
+        Cell i's slash a-b was placed; call it when a and b may already have
+        been connected. Returns True if it closed a loop.
+        """
+        path = self._path(a, b)
+        if path is None:
+            return False
+        self._record(i, path + [i])
+        return True
+
+    def remove(self, i, a, b):
+        """
+        Cell i's slash a-b was removed. Returns True if the loop cells changed.
+        """
+        keys = self.through.get(i)
+        if not keys:
+            return False
+        if len(keys) == 1:
+            self._drop(next(iter(keys)))
+            return True
+        self._recompute((a, b), set(keys))
+        return True
+
+    def rebuild(self):
+        self.reset()
+        self._recompute(range(len(self.board.adjacency)), set())
+
+    def _record(self, key, loop):
+        self.loops[key] = tuple(loop)
+        for cell in loop:
+            self.through.setdefault(cell, set()).add(key)
+
+    def _drop(self, key):
+        for cell in self.loops.pop(key):
+            keys = self.through[cell]
+            keys.discard(key)
+            if not keys:
+                del self.through[cell]
+
+    def _path(self, a, b):
+        """Cells on a shortest path a -> b that does not use the a-b slash itself."""
+        neighbors, edge_cell = self.board.neighbors, self.board.edge_cell
+        came = {a: None}
+        queue = deque([a])
+        while queue:
+            node = queue.popleft()
+            for nxt in neighbors(node):
+                if nxt in came or (node == a and nxt == b):
+                    continue
+                came[nxt] = node
+                if nxt == b:
+                    path = []
+                    while nxt != a:
+                        path.append(edge_cell(nxt, came[nxt]))
+                        nxt = came[nxt]
+                    return path
+                queue.append(nxt)
+        return None
+
+    def _recompute(self, starts, stale):
+        """
+        Replaces the loops of the components containing `starts` (plus the
+        `stale` closing cells) with the fundamental cycles of a BFS tree.
+        """
+        neighbors, edge_cell = self.board.neighbors, self.board.edge_cell
+        parent, depth = {}, {}
+        closing = []
+        for root in starts:
+            if root in parent:
+                continue
+            parent[root], depth[root] = None, 0
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                for nxt in neighbors(node):
+                    cell = edge_cell(node, nxt)
+                    stale.update(self.through.get(cell, ()))
+                    if nxt not in parent:
+                        parent[nxt], depth[nxt] = node, depth[node] + 1
+                        queue.append(nxt)
+                    elif nxt != parent[node] and node < nxt and parent[nxt] != node:
+                        closing.append((cell, node, nxt))
+        for key in stale:
+            if key in self.loops:
+                self._drop(key)
+        for cell, a, b in closing:
+            loop = [cell]
+            while a != b:
+                if depth[a] < depth[b]:
+                    a, b = b, a
+                loop.append(edge_cell(a, parent[a]))
+                a = parent[a]
+            self._record(cell, loop)
@@ -1,9 +1,31 @@
+import heapq
+import math
 import random
+import time
+
+from board import EMPTY, L, R, NO_CLUE, OWNER_NAMES
+from game_logic import move_points
+
+try:
+    import numpy as np
+except ImportError: # Scalar scorers only
+    np = None
+
+# Boards at least this size score all moves at once with NumPy (below it the
+# array setup costs more than the Python loop)
+VECTORIZE_MIN_SIZE = 7
+
+# Per strategy: (bonus when a clue is met, bonus when moving towards a clue,
+# bonus per endpoint that already has a line) -- must match _evaluate_*
+BATCH_WEIGHTS = {1: (0.5, 0.2, 0.1), 2: (0.6, 0.3, 0.05), 3: (0.4, 0.1, 0.08)}
 
 class GreedyAI:
-    def __init__(self, game, strategy=1):
+    def __init__(self, game, strategy=1, vectorized=None):
         self.game = game
         self.strategy = strategy  # 1, 2, or 3
+        if vectorized is None:
+            vectorized = np is not None and game.size >= VECTORIZE_MIN_SIZE
+        self.vectorized = vectorized and np is not None
         
     def get_best_move(self):
         """Returns (r, c, move_type) based on selected strategy"""
@@ -19,6 +41,8 @@ class GreedyAI:
     # ==================== STRATEGY 1: Constraint-Focused ====================
     def _strategy_constraint_focused(self):
         """Original strategy: Prioritizes cells near constraints"""
+        if self.vectorized:
+            return self._batch_best_move(1)
         best_score = -float('inf')
         best_moves = []
         
@@ -96,6 +120,8 @@ class GreedyAI:
     # ==================== STRATEGY 2: Edge-First ====================
     def _strategy_edge_first(self):
         """Strategy 2: Starts from edges and works inward"""
+        if self.vectorized:
+            return self._batch_best_move(2)
         best_score = -float('inf')
         best_moves = []
         
@@ -175,15 +201,18 @@ class GreedyAI:
         size = self.game.size
         
         # Collect all valid moves
-        for r in range(size):
-            for c in range(size):
-                if self.game.grid[r][c] is None:
-                    for move_type in ['L', 'R']:
-                        if self.game.is_move_valid(r, c, move_type):
-                            score = self._evaluate_random_greedy(r, c, move_type)
-                            # Only consider moves with positive scores
-                            if score > 0:
-                                valid_moves.append((r, c, move_type, score))
+        if self.vectorized:
+            valid_moves = self._batch_positive_moves()
+        else:
+            for r in range(size):
+                for c in range(size):
+                    if self.game.grid[r][c] is None:
+                        for move_type in ['L', 'R']:
+                            if self.game.is_move_valid(r, c, move_type):
+                                score = self._evaluate_random_greedy(r, c, move_type)
+                                # Only consider moves with positive scores
+                                if score > 0:
+                                    valid_moves.append((r, c, move_type, score))
         
         if not valid_moves:
             return None
@@ -236,3 +265,467 @@ class GreedyAI:
                 score += 0.08
         
         return score
+
+    # ==================== Batched scoring (NumPy) ====================
+    def _batch_scores(self):
+        """
+        Scores every empty cell for both slashes at once. Returns (scores,
+        valid), arrays indexed [slash, r, c] with slash 0 = 'L', 1 = 'R';
+        `valid` is what is_move_valid() would say. The float operations are
+        the ones the _evaluate_* scorer for this strategy does, in the same
+        order, so every score is bit-for-bit the scalar one.
+        """
+        game = self.game
+        board = game.board
+        n, ns = game.size, game.size + 1
+        degrees = np.frombuffer(board.degrees, dtype=np.uint8).reshape(ns, ns).astype(np.int64)
+        clues = np.frombuffer(board.clues, dtype=np.uint8).reshape(ns, ns).astype(np.int64)
+        empty = np.frombuffer(board.cells, dtype=np.uint8).reshape(n, n) == EMPTY
+
+        # Union-find roots by pointer jumping: a slash loops iff its ends share a root
+        roots = np.array(game._get_connectivity().parent)
+        while True:
+            up = roots[roots]
+            if np.array_equal(up, roots):
+                break
+            roots = up
+        roots = roots.reshape(ns, ns)
+
+        met, towards, link = BATCH_WEIGHTS[self.strategy]
+        rows, cols = np.indices((n, n))
+        scores = np.empty((2, n, n))
+        valid = np.empty((2, n, n), dtype=bool)
+        # Endpoint node views: L joins (r, c)-(r+1, c+1), R joins (r+1, c)-(r, c+1)
+        for slash, ends in enumerate(((np.s_[:-1, :-1], np.s_[1:, 1:]),
+                                      (np.s_[1:, :-1], np.s_[:-1, 1:]))):
+            score = np.full((n, n), 1.0)
+            ok = empty & (roots[ends[0]] != roots[ends[1]])
+            for end in ends:
+                new_deg = degrees[end] + 1
+                limit = clues[end]
+                score += np.where(limit != NO_CLUE,
+                                  np.where(new_deg == limit, met, np.where(new_deg < limit, towards, -100.0)),
+                                  np.where(new_deg > 4, -100.0, 0.0))
+                ok &= (new_deg <= 4) & (new_deg <= limit) # NO_CLUE never binds
+            if self.strategy == 2:
+                mid = n / 2
+                score += (np.abs(rows - mid) + np.abs(cols - mid)) * 0.15
+            for end in ends:
+                score += np.where(degrees[end] > 0, link, 0.0)
+            if self.strategy == 1:
+                mid = n // 2
+                score -= (np.abs(rows - mid) + np.abs(cols - mid)) * 0.05
+            scores[slash] = score
+            valid[slash] = ok
+        return scores, valid
+
+    def _batch_best_move(self, strategy):
+        """Strategies 1 and 2 on batched scores: same candidate order and tie-break as the loops above."""
+        scores, valid = self._batch_scores()
+        if not valid.any():
+            return None
+        best = scores[valid].max()
+        slash, r, c = np.nonzero(valid & (scores == best))
+
+        n = self.game.size
+        if strategy == 1:
+            # Cells with more clued corners first
+            clued = (np.frombuffer(self.game.board.clues, dtype=np.uint8)
+                     .reshape(n + 1, n + 1) != NO_CLUE).astype(np.int64)
+            nearby = clued[:-1, :-1] + clued[1:, 1:] + clued[1:, :-1] + clued[:-1, 1:]
+            priority = -nearby[r, c]
+        else:
+            # Edges first
+            mid = n / 2
+            priority = -(np.abs(r - mid) + np.abs(c - mid))
+        order = np.lexsort((slash, r * n + c, priority))
+        best_moves = [(int(r[k]), int(c[k]), 'LR'[slash[k]]) for k in order]
+        return random.choice(best_moves)
+
+    def _batch_positive_moves(self):
+        """Strategy 3's candidate list (valid, score > 0) in the loop's row-major order."""
+        scores, valid = self._batch_scores()
+        scores = scores.transpose(1, 2, 0) # [r, c, slash]: nonzero() then yields row-major order
+        r, c, slash = np.nonzero(valid.transpose(1, 2, 0) & (scores > 0))
+        types = ['LR'[k] for k in slash.tolist()]
+        return list(zip(r.tolist(), c.tolist(), types, scores[r, c, slash].tolist()))
+
+
+class IncrementalAI(GreedyAI):
+    """
+    Long-lived GreedyAI for one game (kept on its GameSession).
+
+    Instead of rescoring the whole board on every move it keeps a score for
+    every empty cell and slash that passes the degree/clue checks, bucketed
+    by score. A move only changes the degrees of its cell's corners, so
+    after catching up on game.changed_cells() just the 3x3 block of cells
+    around each changed one is rescored. The loop check depends on the whole
+    graph, so it is done at pick time, on the top bucket only.
+
+    Scores come from the same _evaluate_* methods and ties are ordered the
+    way the full scan orders them, so for the same random state the chosen
+    move is the one GreedyAI would choose.
+    """
+
+    def __init__(self, game, strategy=1):
+        super().__init__(game, strategy)
+        self.evaluate = {1: self._evaluate_constraint_focused,
+                         2: self._evaluate_edge_first,
+                         3: self._evaluate_random_greedy}.get(strategy, self._evaluate_constraint_focused)
+        self.version = None
+        self._rebuild()
+
+    def _rebuild(self):
+        game = self.game
+        n = self.size = game.size
+        # Static per cell: tie order of the full scan (more clued corners first / edges first)
+        clues = game.board.clues
+        ns = n + 1
+        self._priority = []
+        for i in range(n * n):
+            r, c = divmod(i, n)
+            if self.strategy == 2:
+                mid = n / 2
+                self._priority.append(-(abs(r - mid) + abs(c - mid)))
+            else:
+                top_left = r * ns + c
+                corners = (top_left, top_left + 1, top_left + ns, top_left + ns + 1)
+                self._priority.append(-sum(1 for node in corners if clues[node] != NO_CLUE))
+        self._scores = [None] * (2 * n * n) # move k = 2 * cell + slash; None = not a candidate
+        self._buckets = {} # score -> set of moves
+        self._heap = [] # -score for every bucket (lazily cleaned)
+        for i in range(n * n):
+            self._rescore_cell(i)
+        self.version = game.version
+
+    def _sync(self):
+        game = self.game
+        if game.version == self.version:
+            return
+        changed = game.changed_cells(self.version)
+        if changed is None or game.size != self.size:
+            self._rebuild()
+            return
+        n = self.size
+        touched = set()
+        for i in changed:
+            r, c = divmod(i, n)
+            for rr in range(max(r - 1, 0), min(r + 2, n)):
+                for cc in range(max(c - 1, 0), min(c + 2, n)):
+                    touched.add(rr * n + cc)
+        for i in touched:
+            self._rescore_cell(i)
+        self.version = game.version
+
+    def _rescore_cell(self, i):
+        game = self.game
+        r, c = divmod(i, self.size)
+        empty = game.board.cells[i] == EMPTY
+        for slash, move_type in enumerate('LR'):
+            k = 2 * i + slash
+            score = None
+            if empty and game.is_move_valid(r, c, move_type, strict_cycles=False):
+                score = self.evaluate(r, c, move_type)
+            old = self._scores[k]
+            if old == score:
+                continue
+            if old is not None:
+                bucket = self._buckets[old]
+                bucket.discard(k)
+                if not bucket:
+                    del self._buckets[old]
+            if score is not None:
+                bucket = self._buckets.get(score)
+                if bucket is None:
+                    bucket = self._buckets[score] = set()
+                    heapq.heappush(self._heap, -score)
+                bucket.add(k)
+            self._scores[k] = score
+
+    def _loops(self, k):
+        i, slash = divmod(k, 2)
+        u, v = self.game.board.slash_ends(i, (L, R)[slash])
+        return self.game._get_connectivity().connected(u, v)
+
+    def _move(self, k):
+        i, slash = divmod(k, 2)
+        r, c = divmod(i, self.size)
+        return (r, c, 'LR'[slash])
+
+    def _strategy_constraint_focused(self):
+        return self._best_candidate()
+
+    def _strategy_edge_first(self):
+        return self._best_candidate()
+
+    def _best_candidate(self):
+        """Best-scoring move that doesn't close a loop, random among ties."""
+        self._sync()
+        heap, buckets = self._heap, self._buckets
+        if len(heap) > 2 * len(buckets) + 16:
+            heap[:] = [-score for score in buckets]
+            heapq.heapify(heap)
+        popped = set() # Scores looked at; their heap entries go back afterwards
+        try:
+            while heap:
+                score = -heapq.heappop(heap)
+                if score in popped or score not in buckets:
+                    continue
+                popped.add(score)
+                moves = [k for k in buckets[score] if not self._loops(k)]
+                if moves:
+                    priority = self._priority
+                    moves.sort(key=lambda k: (priority[k // 2], k))
+                    return self._move(random.choice(moves))
+            return None
+        finally:
+            for score in popped:
+                heapq.heappush(heap, -score)
+
+    def _strategy_random_greedy(self):
+        """
+        Strategy 3 draws noise for every candidate, so it stays linear in the
+        number of candidates: only the scoring is skipped, and on boards the
+        batched scorer handles that is the faster route.
+        """
+        if self.vectorized:
+            return super()._strategy_random_greedy()
+        self._sync()
+        valid_moves = []
+        for k, score in enumerate(self._scores):
+            if score is not None and score > 0 and not self._loops(k):
+                valid_moves.append(self._move(k) + (score,))
+        if not valid_moves:
+            return None
+        noisy_moves = [(r, c, move_type, score + random.uniform(-0.3, 0.3))
+                       for r, c, move_type, score in valid_moves]
+        noisy_moves.sort(key=lambda x: x[3], reverse=True)
+        top_count = max(1, len(noisy_moves) // 3)
+        chosen = random.choice(noisy_moves[:top_count])
+        return (chosen[0], chosen[1], chosen[2])
+
+
+# ==================== STRATEGY 4: Monte Carlo Tree Search ====================
+
+MCTS_BUDGET_MS = 250 # Per CPU move
+MCTS_EXPLORATION = 0.7 # UCT constant
+# Playout outcome, scored for each player: finishing the puzzle beats breaking
+# it even for the player who ends up behind on points. A playout that gets
+# stuck scores REWARD_STUCK times the share of the board it managed to fill,
+# so on big boards (where most playouts get stuck) longer ones still count.
+REWARD_WIN, REWARD_DRAW, REWARD_LOSS, REWARD_STUCK = 1.0, 0.6, 0.3, 0.25
+
+HUMAN, CPU = 0, 1
+PLAYERS = ('HUMAN', 'CPU')
+
+
+class _Node:
+    __slots__ = ('move', 'player', 'parent', 'children', 'untried', 'visits', 'reward')
+
+    def __init__(self, move, player, parent=None):
+        self.move = move # (cell, L/R) that led here, played by `player`
+        self.player = player
+        self.parent = parent
+        self.children = {}
+        self.untried = None # Moves not expanded yet; None until first visited
+        self.visits = 0
+        self.reward = 0.0 # Sum of playout rewards for `player`
+
+
+class _Playout:
+    """
+    Scratch copy of a position for one MCTS iteration: cells, degrees, a
+    union-find over the nodes (path halving; it is thrown away after) and
+    both scores. Moves are scored with move_points(), like apply_move.
+    """
+    __slots__ = ('size', 'cells', 'degrees', 'clues', 'parent', 'scores')
+
+    def __init__(self, size, cells, degrees, clues, parent, scores):
+        self.size = size
+        self.cells = bytearray(cells)
+        self.degrees = bytearray(degrees)
+        self.clues = clues
+        self.parent = list(parent)
+        self.scores = list(scores)
+
+    def _find(self, a):
+        parent = self.parent
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    def _ends(self, i, code):
+        ns = self.size + 1
+        r, c = divmod(i, self.size)
+        tl = r * ns + c
+        return (tl, tl + ns + 1) if code == L else (tl + ns, tl + 1)
+
+    def valid(self, i, code):
+        """is_move_valid() for an empty cell."""
+        u, v = self._ends(i, code)
+        degrees, clues = self.degrees, self.clues
+        if degrees[u] >= min(4, clues[u]) or degrees[v] >= min(4, clues[v]):
+            return False
+        return self._find(u) != self._find(v)
+
+    def completes(self, i, code):
+        """Clues this move would satisfy (greedy playout tie-break)."""
+        return sum(1 for n in self._ends(i, code) if self.degrees[n] + 1 == self.clues[n])
+
+    def play(self, i, code, player):
+        u, v = self._ends(i, code)
+        self.cells[i] = code
+        self.degrees[u] += 1
+        self.degrees[v] += 1
+        self.parent[self._find(u)] = self._find(v)
+        self.scores[player] += move_points(self.size, self.degrees, self.clues, i, code)
+
+    def moves(self):
+        """Valid moves, most promising last (nodes pop from the end)."""
+        moves = [(i, code) for i, cell in enumerate(self.cells) if cell == EMPTY
+                 for code in (L, R) if self.valid(i, code)]
+        random.shuffle(moves)
+        moves.sort(key=lambda m: self.completes(*m))
+        return moves
+
+    def rollout(self, player):
+        """
+        Plays the rest of the board out with `player` to move: empty cells in
+        random order, each gets a valid slash (the one meeting more clues,
+        else random). Returns the rewards (HUMAN, CPU).
+        """
+        empty = [i for i, cell in enumerate(self.cells) if cell == EMPTY]
+        random.shuffle(empty)
+        filled = len(self.cells) - len(empty)
+        for i in empty:
+            options = [code for code in (L, R) if self.valid(i, code)]
+            if not options:
+                # Degrees and connectivity only grow, so this cell is dead for good
+                reward = REWARD_STUCK * filled / len(self.cells)
+                return reward, reward
+            if len(options) == 2:
+                gain_l, gain_r = self.completes(i, L), self.completes(i, R)
+                if gain_l != gain_r:
+                    options = [L] if gain_l > gain_r else [R]
+            self.play(i, random.choice(options), player)
+            player = 1 - player
+            filled += 1
+        if any(clue != NO_CLUE and degree != clue for degree, clue in zip(self.degrees, self.clues)):
+            return REWARD_STUCK, REWARD_STUCK # Full, but some clue is short
+        human, cpu = self.scores
+        if human == cpu:
+            return REWARD_DRAW, REWARD_DRAW
+        return (REWARD_WIN, REWARD_LOSS) if human > cpu else (REWARD_LOSS, REWARD_WIN)
+
+
+class MonteCarloAI:
+    """
+    Strategy 4: UCT search over the remaining moves of both players, with
+    playouts scored like apply_move. Each call searches for `budget_ms`
+    and then plays the most visited move, so latency doesn't grow with the
+    board. The tree is kept between turns: when the game has only moved on
+    by moves the tree already holds (our reply, then the human's), search
+    resumes from that subtree instead of from scratch.
+    """
+
+    def __init__(self, game, strategy=4, budget_ms=MCTS_BUDGET_MS, clock=time.perf_counter):
+        self.game = game
+        self.strategy = strategy
+        self.budget_ms = budget_ms
+        self.clock = clock
+        self.root = None
+        self.version = None # Game version the root stands for
+        self.iterations = 0 # Of the last search
+        # Size of the kept tree (GameSession.estimate_bytes): nodes, and the
+        # moves their `untried` lists still hold
+        self.nodes = 0
+        self.untried = 0
+
+    def get_best_move(self):
+        game = self.game
+        turn = PLAYERS.index(game.turn)
+        root = self._reuse(turn)
+        if root is None:
+            root = _Node(None, 1 - turn)
+        root.parent = None
+        self._count(root)
+        self.root, self.version = root, game.version
+
+        b = game.board
+        start = (b.size, b.cells, b.degrees, b.clues, game._get_connectivity().parent,
+                 (game.scores['HUMAN'], game.scores['CPU']))
+        deadline = self.clock() + self.budget_ms / 1000
+        self.iterations = 0
+        while True:
+            self._iterate(root, _Playout(*start))
+            self.iterations += 1
+            if not root.untried and not root.children:
+                return None # No valid move: pass
+            if self.clock() >= deadline:
+                break
+
+        best = max(root.children.values(), key=lambda child: (child.visits, child.reward))
+        i, code = best.move
+        r, c = divmod(i, game.size)
+        return (r, c, 'LR'[code == R])
+
+    def _iterate(self, root, sim):
+        node = root
+        # Selection: follow UCT through fully expanded nodes
+        while node.untried is not None and not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children.values(),
+                       key=lambda child: child.reward / child.visits
+                       + MCTS_EXPLORATION * math.sqrt(log_visits / child.visits))
+            sim.play(*node.move, node.player)
+        # Expansion
+        if node.untried is None:
+            node.untried = sim.moves()
+            self.untried += len(node.untried)
+        if node.untried:
+            move = node.untried.pop()
+            self.nodes += 1
+            self.untried -= 1
+            child = node.children[move] = _Node(move, 1 - node.player, node)
+            sim.play(*move, child.player)
+            node = child
+        # Playout and backpropagation
+        rewards = sim.rollout(1 - node.player)
+        while node is not None:
+            node.visits += 1
+            node.reward += rewards[node.player]
+            node = node.parent
+
+    def _count(self, root):
+        """Recounts nodes / untried for the tree under `root` (the rest was dropped)."""
+        nodes = untried = 0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            nodes += 1
+            untried += len(node.untried or ())
+            stack.extend(node.children.values())
+        self.nodes, self.untried = nodes, untried
+
+    def _reuse(self, turn):
+        """The subtree for the current position, if the game only moved on through it."""
+        if self.root is None:
+            return None
+        changed = self.game.changed_cells(self.version)
+        if changed is None or len(changed) > 2:
+            return None
+        cells, owners = self.game.board.cells, self.game.board.owners
+        node = self.root
+        while changed:
+            for i in changed:
+                # Same move by the same player: the other order reaches the
+                # same cells with the points credited the other way round
+                child = node.children.get((i, cells[i]))
+                if child is not None and PLAYERS[child.player] == OWNER_NAMES[owners[i]]:
+                    break
+            else:
+                return None # A clear, or a move the tree never expanded
+            changed.discard(i)
+            node = child
+        return node if 1 - node.player == turn else None
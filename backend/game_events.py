@@ -0,0 +1,75 @@
+import json
+import queue
+import threading
+
+
+def format_event(event, data):
+    """One Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class EventChannel:
+    """
+    Fan-out of one game's events to its /api/events streams.
+
+    Every subscriber gets its own bounded queue and publish() never blocks:
+    a subscriber that falls `max_pending` messages behind is dropped (its
+    stream ends), and the browser's EventSource reconnects and starts over
+    from a full snapshot.
+    """
+
+    def __init__(self, max_pending=64):
+        self.max_pending = max_pending
+        self.closed = False
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(self.max_pending + 1) # +1 leaves room for the end marker
+        with self._lock:
+            if self.closed:
+                q.put(None)
+            else:
+                self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def publish(self, event, data):
+        if not self._subscribers:
+            return
+        message = format_event(event, data)
+        with self._lock:
+            for q in list(self._subscribers):
+                if q.qsize() >= self.max_pending:
+                    self._subscribers.remove(q)
+                    q.put_nowait(None) # Too slow: end its stream
+                else:
+                    q.put_nowait(message)
+
+    def close(self):
+        """Ends every stream (game replaced or evicted)."""
+        with self._lock:
+            self.closed = True
+            for q in self._subscribers:
+                q.put_nowait(None)
+            self._subscribers = []
+
+
+def stream(q, keepalive=15.0):
+    """SSE text for one subscriber queue; a comment line every `keepalive` seconds keeps proxies from timing out."""
+    while True:
+        try:
+            message = q.get(timeout=keepalive)
+        except queue.Empty:
+            yield ": keepalive\n\n"
+            continue
+        if message is None:
+            return
+        yield message
@@ -1,98 +1,374 @@
 import random
-import sys
+from collections import deque
 
-# Increase recursion depth for backtracking constraints generation if needed
-sys.setrecursionlimit(2000)
+from board import (Board, CellRow, NodeMap, Puzzle, EMPTY, L, R, CELL_SYMBOLS, CELL_CODES,
+                   OWNER_NAMES, OWNER_CODES, NO_CLUE)
+from connectivity import LoopTracker, RollbackUnionFind
+from grading import grade, DIFFICULTY_BANDS
+from solver import PropagationSolver, TranspositionTable
+from parallel import default_search
+
+# Cell changes remembered for delta responses; older clients get a full snapshot
+CHANGE_LOG_SIZE = 512
+
+# Transposition table entries shared by the uniqueness counts of one
+# generation (see solver.TranspositionTable); 0 turns the table off. Below
+# GENERATION_TABLE_MIN_SIZE the counts are so short that lookups cost about
+# what they save (benchmarks/bench_transposition.py).
+GENERATION_TABLE_ENTRIES = 200000
+GENERATION_TABLE_MIN_SIZE = 10
+
+# Orders minimize_clues() can try clues for removal in:
+#   'spread'          reverse farthest-point order, so the clues kept stay spread out
+#   'random'          shuffled
+#   'extremes_first'  0s and saturated clues (the ones that give the most away) first
+MINIMIZE_ORDERS = ('spread', 'random', 'extremes_first')
+
+# to_dict() keys. 'graph' is a debug view and only sent when asked for.
+STATE_FIELDS = ('size', 'grid', 'constraints', 'node_degrees', 'status', 'turn',
+                'scores', 'owners', 'loop_cells', 'version', 'difficulty')
+ALL_STATE_FIELDS = STATE_FIELDS + ('graph',)
+CACHED_STATE_FIELDS = frozenset(('grid', 'owners', 'constraints', 'node_degrees', 'graph'))
+
+# bytes.translate tables for the compact encoding
+_COMPACT_CELLS = bytes.maketrans(bytes([EMPTY, L, R]), b'.LR')
+_COMPACT_OWNERS = bytes.maketrans(bytes([0, 1, 2]), b'.HC')
+_COMPACT_DIGITS = bytes.maketrans(bytes(range(10)) + bytes([NO_CLUE]), b'0123456789.')
+_COMPACT_HEX = bytes.maketrans(bytes(range(16)), b'0123456789abcdef')
+
+_NODE_KEYS = {}
+
+def _node_keys(nodes_size):
+    """"r,c" JSON keys for every node id, built once per board size."""
+    keys = _NODE_KEYS.get(nodes_size)
+    if keys is None:
+        keys = _NODE_KEYS[nodes_size] = tuple(f"{r},{c}" for r in range(nodes_size)
+                                               for c in range(nodes_size))
+    return keys
+
+def move_points(size, degrees, clues, i, code):
+    """
+    Points for the slash `code` just placed in cell i (degrees already
+    include it). Shared by apply_move and the CPU's playouts.
+    """
+    ns = size + 1
+    r, c = divmod(i, size)
+    top_left = r * ns + c
+    n1, n2 = (top_left, top_left + ns + 1) if code == L else (top_left + ns, top_left + 1)
+
+    # Criteria-Based Fair Scoring System
+    # Both HUMAN and CPU use the SAME criteria, ensuring fairness
+    points_earned = 0
+
+    # Criterion 1: Base Move Points (1 point for any valid move)
+    points_earned += 1
+
+    # Criterion 2: Constraint Satisfaction Bonus (+2 points per constraint satisfied)
+    # This rewards smart moves that complete numbered nodes
+    nodes_checked = [n1, n2]
+    constraints_satisfied = 0
+
+    for n in nodes_checked:
+        # Check if THIS move completes the constraint (NO_CLUE never matches a degree)
+        if degrees[n] == clues[n]:
+            constraints_satisfied += 1
+
+    points_earned += (constraints_satisfied * 2)  # +2 per satisfied constraint
+
+    # Criterion 3: Perfect Cell Bonus (+3 points if all 4 corners are satisfied)
+    # This rewards creating complete, valid cells
+    cell_corners = [top_left, top_left + ns + 1,
+                    top_left + ns, top_left + 1]
+    all_corners_satisfied = True
+
+    for corner in cell_corners:
+        limit = clues[corner]
+        if limit != NO_CLUE and degrees[corner] != limit:
+            all_corners_satisfied = False
+            break
+
+    if all_corners_satisfied and any(clues[n] != NO_CLUE for n in cell_corners):
+        points_earned += 3  # Perfect cell bonus
+
+    # Criterion 4: Strategic Position Bonus (+1 for center moves)
+    # Slightly rewards filling the center area which is strategically important
+    mid = size // 2
+    if abs(r - mid) <= 1 and abs(c - mid) <= 1:
+        points_earned += 1
+    return points_earned
+
+class FarthestPointSampler:
+    """
+    Farthest point sampling over the grid nodes, for spreading clues.
+
+    Keeps every node's Manhattan distance to the nearest picked node and
+    buckets the unpicked ones by it. A pick takes a random node from the
+    highest bucket, then a BFS from it lowers the distances around it,
+    stopping wherever they don't improve (on an open grid the improved area
+    is connected). Spreading k clues over N nodes costs about O(N log N)
+    instead of scanning candidates x clues on every pick.
+    """
+
+    def __init__(self, nodes_size):
+        self.nodes_size = nodes_size
+        total = nodes_size * nodes_size
+        self.dist = [total] * total # Beyond any real distance until the first pick
+        self.buckets = {total: list(range(total))} # distance -> unpicked node ids
+        self.slot = list(range(total)) # Index in its bucket, -1 once picked
+        self.top = total
+        self.remaining = total
+
+    def pick(self):
+        """Picks a farthest unpicked node (ties at random); returns its id, or None."""
+        if not self.remaining:
+            return None
+        while not self.buckets.get(self.top):
+            self.top -= 1
+        node = random.choice(self.buckets[self.top])
+        self.take(node)
+        return node
+
+    def take(self, node):
+        """Marks `node` picked and lowers the distances around it."""
+        if self.slot[node] >= 0:
+            self._unbucket(node)
+            self.slot[node] = -1
+            self.remaining -= 1
+        ns, dist = self.nodes_size, self.dist
+        dist[node] = 0
+        queue = deque([node])
+        while queue:
+            cur = queue.popleft()
+            d = dist[cur] + 1
+            r, c = divmod(cur, ns)
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < ns and 0 <= nc < ns:
+                    nxt = nr * ns + nc
+                    if d < dist[nxt]:
+                        if self.slot[nxt] >= 0:
+                            self._unbucket(nxt)
+                            dist[nxt] = d
+                            bucket = self.buckets.setdefault(d, [])
+                            self.slot[nxt] = len(bucket)
+                            bucket.append(nxt)
+                        else:
+                            dist[nxt] = d
+                        queue.append(nxt)
+
+    def _unbucket(self, node):
+        # Swap-remove from its bucket
+        bucket = self.buckets[self.dist[node]]
+        i = self.slot[node]
+        last = bucket.pop()
+        if last != node:
+            bucket[i] = last
+            self.slot[last] = i
 
 # [REVIEW 1 REQUIREMENT]: Graph Representation
 # We use explicit Adjacency Lists and BFS/DFS for all graph operations.
-# UnionFind class removed to satisfy "Remove Grid Based Logic" requirement.
+# The adjacency lives in a compact Board (one 4-slot bitmask per node, see
+# board.py). Loop checks on empty cells go through a rollback union-find that
+# mirrors it (see connectivity.py); the BFS path is kept for overwrites.
 
 class SlantGame:
-    def __init__(self, size=5):
+    def __init__(self, size=5, generate=True, engine='propagation', puzzle=None, minimize=None, band=None):
         self.size = size
         self.nodes_size = size + 1
+        self.engine = engine # 'propagation', 'parallel' (multi-core) or 'backtrack' (solve_game / count_solutions)
+        # Generation mode: None adds spread clues until unique; a MINIMIZE_ORDERS
+        # name starts from every clue and removes them in that order instead
+        if minimize is not None and minimize not in MINIMIZE_ORDERS:
+            raise ValueError(f"Unknown minimize order {minimize!r}")
+        self.minimize = minimize
+        # Difficulty band to generate for (a grading.DIFFICULTY_BANDS name):
+        # minimizes (in 'spread' order unless `minimize` says otherwise) but
+        # keeps any clue whose removal would grade the puzzle harder
+        if band is not None and band not in DIFFICULTY_BANDS:
+            raise ValueError(f"Unknown difficulty band {band!r}")
+        self.band = band
         
         # [REVIEW 1 REQUIREMENT]: Formal Graph Definition G = (V, E)
-        # 1. Initialize V (Static Set of Nodes)
-        self.V = self._initialize_nodes_V()
-        
-        # 2. Initialize E (Dynamic Set of Edges) represented as Adjacency List
-        self.graph = {} # This represents E (and the graph structure)
-        self._initialize_edges_E()
-        
-        self.grid = [[None for _ in range(size)] for _ in range(size)]
-        self.constraints = {}
-        self.node_degrees = {node: 0 for node in self.V} 
+        # V is implicit in the board (node ids r * nodes_size + c), E is the
+        # per-node adjacency mask.
+        self.board = Board(size)
+        self.connectivity = RollbackUnionFind(self.nodes_size * self.nodes_size)
+        self.loops = LoopTracker(self.board) # Cells on loops, updated by _set_cell/_clear_cell
+
+        # Tuple-keyed / row-indexed views kept for callers of the old API
+        self._grid_rows = [CellRow(self.board.cells, r * size, size, CELL_SYMBOLS, CELL_CODES)
+                           for r in range(size)]
+        self._owner_rows = [CellRow(self.board.owners, r * size, size, OWNER_NAMES, OWNER_CODES)
+                            for r in range(size)]
+        self._constraints_view = NodeMap(self.board, 'clues', missing=NO_CLUE, on_change=self._clues_changed)
+        self._degrees_view = NodeMap(self.board, 'degrees')
+
+        # Versioned state: every cell change bumps `version` and is logged
+        # so to_delta() can describe what changed since a client's version.
+        self.version = 0
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE) # (version, cell index)
+        self._log_start = 0 # Deltas are only available for since >= _log_start
+        self._state_cache = {} # (field, compact) -> encoded value, see to_dict()
+        self._state_cache_version = None
+        self._state_cache_clues = None
         
         self.history = []
         self.status = "RUNNING"
         self.winner = None
         self.turn = 'HUMAN' # 'HUMAN' or 'CPU'
         self.scores = {'HUMAN': 0, 'CPU': 0}
-        self.owners = [[None for _ in range(size)] for _ in range(size)] # Track who placed what
         self.loop_cells = [] # [REVIEW 1]: Track cells in detected loops
+        self.solution = None # Solution cells (bytes) the clues were generated from, if known
+        self.unique = False
+        self.grade = None # grading.Grade of the current clues, if graded
+        self.generation_attempts = 0
+        self.transpositions = None # TranspositionTable shared by count_solutions() while generating
+        self.transposition_stats = None # Its stats() once generation is done
+        self._defer_checks = False # Set while apply_moves() runs a batch
+
+        self._initialize_empty_state()
+        if puzzle is not None:
+            self.load_puzzle(puzzle)
+        elif generate:
+            self._generate_valid_puzzle()
 
+    @classmethod
+    def from_store(cls, store, size, index=None, seed=None, **kwargs):
+        """Loads puzzle `index` (or the one generated from `seed`) out of a PuzzleStore."""
+        if seed is not None:
+            puzzle = store.get_by_seed(size, seed)
+        else:
+            puzzle = store.get(size, index)
+        return cls(size, puzzle=puzzle, **kwargs)
+
+    def load_puzzle(self, puzzle):
+        """Starts a fresh game on a pre-generated Puzzle (no generation)."""
+        if puzzle.size != self.size:
+            raise ValueError(f"Puzzle size {puzzle.size} does not match board size {self.size}")
         self._initialize_empty_state()
-        self._generate_valid_puzzle()
+        self.history = []
+        self.board.clues[:] = puzzle.clues
+        self.board.recount()
+        self._reset_changes()
+        self.solution = puzzle.solution
+        self.unique = puzzle.unique
+        self.grade = puzzle.grade
 
-    def _initialize_nodes_V(self):
+    def export_puzzle(self):
+        """Returns the current clues and known solution as a Puzzle."""
+        return Puzzle(self.size, self.board.clues, self.solution, self.unique, self.grade)
+
+    # ---- Compatibility views over the board ----
+
+    @property
+    def V(self):
         """
         Define V: All intersection points in the grid.
         Returns a list of tuples (r, c).
         """
-        nodes = []
-        for r in range(self.nodes_size):
-            for c in range(self.nodes_size):
-                nodes.append((r, c))
-        return nodes
+        return [(r, c) for r in range(self.nodes_size) for c in range(self.nodes_size)]
+
+    @property
+    def grid(self):
+        return self._grid_rows
+
+    @grid.setter
+    def grid(self, rows):
+        for r in range(self.size):
+            for c in range(self.size):
+                self.board.cells[r * self.size + c] = CELL_CODES[rows[r][c]]
+        self._rebuild_edges()
+
+    @property
+    def owners(self):
+        return self._owner_rows # Track who placed what
+
+    @owners.setter
+    def owners(self, rows):
+        for r in range(self.size):
+            for c in range(self.size):
+                self.board.owners[r * self.size + c] = OWNER_CODES[rows[r][c]]
+        self._reset_changes()
+
+    @property
+    def constraints(self):
+        return self._constraints_view
+
+    @constraints.setter
+    def constraints(self, clues):
+        clues = dict(clues)
+        self.board.clear_clues()
+        for (r, c), limit in clues.items():
+            self.board.set_clue(r * self.nodes_size + c, limit)
+        self._clues_changed()
+
+    def _clues_changed(self):
+        self.grade = None # New clues, new puzzle
+        self._reset_changes()
+
+    @property
+    def node_degrees(self):
+        return self._degrees_view
+
+    @property
+    def graph(self):
+        return self.get_graph_representation()
 
     def _initialize_edges_E(self):
         """
         Initialize E: Start with an empty edge list for every node in V.
         """
-        for node in self.V:
-            self.graph[node] = [] # Adjacency list: Node -> [Neighbors]
+        self.board.clear_cells()
+        self.connectivity.reset()
+        self.loops.reset()
+        self.loop_cells = []
+        self._reset_changes()
+
+    def _rebuild_edges(self):
+        """Recomputes adjacency and degrees after the cell array was written directly."""
+        b = self.board
+        b.adjacency[:] = bytes(len(b.adjacency))
+        b.degrees[:] = bytes(len(b.degrees))
+        for i, val in enumerate(b.cells):
+            if val != EMPTY:
+                b.link(i, val)
+                u, v = b.slash_ends(i, val)
+                b.degrees[u] += 1
+                b.degrees[v] += 1
+        b.recount()
+        self.connectivity.stale = True
+        self.loops.rebuild()
+        self.loop_cells = self.loops.cells()
+        self._reset_changes()
 
     def _initialize_empty_state(self):
-        self.grid = [[None for _ in range(self.size)] for _ in range(self.size)]
         self.status = "RUNNING"
         self.scores = {'HUMAN': 0, 'CPU': 0}
-        self.owners = [[None for _ in range(self.size)] for _ in range(self.size)]
         self.turn = 'HUMAN'
         
-        # Reset Graph (Keep V, Clear E)
+        # Reset Graph (Keep V, Clear E, degrees and owners)
         self._initialize_edges_E()
-        
-        for node in self.V:
-            self.node_degrees[node] = 0
 
     # ... (skipping _generate_valid_puzzle and other methods - ensure context matches) ...
 
     def check_completion(self):
+        # All three checks read running counters (board counts, union-find
+        # cycle count) kept up to date by every cell change, so no scans here.
+        b = self.board
+
         # 1. Check if Board is Full
-        is_full = True
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.grid[r][c] is None:
-                    is_full = False
-                    break
-        
-        if not is_full:
+        if b.filled < len(b.cells):
             self.status = "RUNNING"
             return False
 
         # Board is Full. Now check Validity.
         
         # 2. Check Constraints
-        for node, limit in self.constraints.items():
-            if self.node_degrees[node] != limit:
-                self.status = "FILLED_INVALID"
-                return False
+        if not self._constraints_satisfied():
+            self.status = "FILLED_INVALID"
+            return False
 
         # 3. Check for Loops
-        # 3. Check for Loops (Using DFS on Graph Representation - [REVIEW 1 REQUIREMENT])
-        if self.detect_cycle_dfs():
+        if self.has_loop:
              self.status = "FILLED_INVALID"
              return False
 
@@ -113,9 +389,15 @@ class SlantGame:
         # Retry loop to ensure valid puzzle generation
         attempts = 0
         success = False
+        # Successive uniqueness counts differ by one clue: share subtree results between them
+        table = None
+        if GENERATION_TABLE_ENTRIES and self.size >= GENERATION_TABLE_MIN_SIZE:
+            table = TranspositionTable(GENERATION_TABLE_ENTRIES)
+        self.transpositions = table
         
         while attempts < 10 and not success:
             attempts += 1
+            unique = False
             # 1. Start with empty board
             self._initialize_empty_state()
             self.constraints = {} # CRITICAL FIX: Clear constraints from previous failed attempts!
@@ -124,55 +406,41 @@ class SlantGame:
             # 2. Fill it with a valid solution (randomized backtracking)
             if self.solve_game(randomize=True):
                  temp_degrees = self.node_degrees.copy()
+                 self.solution = bytes(self.board.cells)
                  self._initialize_empty_state()
+
+                 if self.minimize or self.band:
+                     # Minimization mode: reveal every degree, then take clues away.
+                     # The full map is almost always unique; if not, retry.
+                     self.constraints = temp_degrees
+                     unique = success = self.count_solutions(limit=2) == 1
+                     if unique:
+                         self.unique = True
+                         self.minimize_clues(self.minimize or 'spread', self.band)
+                         if self.band is not None:
+                             # Capped at the band, but it can come out easier: retry
+                             success = grade(self.size, self.board.clues).band == self.band
+                     continue
                  
                  # 3. Initial Reveal (Uniform Spread via Farthest Point Sampling)
-                 nodes = list(temp_degrees.keys())
+                 # The first pick is uniformly random, then always a node
+                 # farthest from the clues so far (ties broken randomly to
+                 # avoid deterministic patterns), see FarthestPointSampler.
+                 sampler = FarthestPointSampler(self.nodes_size)
+                 nodes_total = len(temp_degrees)
                  
-                 # Helper to find node with max distance to existing clues
-                 def get_farthest_unrevealed(candidates, existing):
-                     if not existing:
-                         return random.choice(candidates)
-                     
-                     best_node = None
-                     max_min_dist = -1
-                     
-                     for cand in candidates:
-                         # Manhattan distance to nearest existing clue
-                         min_dist = min(abs(cand[0]-e[0]) + abs(cand[1]-e[1]) for e in existing)
-                         
-                         if min_dist > max_min_dist:
-                             max_min_dist = min_dist
-                             best_node = cand
-                         elif min_dist == max_min_dist:
-                             # Tie-break randomly to avoid deterministic patterns
-                             if random.random() < 0.3:
-                                 best_node = cand
-                                 
-                     return best_node
-
-                 # Start with random center-ish node to anchor
-                 center = (self.nodes_size // 2, self.nodes_size // 2)
-                 candidates = [n for n in nodes]
+                 def reveal():
+                     node = divmod(sampler.pick(), self.nodes_size)
+                     self.constraints[node] = temp_degrees[node]
                  
                  # Target: 35%
-                 target_count = int(len(nodes) * 0.35)
-                 
-                 # Add first node (closest to center to ensure playability starts there?) 
-                 # Or just random. Random is better for variety.
-                 first = random.choice(candidates)
-                 self.constraints[first] = temp_degrees[first]
-                 candidates.remove(first)
-                 
+                 target_count = int(nodes_total * 0.35)
                  while len(self.constraints) < target_count:
-                     next_node = get_farthest_unrevealed(candidates, list(self.constraints.keys()))
-                     self.constraints[next_node] = temp_degrees[next_node]
-                     candidates.remove(next_node)
+                     reveal()
 
                  # 4. Enhance for Uniqueness
                  # Continue using Farthest Sampling for extra clues to fill gaps
-                 unique = False
-                 max_clues = int(len(nodes) * 0.40) 
+                 max_clues = int(nodes_total * 0.40) 
                  curr_clues = len(self.constraints)
                  
                  for _ in range(20): 
@@ -181,20 +449,32 @@ class SlantGame:
                          unique = True
                          break # Unique!
                      
-                     if not candidates or curr_clues >= max_clues:
+                     if not sampler.remaining or curr_clues >= max_clues:
                          break 
                      
                      # Add clue in the biggest gap
-                     new_clue = get_farthest_unrevealed(candidates, list(self.constraints.keys()))
-                     self.constraints[new_clue] = temp_degrees[new_clue]
-                     candidates.remove(new_clue)
+                     reveal()
                      curr_clues += 1
                      
                  if unique:
                      success = True
             
+        self.unique = unique
+        # Graded once here and kept with the puzzle (export_puzzle, the store).
+        # A non-unique fallback has no grade: its band would say nothing about
+        # the puzzle the player is solving.
+        self.grade = grade(self.size, self.board.clues) if unique else None
+        self.generation_attempts = attempts # Read by benchmarks/run.py
+        self.transpositions = None
+        self.transposition_stats = table.stats() if table is not None else None
+        self.history = []
         if success:
-            print(f"Puzzle generated in {attempts} attempts with {len(self.constraints)} clues (Spread Optimized)")
+            mode = f"Minimized, {self.minimize}" if self.minimize else "Spread Optimized"
+            if self.band:
+                mode = f"Minimized to {self.band}, {self.minimize or 'spread'}"
+            print(f"Puzzle generated in {attempts} attempts with {len(self.constraints)} clues ({mode})")
+        elif unique:
+            print(f"No {self.band} puzzle in {attempts} attempts, keeping a {self.grade.band} one")
         else:
             print("Failed to generate unique puzzle under density limit, using last attempt (fallback)")
             # If fallback, we still have the last attempt's constraints. 
@@ -203,201 +483,257 @@ class SlantGame:
             # We respect the limit over uniqueness if forced.
 
 
-    def count_solutions(self, limit=2):
+    def minimize_clues(self, order='spread', band=None):
+        """
+        Removes clues one at a time in `order` (a MINIMIZE_ORDERS name or a
+        sequence of (r, c) nodes), keeping a removal only if the puzzle stays
+        unique. Needs a unique clue set and its solution. Returns the number
+        of clues removed.
+
+        With `band` (a grading.DIFFICULTY_BANDS name), a removal that would
+        grade the puzzle harder than that band is put back too, so the result
+        never grades above it.
+
+        Each step reuses the previous uniqueness proof (see
+        PropagationSolver.try_remove_clue): one solver follows the whole
+        sequence, and only solutions giving the dropped clue another degree
+        are searched for.
+        """
+        if self.solution is None or not self.unique:
+            raise ValueError("minimize_clues needs a unique puzzle with a known solution")
+        ns = self.nodes_size
+        if isinstance(order, str):
+            nodes = self._minimize_order(order)
+        else:
+            nodes = [r * ns + c for r, c in order]
+
+        if band is not None and band not in DIFFICULTY_BANDS:
+            raise ValueError(f"Unknown difficulty band {band!r}")
+        # Nothing grades above the last band: no need to grade then
+        cap = DIFFICULTY_BANDS.index(band) if band not in (None, DIFFICULTY_BANDS[-1]) else None
+
+        solver = PropagationSolver(self)
+        removed = set()
+        for node in nodes:
+            value = solver.clue[node]
+            if value < 0 or not solver.try_remove_clue(node):
+                continue
+            if cap is not None:
+                clues = bytes(NO_CLUE if limit < 0 else limit for limit in solver.clue)
+                if DIFFICULTY_BANDS.index(grade(self.size, clues).band) > cap:
+                    solver.clue[node] = value # Still unique with it: the next steps stay valid
+                    continue
+            removed.add(node)
+        self.constraints = {divmod(node, ns): limit for node, limit in enumerate(self.board.clues)
+                            if limit != NO_CLUE and node not in removed}
+        return len(removed)
+
+    def _minimize_order(self, order):
+        """Node ids of the current clues in MINIMIZE_ORDERS order `order`."""
+        if order not in MINIMIZE_ORDERS:
+            raise ValueError(f"Unknown minimize order {order!r}")
+        clues = self.board.clues
+        if order == 'spread':
+            # Farthest point sampling ranks nodes by how much spread they add;
+            # try the least useful (picked last) first
+            sampler = FarthestPointSampler(self.nodes_size)
+            ranked = [sampler.pick() for _ in range(len(clues))]
+            return [node for node in reversed(ranked) if clues[node] != NO_CLUE]
+        nodes = [node for node, limit in enumerate(clues) if limit != NO_CLUE]
+        random.shuffle(nodes)
+        if order == 'extremes_first':
+            nodes.sort(key=lambda node: clues[node] not in (0, self._node_capacity(node))) # Stable: ties stay shuffled
+        return nodes
+
+    def _node_capacity(self, node):
+        """Number of cells touching `node` (its highest possible degree)."""
+        r, c = divmod(node, self.nodes_size)
+        return (min(r, self.size - 1) - max(r - 1, 0) + 1) * (min(c, self.size - 1) - max(c - 1, 0) + 1)
+
+    def count_solutions(self, limit=2, engine=None):
         """
         Counts solutions consistent with current self.constraints.
         Returns count (capped at limit).
-        Operates on the current grid (assumed empty or partially filled during recursion).
+        Operates on the current grid (assumed empty or partially filled during the search).
         Does NOT modify self.grid permanently (backtracks).
         """
-        # We need a recursive helper that doesn't rely on global state flags like self.status
-        # And repeats the logic of solve_game but continues after finding one.
-        count = 0
-        
-        def backtrack(r, c):
-            nonlocal count
-            if count >= limit: return
+        engine = engine or self.engine
+        if engine == 'propagation':
+            return PropagationSolver(self, table=self.transpositions).count(limit)
+        if engine == 'parallel':
+            return default_search().count(self, limit)
 
-            # Find next empty
-            # Optimization: pass r, c index instead of searching every time
-            # For simplicity, use simple linear scan argument simulation
-            next_r, next_c = -1, -1
-            found = False
-            
-            # Start search from current r, c
-            curr_idx = r * self.size + c
-            for idx in range(curr_idx, self.size * self.size):
-                ir, ic = idx // self.size, idx % self.size
-                if self.grid[ir][ic] is None:
-                    next_r, next_c = ir, ic
-                    found = True
-                    break
-            
-            if not found:
-                count += 1
-                return
-
-            moves = ['L', 'R'] # specific order doesn't matter for counting
-            
-            for mv in moves:
-                if self.is_move_valid(next_r, next_c, mv):
-                    self.apply_move(next_r, next_c, mv, check_validity=False) # Skip re-check, we checked above
-                    # Note: apply_move updates degrees/scores/history. 
-                    # We MUST rely on exact state restoration.
-                    
-                    backtrack(next_r, next_c)
-                    
-                    self.undo() # Restore
-                    if count >= limit: return
-        
-        # Start search
-        backtrack(0, 0)
+        # Plain backtracking through apply_move/undo, with an explicit stack
+        # of [cell, next option] frames instead of recursion. Every frame but
+        # the top one has its move on the board.
+        cells = self.board.cells
+        count = 0
+        stack = [[cells.find(EMPTY), 0]]
+        while stack and count < limit:
+            frame = stack[-1]
+            i, option = frame
+            if i < 0 or option == 2:
+                # Full board (a leaf) or both moves tried: return to the parent
+                if i < 0 and self._constraints_satisfied():
+                    count += 1
+                stack.pop()
+                if stack:
+                    self.undo()
+                continue
+            frame[1] += 1
+            r, c = divmod(i, self.size)
+            mv = ('L', 'R')[option] # specific order doesn't matter for counting
+            if self.is_move_valid(r, c, mv):
+                self.apply_move(r, c, mv, check_validity=False) # Skip re-check, we checked above
+                stack.append([cells.find(EMPTY, i + 1), 0])
+        for _ in range(len(stack) - 1): # Stopped at the limit: take the open moves back
+            self.undo()
         return count
 
-    def solve_game(self, randomize=False, strategy=None):
+    def solve_game(self, randomize=False, strategy=None, engine=None):
         # Backtracking solver
         # Returns True if solved, False otherwise
-        
-        # Verify if current state has cycles? (Should be maintained by moves)
+        engine = engine or self.engine
+        if not strategy and engine in ('propagation', 'parallel'):
+            if engine == 'parallel' and not randomize:
+                solution = default_search().solve(self)
+            else:
+                solution = PropagationSolver(self).solve(randomize)
+            if solution is None:
+                return False
+            self.apply_solution(solution)
+            return True
         
         # [GREEDY UPDATE]: Choose cell based on strategy if provided
         if strategy:
-             # Lazy import to avoid circular dependency
-             from cpu_ai import GreedyAI
-             ai = GreedyAI(self, strategy)
-             # Step 1: Candidate Generation & Selection (Greedy Best Cell)
-             r, c = -1, -1
-             best_cell = ai.get_best_empty_cell() # New helper method
-             if best_cell:
-                 r, c = best_cell
-             else:
-                 # No empty valid cells found (or all dead ends)
-                 # Verify completion
-                 if self._find_empty_cell() is None:
-                     return True # Truly full
-                 else:
-                     return False # Stuck! (Greedy failure)
-        else:
-             # Standard First Empty Logic
-             empty_cell = self._find_empty_cell()
-             if not empty_cell:
-                 return True # All filled
-             r, c = empty_cell
-             
-        # [GREEDY UPDATE]: Choose move order based on strategy
-        moves = ['L', 'R']
-        if strategy:
-             # Lazy import again not needed if scope is same
-             # Step 2 & 3: Local Evaluation & Choose Optimal Move
-             # get_move_order returns ['L', 'R'] or ['R', 'L'] sorted by score
-             from cpu_ai import GreedyAI # Safety
-             ai = GreedyAI(self, strategy) 
-             moves = ai.get_move_order(r, c)
-             
-        elif randomize:
-            random.shuffle(moves)
-            
-        for mv in moves:
-            # Check validity
-            # Note: During Generation, self.constraints is empty, so we only check Cycles.
-            # During Solving (gameplay), we check both.
-            if self.is_move_valid(r, c, mv):
-                self.apply_move(r, c, mv)
-                
-                if self.solve_game(randomize, strategy):
-                    return True
-                
-                # [GREEDY STRICT]: User requested "Greedy Alone" (No Backtracking).
-                if strategy:
-                    return False # Fail branch if valid move leads to dead end
+            return self._solve_greedy(strategy)
 
-                self.undo() # Backtrack
+        # Backtracking with an explicit stack of [r, c, moves, next index]
+        # frames (one per filled cell) instead of one recursive call per cell.
+        stack = []
+        while True:
+            # Standard First Empty Logic
+            empty_cell = self._find_empty_cell()
+            if empty_cell is None and self._constraints_satisfied():
+                return True # All filled
+            if empty_cell is not None:
+                moves = ['L', 'R']
+                if randomize:
+                    random.shuffle(moves)
+                stack.append([empty_cell[0], empty_cell[1], moves, 0])
+            elif stack:
+                self.undo() # Filled but wrong: backtrack
+            # Try the next valid move of the deepest open cell, backtracking
+            # out of cells that have none left
+            while stack:
+                frame = stack[-1]
+                r, c, moves, k = frame
+                while k < len(moves) and not self.is_move_valid(r, c, moves[k]):
+                    k += 1
+                if k < len(moves):
+                    frame[3] = k + 1
+                    self.apply_move(r, c, moves[k])
+                    break
+                stack.pop()
+                if stack:
+                    self.undo() # Backtrack
+            else:
+                return False
 
-        # [FORCE FILL]: If we are here and using strategy, it means we have NO valid moves.
-        # But user requested to fill strictly. So we FORCE a move (Invalid).
-        if strategy:
-            # Force 'L', if checking fails (best effort)
-            # Actually, we should just pick the move that was 'better' scored, and force it.
-            mv = moves[0] 
-            # Force apply without validity check (hacky but satisfies request)
-            # Warning: apply_move might assert. Let's rely on internal ability or ignore constraints.
-            
-            # Since apply_move does NOT check validity inside (it assumes caller did),
-            # we can just call it! But we must be careful not to create weird graph states if possible.
-            # However, cycle detection relies on valid moves.
-            
-            # Let's just TRY the first move again, but skip validation.
-            self.apply_move(r, c, mv, check_validity=False)
-            if self.solve_game(randomize, strategy):
-                 return True
-            # No backtrack here either
-            return False
+    def _solve_greedy(self, strategy):
+        """
+        [GREEDY STRICT]: User requested "Greedy Alone" (No Backtracking).
+        Fills the best cell with its best valid move until the board is full
+        or stuck.
+        """
+        # Lazy import to avoid circular dependency
+        from cpu_ai import GreedyAI
+        ai = GreedyAI(self, strategy)
+        while True:
+            # Step 1: Candidate Generation & Selection (Greedy Best Cell)
+            best_cell = ai.get_best_empty_cell() # New helper method
+            if not best_cell:
+                # No empty valid cells found (or all dead ends)
+                # Verify completion
+                return self._find_empty_cell() is None # Truly full, or stuck (Greedy failure)
+            r, c = best_cell
+            # Step 2 & 3: Local Evaluation & Choose Optimal Move
+            # get_move_order returns ['L', 'R'] or ['R', 'L'] sorted by score
+            moves = ai.get_move_order(r, c)
+            valid = [mv for mv in moves if self.is_move_valid(r, c, mv)]
+            if valid:
+                self.apply_move(r, c, valid[0])
+            else:
+                # [FORCE FILL]: No valid moves, but user requested to fill strictly.
+                # So we FORCE the better scored move without validity check.
+                self.apply_move(r, c, moves[0], check_validity=False)
 
-        return False
+    def apply_solution(self, solution):
+        """Fills the empty cells from `solution` (rows of 'L'/'R') as one batch of moves."""
+        n = self.size
+        self.apply_moves([(r, c, solution[r][c]) for r in range(n) for c in range(n)
+                          if self.board.cells[r * n + c] == EMPTY])
+
+    def _constraints_satisfied(self):
+        # A full board only counts as a solution if every clue is met exactly;
+        # is_move_valid alone only guards against overshooting.
+        return self.board.clues_met == self.board.clue_count
 
     def _find_empty_cell(self):
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.grid[r][c] is None:
-                    return (r, c)
-        return None
+        i = self.board.cells.find(EMPTY)
+        if i < 0:
+            return None
+        return divmod(i, self.size)
 
     def is_cycle_created(self, r, c, move_type):
+        """
+        Checks if adding an edge between u and v creates a cycle, i.e. whether
+        v is ALREADY reachable from u. Empty cells are answered by the
+        connectivity index; overwrites fall back to the BFS below.
+        """
+        i = r * self.size + c
+        if self.board.cells[i] != EMPTY:
+            return self._is_cycle_created_bfs(r, c, move_type)
+
+        u, v = self.board.slash_ends(i, CELL_CODES[move_type])
+        return self._get_connectivity().connected(u, v)
+
+    def _is_cycle_created_bfs(self, r, c, move_type):
         """
         [REVIEW 1 REQUIREMENT]: Pure Graph Logic
         Checks if adding an edge between u and v creates a cycle.
         This is done by checking if v is ALREADY reachable from u in the graph.
         """
         # 1. Use pure graph reachability
-        # Check if v is already reachable from u in self.graph
         # Note: The edge (u, v) does not exist yet (as we are checking before apply).
-        # However, if we are overwriting an existing edge, we must ensure we don't traverse it.
-        # But `apply_move` hasn't happened yet.
-        # Wait, if we are switching L->R, we are theoretically removing L edge and checking R edge.
-        # But strict logic: grid has L. graph has L-edge.
-        # If we check "reachable(u, v)" for R-move, we might use the L-edge!
-        # So we MUST simulate removal if overwriting.
-        
-        val_at_cell = self.grid[r][c]
-        removed_edge = None
-        
-        if val_at_cell is not None:
-            # Temporarily remove this edge from graph for the check
-            if val_at_cell == 'L':
-                u_old, v_old = (r, c), (r+1, c+1)
-            else:
-                u_old, v_old = (r+1, c), (r, c+1)
-            
-            self._remove_edge(u_old, v_old)
-            removed_edge = (u_old, v_old)
+        # However, if we are overwriting an existing edge, we must ensure we don't traverse it:
+        # if we check "reachable(u, v)" for an R-move while the cell holds L, we might use the L-edge!
+        # So the old edge is skipped during the search.
+        b = self.board
+        i = r * self.size + c
+        val_at_cell = b.cells[i]
+        skipped = b.slash_ends(i, val_at_cell) if val_at_cell != EMPTY else None
 
         # 2. Determine Nodes u, v involved in the new edge
-        if move_type == 'L':
-            u, v = (r, c), (r+1, c+1)
-        else:
-            u, v = (r+1, c), (r, c+1)
+        u, v = b.slash_ends(i, CELL_CODES[move_type])
             
         # 3. Check Reachability (BFS)
-        queue = [u]
+        queue = deque([u])
         visited = {u}
-        found_cycle = False
         
         while queue:
-            curr = queue.pop(0)
+            curr = queue.popleft()
             if curr == v:
-                found_cycle = True
-                break
+                return True
                 
-            for neighbor in self.graph[curr]:
+            for neighbor in b.neighbors(curr):
+                if skipped and (curr, neighbor) in (skipped, skipped[::-1]):
+                    continue
                 if neighbor not in visited:
                     visited.add(neighbor)
                     queue.append(neighbor)
-        
-        # Restore removed edge if any
-        if removed_edge:
-            self._add_edge(removed_edge[0], removed_edge[1])
             
-        return found_cycle
+        return False
 
     def is_move_valid(self, r, c, move_type, strict_cycles=True):
         if move_type is None: return True
@@ -408,22 +744,21 @@ class SlantGame:
             return False
 
         # 1. Degree Constraints
-        if move_type == 'L':
-            n1, n2 = (r, c), (r+1, c+1)
-        else:
-            n1, n2 = (r+1, c), (r, c+1)
+        b = self.board
+        n1, n2 = b.slash_ends(r * self.size + c, CELL_CODES[move_type])
             
         # Current degrees (assuming (r,c) is effectively empty for the "Add" check)
-        deg1 = self.node_degrees[n1]
-        deg2 = self.node_degrees[n2]
+        deg1 = b.degrees[n1]
+        deg2 = b.degrees[n2]
 
         # GLOBAL RULE: Max degree is 4 in Slant
         # We check if adding 1 exceeds 4.
         if deg1 + 1 > 4: return False
         if deg2 + 1 > 4: return False
 
-        if n1 in self.constraints and deg1 + 1 > self.constraints[n1]: return False
-        if n2 in self.constraints and deg2 + 1 > self.constraints[n2]: return False
+        # NO_CLUE (255) never binds, so absent clues pass these checks
+        if deg1 + 1 > b.clues[n1]: return False
+        if deg2 + 1 > b.clues[n2]: return False
         
         return True
 
@@ -442,6 +777,11 @@ class SlantGame:
         return False
 
     def apply_move(self, r, c, move_type, check_validity=True, player='HUMAN'):
+        # Cells are a flat array: (0, size) would silently be (1, 0)
+        error = self._cell_error(r, c)
+        if error is not None:
+            raise ValueError(f"{error}: ({r!r}, {c!r})")
+
         # Check Correction Hook
         is_correcting = False
         undone_state = None
@@ -456,7 +796,9 @@ class SlantGame:
              
         # [REVIEW 1 UPDATE]: Reverted to Strict Loop Prevention
         
-        current_val = self.grid[r][c]
+        b = self.board
+        i = r * self.size + c
+        current_val = CELL_SYMBOLS[b.cells[i]]
         
         # 2. Cycle Check (The "No Loop" Rule)
         # [REVIEW 1]: If we are valid-checking (interactive play), we want to allow loops 
@@ -482,11 +824,7 @@ class SlantGame:
         if check_validity and not self.is_move_valid(r, c, move_type):
             # Put back old if failed
             if current_val is not None:
-                self.grid[r][c] = current_val
-                if current_val == 'L': n1, n2 = (r,c), (r+1,c+1)
-                else: n1, n2 = (r+1,c), (r,c+1)
-                self.node_degrees[n1] += 1
-                self.node_degrees[n2] += 1
+                self._set_cell(i, current_val)
             
             # CRITICAL FIX: If we were correcting (undoing a previous move) and this new one failed,
             # we must RESTORE the undone move, otherwise we lose the player's previous valid move!
@@ -523,113 +861,105 @@ class SlantGame:
             if current_val is not None:
                 # We know old was valid (presumably), but we must be careful not to cycle check if we trust state.
                 # Just restore manually
-                self.grid[r][c] = current_val
-                if current_val == 'L': n1, n2 = (r,c), (r+1,c+1)
-                else: n1, n2 = (r+1,c), (r,c+1)
-                self.node_degrees[n1] += 1
-                self.node_degrees[n2] += 1
+                self._set_cell(i, current_val)
             return False
             
-        self.grid[r][c] = move_type
-        # Update Graph: Remove old edge if exists
-        if current_val == 'L':
-            u, v = (r, c), (r+1, c+1)
-            self._remove_edge(u, v)
-        elif current_val == 'R':
-            u, v = (r+1, c), (r, c+1)
-            self._remove_edge(u, v)
-
-        # Update Graph: Add new edge
-        if move_type == 'L':
-            u, v = (r, c), (r+1, c+1)
-            self._add_edge(u, v)
-        elif move_type == 'R':
-            u, v = (r+1, c), (r, c+1)
-            self._add_edge(u, v)
-            
-        # Update degrees
-        if move_type == 'L': n1, n2 = (r, c), (r+1, c+1)
-        else: n1, n2 = (r+1, c), (r, c+1)
-        
-        # Update degrees
-        self.node_degrees[n1] += 1
-        self.node_degrees[n2] += 1
-        
-        # Criteria-Based Fair Scoring System
-        # Both HUMAN and CPU use the SAME criteria, ensuring fairness
-        points_earned = 0
-        
-        # Criterion 1: Base Move Points (1 point for any valid move)
-        points_earned += 1
-        
-        # Criterion 2: Constraint Satisfaction Bonus (+2 points per constraint satisfied)
-        # This rewards smart moves that complete numbered nodes
-        nodes_checked = [n1, n2]
-        constraints_satisfied = 0
-        
-        for n in nodes_checked:
-            if n in self.constraints:
-                limit = self.constraints[n]
-                # Check if THIS move completes the constraint
-                if self.node_degrees[n] == limit:
-                    constraints_satisfied += 1
-        
-        points_earned += (constraints_satisfied * 2)  # +2 per satisfied constraint
-        
-        # Criterion 3: Perfect Cell Bonus (+3 points if all 4 corners are satisfied)
-        # This rewards creating complete, valid cells
-        cell_corners = [(r, c), (r+1, c+1), (r+1, c), (r, c+1)]
-        all_corners_satisfied = True
-        
-        for corner in cell_corners:
-            if corner in self.constraints:
-                limit = self.constraints[corner]
-                if self.node_degrees[corner] != limit:
-                    all_corners_satisfied = False
-                    break
-        
-        if all_corners_satisfied and any(c in self.constraints for c in cell_corners):
-            points_earned += 3  # Perfect cell bonus
-        
-        # Criterion 4: Strategic Position Bonus (+1 for center moves)
-        # Slightly rewards filling the center area which is strategically important
-        mid = self.size // 2
-        if abs(r - mid) <= 1 and abs(c - mid) <= 1:
-            points_earned += 1
+        # Update Graph: Add new edge (the old one was removed above) and degrees
+        self._set_cell(i, move_type)
+        # Criteria-Based Fair Scoring System, see move_points()
+        points_earned = move_points(self.size, b.degrees, b.clues, i, CELL_CODES[move_type])
         
         self.scores[player] += points_earned
         
         # [CRITICAL FIX]: Set Ownership
-        self.owners[r][c] = player
+        b.owners[i] = OWNER_CODES[player]
         
         self.history.append((r, c, current_val, move_type, points_earned, player))
-        self.check_completion()
-        
-        # [REVIEW 1 REQUIREMENT]: Update Loop Visualization constantly
-        self.detect_cycle_dfs()
+        if not self._defer_checks: # apply_moves() runs this once for the whole batch
+            # loop_cells is already current: _set_cell/_clear_cell keep the loops
+            self.check_completion()
         
         # Toggle Turn
         self.turn = 'CPU' if self.turn == 'HUMAN' else 'HUMAN'
         return True
 
+    def apply_moves(self, moves, check_validity=False, player='HUMAN', atomic=False):
+        """
+        Applies a batch of (r, c, move_type) moves through apply_move, running
+        check_completion once at the end instead of per move.
+        move_type may be 'L', 'R', None or "CLEAR".
+
+        Returns one (success, error) pair per move; moves after a failure are
+        still tried. With `atomic`, the first failure rolls the game back to
+        where it was before the batch and the remaining moves are skipped.
+        """
+        if atomic:
+            saved = (bytes(self.board.cells), bytes(self.board.owners), dict(self.scores),
+                     self.turn, list(self.history))
+        results = []
+        failed = False
+        self._defer_checks = True
+        try:
+            for move in moves:
+                if failed and atomic:
+                    results.append((False, "Skipped"))
+                    continue
+                error = self.move_error(move)
+                if error is None:
+                    r, c, move_type = move
+                    if move_type == "CLEAR":
+                        move_type = None
+                    if not self.apply_move(r, c, move_type, check_validity=check_validity, player=player):
+                        error = "Invalid move"
+                results.append((error is None, error))
+                failed = failed or error is not None
+            if failed and atomic:
+                self._restore(*saved)
+        finally:
+            self._defer_checks = False
+            self.check_completion()
+        return results
+
+    def move_error(self, move):
+        """Why (r, c, move_type) can't be played on this board, or None if it is well formed."""
+        try:
+            r, c, move_type = move
+        except (TypeError, ValueError):
+            return "Expected [row, col, type]"
+        error = self._cell_error(r, c)
+        if error is not None:
+            return error
+        if move_type not in ('L', 'R', None, "CLEAR"):
+            return "Invalid type"
+        return None
+
+    def _cell_error(self, r, c):
+        if not (isinstance(r, int) and isinstance(c, int) and 0 <= r < self.size and 0 <= c < self.size):
+            return "Cell out of range"
+        return None
+
+    def _restore(self, cells, owners, scores, turn, history):
+        """Puts cells/owners back through _set_cell/_clear_cell so edges, degrees and the change log follow."""
+        b = self.board
+        for i, (old, new) in enumerate(zip(cells, b.cells)):
+            if old != new:
+                self._clear_cell(i)
+                if old != EMPTY:
+                    self._set_cell(i, CELL_SYMBOLS[old])
+            if owners[i] != b.owners[i]:
+                b.owners[i] = owners[i]
+                if old == new:
+                    self._log_change(i)
+        self.scores.update(scores)
+        self.turn = turn
+        self.history = history
+
     def remove_move(self, r, c, record_history=False):
-        val = self.grid[r][c]
+        i = r * self.size + c
+        val = CELL_SYMBOLS[self.board.cells[i]]
         if val is None: return
         
-        if val == 'L':
-             n1, n2 = (r, c), (r+1, c+1)
-             u, v = (r, c), (r+1, c+1)
-             self._remove_edge(u, v)
-        elif val == 'R':
-             n1, n2 = (r+1, c), (r, c+1)
-             u, v = (r+1, c), (r, c+1)
-             self._remove_edge(u, v)
-        else:
-             return 
-            
-        self.node_degrees[n1] -= 1
-        self.node_degrees[n2] -= 1
-        self.grid[r][c] = None
+        self._clear_cell(i)
         
         if record_history:
              self.history.append((r, c, val, None))
@@ -653,53 +983,23 @@ class SlantGame:
             player = None
 
         # Revert change: Remove New, Add Old
+        i = r * self.size + c
         if new_val is not None:
-            if new_val == 'L': n1, n2 = (r, c), (r+1, c+1)
-            else: n1, n2 = (r+1, c), (r, c+1)
-            self.node_degrees[n1] -= 1
-            self.node_degrees[n2] -= 1
+            # Reverse the graph and degree change invoked by `new_val`
+            self._clear_cell(i)
             
             # Revert Points
             if player:
                 self.scores[player] -= points
             
-            self.owners[r][c] = None
-            
-        self.grid[r][c] = old_val
-        
-        # Update Graph: Remove edge added by 'new_val' that we are undoing
-        # Wait, undo logic restores `old_val`.
-        # So we must remove `new_val` edge and add `old_val` edge.
-        
-        # new_val was 'L' or 'R' or None?
-        # The history entry tells us what happened.
-        # But here we rely on the implementation assuming this block runs AFTER `undo` restoration logic?
-        # NO, this block IS inside `undo`.
-        # `move` struct has `(r, c, old_val, new_val, ...)`
-        
-        # We need to reverse the graph change invoked by `new_val`
-        if new_val == 'L':
-             u, v = (r, c), (r+1, c+1)
-             self._remove_edge(u, v)
-        elif new_val == 'R':
-             u, v = (r+1, c), (r, c+1)
-             self._remove_edge(u, v)
+            self.board.owners[i] = 0
 
         if old_val is not None:
-            # We restored old_val to grid, so add its edge back
-            if old_val == 'L':
-                u, v = (r, c), (r+1, c+1)
-                self._add_edge(u, v)
-            elif old_val == 'R':
-                u, v = (r+1, c), (r, c+1)
-                self._add_edge(u, v)
-
-            if old_val == 'L': n1, n2 = (r, c), (r+1, c+1)
-            else: n1, n2 = (r+1, c), (r, c+1)
-            self.node_degrees[n1] += 1
-            self.node_degrees[n2] += 1
+            # Restore old_val to grid and add its edge back
+            self._set_cell(i, old_val)
         
-        self.check_completion()
+        if not self._defer_checks:
+            self.check_completion()
         
         # Toggle Turn back if it was a real move and player was tracked
         if new_val is not None and player:
@@ -711,87 +1011,67 @@ class SlantGame:
              
         return True
 
-    def _add_edge(self, u, v):
-        self.graph[u].append(v)
-        self.graph[v].append(u)
+    def _set_cell(self, i, move_type):
+        """Writes a slash into empty cell i together with its edge, degrees and counters."""
+        u, v = self.board.place(i, CELL_CODES[move_type])
+        # add_edge() is True when the slash joined two trees (no new loop). It
+        # is False for a redundant edge, or while stale; the loop search decides.
+        if not self.connectivity.add_edge(u, v) and self.loops.add(i, u, v):
+            self.loop_cells = self.loops.cells()
+        self._log_change(i)
+
+    def _clear_cell(self, i):
+        """Empties cell i, dropping its edge, degrees and counters."""
+        if self.board.cells[i] == EMPTY: return
+        u, v = self.board.remove(i)
+        self.connectivity.remove_edge(u, v)
+        if self.loops.remove(i, u, v):
+            self.loop_cells = self.loops.cells()
+        self._log_change(i)
 
-    def _remove_edge(self, u, v):
-        if v in self.graph[u]: self.graph[u].remove(v)
-        if u in self.graph[v]: self.graph[v].remove(u)
+    def _log_change(self, i):
+        self.version += 1
+        if len(self._changes) == self._changes.maxlen:
+            self._log_start = self._changes[0][0]
+        self._changes.append((self.version, i))
+
+    def _reset_changes(self):
+        """Bulk change (new puzzle, clues, whole grid): older versions need a full snapshot."""
+        self.version += 1
+        self._changes.clear()
+        self._log_start = self.version
+
+    def _get_connectivity(self):
+        """Returns the connectivity index, rebuilding it from E if it went stale."""
+        if self.connectivity.stale:
+            self.connectivity.rebuild(list(self.board.edges()))
+        return self.connectivity
+
+    @property
+    def has_loop(self):
+        """True if the slashes close a loop anywhere (O(1), see LoopTracker)."""
+        return bool(self.loops.loops)
 
     def get_graph_representation(self):
         """
         [REVIEW 1 REQUIREMENT]: Graph Representation from Grid
-        Returns the persistent Adjacency List.
+        Returns the Adjacency List {(r, c): [(r, c), ...]}, built from the board's
+        adjacency masks.
         """
-        return self.graph
+        ns = self.nodes_size
+        return {divmod(node, ns): [divmod(n, ns) for n in self.board.neighbors(node)]
+                for node in range(ns * ns)}
 
     def detect_cycle_dfs(self):
         """
-        [REVIEW 1 REQUIREMENT]: Graph Algorithm (DFS)
-        Detects cycles using Depth First Search on the Adjacency List representation.
-        Returns True if a cycle exists, and populates self.loop_cells with the edge coordinates.
+        [REVIEW 1 REQUIREMENT]: Graph Algorithm (full scan)
+        Recomputes every loop from scratch with a BFS spanning forest (each
+        non-tree edge closes one loop) and returns True if a cycle exists.
+        Moves keep the same result incrementally; this is the full check.
         """
-        graph = self.get_graph_representation()
-        visited = set()
-        parent_map = {} # To reconstruct path
-        
-        return found_any
-
-    def _detect_visual_diamonds(self):
-        """
-        [USER REQUEST]: Only visualize 2x2 "Diamond" loops (/\ over \/).
-        Returns a list of cell coordinates [(r,c), ...] that form such diamonds.
-        """
-        diamonds = []
-        for r in range(self.size - 1):
-            for c in range(self.size - 1):
-                # Check 2x2 block for:
-                # Top-Left (r,c) = R (/)
-                # Top-Right (r,c+1) = L (\)
-                # Bottom-Left (r+1,c) = L (\)
-                # Bottom-Right (r+1,c+1) = R (/)
-                if (self.grid[r][c] == 'R' and 
-                    self.grid[r][c+1] == 'L' and
-                    self.grid[r+1][c] == 'L' and
-                    self.grid[r+1][c+1] == 'R'):
-                    
-                    diamonds.append((r, c))
-                    diamonds.append((r, c+1))
-                    diamonds.append((r+1, c))
-                    diamonds.append((r+1, c+1))
-                    
-        return diamonds
-
-    def detect_cycle_dfs(self):
-        """
-        [REVIEW 1 REQUIREMENT]: Graph Algorithm (DFS)
-        Detects cycles using Depth First Search on the Adjacency List representation.
-        Returns True if a cycle exists.
-        
-        [VISUAL UPDATE]: self.loop_cells is now RESTRICTED to 2x2 Diamonds only.
-        """
-        # 1. Update visual loop cells (Only Diamonds)
-        self.loop_cells = self._detect_visual_diamonds()
-        
-        # 2. Perform actual cycle check for logic return value
-        graph = self.get_graph_representation()
-        visited = set()
-        
-        def dfs(node, parent):
-            visited.add(node)
-            for neighbor in graph[node]:
-                if neighbor == parent: continue
-                if neighbor in visited: return True
-                if dfs(neighbor, node): return True
-            return False
-
-        for node in graph:
-            if node not in visited:
-                if dfs(node, None):
-                    return True
-                
-        return False
+        self.loops.rebuild()
+        self.loop_cells = self.loops.cells()
+        return self.has_loop
 
     def _find_cell_for_edge(self, u, v):
         # Identify the grid cell connecting node u and node v
@@ -814,34 +1094,122 @@ class SlantGame:
         if 0 <= min_r < self.size and 0 <= min_c < self.size:
              self.loop_cells.append((min_r, min_c))
 
-    def to_dict(self):
+    def to_dict(self, fields=None, compact=False):
         """
-        Return state as JSON-serializable dict
+        Return state as JSON-serializable dict.
+
+        `fields` picks which keys to include (default: STATE_FIELDS, i.e.
+        everything but the debug 'graph'). With `compact`, grid and owners
+        become one string per board ('L', 'R', '.' / 'H', 'C', '.') and
+        constraints/node_degrees/graph become one character per node in
+        Board order ('.' = no clue, graph = hex adjacency mask).
+
+        Board-derived values are cached until the next change, so repeated
+        calls for the same version are cheap. Callers must not mutate them.
         """
-        grid_copy = [row[:] for row in self.grid]
-        
-        # Convert tuple keys to string "r,c" for JSON compatibility
-        constraints_str = {f"{k[0]},{k[1]}": v for k, v in self.constraints.items()}
-        node_degrees_str = {f"{k[0]},{k[1]}": v for k, v in self.node_degrees.items()}
-        
-        # Include Graph Rep for Analysis/Debug
-        graph_rep = self.get_graph_representation()
-        # Convert tuple keys/values to strings for JSON
-        graph_str = {}
-        for k, v in graph_rep.items():
-            k_str = f"{k[0]},{k[1]}"
-            v_str = [f"{n[0]},{n[1]}" for n in v]
-            graph_str[k_str] = v_str
-        
+        if fields is None:
+            fields = STATE_FIELDS
+        else:
+            unknown = [f for f in fields if f not in ALL_STATE_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown state fields: {', '.join(unknown)}")
+
+        cache = self._state_cache
+        if self._state_cache_version != self.version or self._state_cache_clues != self.board.clues:
+            cache.clear()
+            self._state_cache_version = self.version
+            self._state_cache_clues = bytes(self.board.clues)
+
+        state = {}
+        for field in fields:
+            if field in CACHED_STATE_FIELDS:
+                key = (field, compact)
+                value = cache.get(key)
+                if value is None:
+                    value = cache[key] = self._encode_field(field, compact)
+                state[field] = value
+            elif field == 'loop_cells':
+                state[field] = getattr(self, 'loop_cells', []) # [REVIEW 1]: Expose Loop for Visualization
+            elif field == 'difficulty':
+                state[field] = self.grade.to_dict() if self.grade is not None else None
+            else:
+                state[field] = getattr(self, field)
+        if compact:
+            state['compact'] = True
+        return state
+
+    def _encode_field(self, field, compact):
+        """Serializes one board-derived field of to_dict()."""
+        b = self.board
+        keys = _node_keys(self.nodes_size)
+        if field == 'grid':
+            if compact:
+                return b.cells.translate(_COMPACT_CELLS).decode()
+            return [row[:] for row in self.grid]
+        if field == 'owners':
+            if compact:
+                return b.owners.translate(_COMPACT_OWNERS).decode()
+            return [row[:] for row in self.owners]
+        if field == 'constraints':
+            if compact:
+                return b.clues.translate(_COMPACT_DIGITS).decode()
+            # Convert tuple keys to string "r,c" for JSON compatibility
+            return {keys[node]: v for node, v in enumerate(b.clues) if v != NO_CLUE}
+        if field == 'node_degrees':
+            if compact:
+                return b.degrees.translate(_COMPACT_DIGITS).decode()
+            return dict(zip(keys, b.degrees))
+        if field == 'graph':
+            # [REVIEW 1]: Exposing API to graph (debug only, built on request)
+            if compact:
+                return b.adjacency.translate(_COMPACT_HEX).decode()
+            return {keys[node]: [keys[m] for m in b.neighbors(node)]
+                    for node in range(len(b.adjacency))}
+        raise ValueError(field)
+
+    def changed_cells(self, since):
+        """Indices of the cells changed after version `since`, or None if the log doesn't reach back that far."""
+        if since is None or not self._log_start <= since <= self.version:
+            return None
+        changed = set()
+        for version, i in reversed(self._changes):
+            if version <= since:
+                break
+            changed.add(i)
+        return changed
+
+    def to_delta(self, since=None, fields=None, compact=False):
+        """
+        State changes since version `since`: changed cells as [r, c, value, owner],
+        degrees of their corners, plus scores/status/turn/loop_cells. Falls back
+        to a full to_dict(fields, compact) snapshot (with 'full': True) when
+        `since` is unknown or older than the change log.
+        """
+        changed = self.changed_cells(since)
+        if changed is None:
+            state = self.to_dict(fields, compact)
+            state['full'] = True
+            return state
+
+        b, n, ns = self.board, self.size, self.nodes_size
+        keys = _node_keys(ns)
+        cells = []
+        degrees = {}
+        for i in sorted(changed):
+            r, c = divmod(i, n)
+            cells.append([r, c, CELL_SYMBOLS[b.cells[i]], OWNER_NAMES[b.owners[i]]])
+            top_left = r * ns + c
+            for node in (top_left, top_left + 1, top_left + ns, top_left + ns + 1):
+                degrees[keys[node]] = b.degrees[node]
+
         return {
-            'size': self.size,
-            'grid': grid_copy,
-            'constraints': constraints_str,
-            'node_degrees': node_degrees_str,
+            'full': False,
+            'since': since,
+            'version': self.version,
+            'cells': cells,
+            'node_degrees': degrees,
             'status': self.status,
             'turn': self.turn,
             'scores': self.scores,
-            'owners': self.owners,
-            'loop_cells': getattr(self, 'loop_cells', []), # [REVIEW 1]: Expose Loop for Visualization
-            'graph': graph_str # [REVIEW 1]: Exposing API to graph
+            'loop_cells': self.loop_cells,
         }
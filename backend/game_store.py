@@ -0,0 +1,166 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from cpu_ai import IncrementalAI, MonteCarloAI, MCTS_BUDGET_MS
+from game_events import EventChannel
+from hints import Hinter
+
+
+class GameSession:
+    """One client's game plus the settings that used to be module globals."""
+
+    def __init__(self, game_id, game, strategy=1):
+        self.id = game_id
+        self.game = game
+        self.strategy = strategy
+        self.lock = threading.RLock() # Serializes requests against this game
+        self.last_access = 0.0
+        self.approx_bytes = 0
+        self.events = EventChannel() # /api/events subscribers
+        self.pushed_version = game.version # Last version sent to the event streams
+        self.autoplay = False # CPU answers human moves on its own (multiplayer)
+        self.cpu_timer = None # Pending autoplay reply
+        self.solve_jobs = OrderedDict() # job id -> SolveJob, oldest first
+        self.closed = False
+        self._ai = None # Long-lived CPU player, see cpu_ai()
+        self.ai_budget_ms = MCTS_BUDGET_MS # Think time per move for strategy 4
+        self._hinter = None # Cached deductions and solution for /api/hint, see hinter()
+
+    def cpu_ai(self):
+        """The game's CPU player; keeps its candidates (or search tree) between turns, rebuilt when the strategy changes."""
+        ai = self._ai
+        if ai is None or ai.game is not self.game or ai.strategy != self.strategy:
+            if self.strategy == 4:
+                ai = MonteCarloAI(self.game)
+            else:
+                ai = IncrementalAI(self.game, self.strategy)
+            self._ai = ai
+        if self.strategy == 4:
+            ai.budget_ms = self.ai_budget_ms
+        return ai
+
+    def hinter(self):
+        """The game's Hinter; its per-puzzle cache is kept between hints."""
+        if self._hinter is None or self._hinter.game is not self.game:
+            self._hinter = Hinter(self.game)
+        return self._hinter
+
+    def close(self):
+        """Stops a pending CPU reply and ends the game's event streams."""
+        self.closed = True
+        if self.cpu_timer is not None:
+            self.cpu_timer.cancel()
+            self.cpu_timer = None
+        for job in self.solve_jobs.values():
+            job.cancel()
+        self.events.close()
+
+    def estimate_bytes(self):
+        """Rough resident size: board arrays, views, history and the CPU player."""
+        board = self.game.board
+        arrays = len(board.cells) * 2 + len(board.degrees) * 3
+        history = len(self.game.history) * 120 # tuple of 6 + list slot
+        ai = 0
+        if isinstance(self._ai, MonteCarloAI):
+            ai = self._ai.nodes * 250 + self._ai.untried * 64 # node + children dict; (cell, slash) + list slot
+        elif self._ai is not None:
+            ai = len(board.cells) * 150 # scores + buckets
+        hints = len(board.cells) * 100 if self._hinter is not None else 0 # deduction tuples + solution
+        return 4096 + arrays + history + ai + hints + self.game.size * 200
+
+
+class GameStore:
+    """
+    Thread-safe map of game_id -> GameSession with LRU order.
+
+    Sessions idle longer than `ttl` seconds are dropped, and when there are
+    more than `max_games` sessions, or their estimated size exceeds
+    `max_bytes`, the least recently used ones are evicted first. Expiry is
+    checked on every create/get, oldest-first, so it costs O(evicted).
+    """
+
+    def __init__(self, max_games=10000, ttl=3600, max_bytes=256 * 1024 * 1024, clock=time.monotonic):
+        self.max_games = max_games
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.created = 0
+        self.evictions = {'lru': 0, 'ttl': 0, 'memory': 0}
+
+    def create(self, game, strategy=1, autoplay=False):
+        session = GameSession(secrets.token_urlsafe(12), game, strategy)
+        session.autoplay = autoplay
+        with self._lock:
+            now = self.clock()
+            session.last_access = now
+            self._resize(session)
+            self._sessions[session.id] = session
+            self.created += 1
+            self._evict(now, keep=session.id)
+        return session
+
+    def get(self, game_id):
+        """Returns the live session and marks it most recently used, or None."""
+        with self._lock:
+            now = self.clock()
+            self._evict(now)
+            session = self._sessions.get(game_id)
+            if session is None:
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(game_id)
+            self._resize(session)
+            self._evict(now, keep=game_id)
+            return session
+
+    def remove(self, game_id):
+        with self._lock:
+            session = self._sessions.pop(game_id, None)
+            if session is not None:
+                self._bytes -= session.approx_bytes
+                session.close()
+            return session
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'live': len(self._sessions),
+                'created': self.created,
+                'evictions': dict(self.evictions),
+                'approx_bytes': self._bytes,
+                'max_games': self.max_games,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+            }
+
+    def _resize(self, session):
+        size = session.estimate_bytes()
+        self._bytes += size - session.approx_bytes
+        session.approx_bytes = size
+
+    def _evict(self, now, keep=None):
+        sessions = self._sessions
+        while sessions:
+            game_id, oldest = next(iter(sessions.items()))
+            if game_id == keep:
+                break
+            if now - oldest.last_access > self.ttl:
+                reason = 'ttl'
+            elif len(sessions) > self.max_games:
+                reason = 'lru'
+            elif self._bytes > self.max_bytes:
+                reason = 'memory'
+            else:
+                break
+            sessions.popitem(last=False)
+            self._bytes -= oldest.approx_bytes
+            oldest.close()
+            self.evictions[reason] += 1
@@ -0,0 +1,62 @@
+"""
+Puzzle difficulty, graded once when a puzzle is generated.
+
+grade() solves the clues alone with the propagation solver and records
+what that took: which deduction techniques fired (solver.TECHNIQUES), how
+many cells had to be guessed, and the search nodes explored. The band
+follows from those:
+
+  easy    no guesses, clue deductions only
+  medium  no guesses, but loop avoidance was needed
+  hard    guesses on at most HARD_GUESS_FRACTION of the cells
+  expert  more guessing than that
+
+The grade travels with the Puzzle (and its store record), so serving a
+band is a lookup, not a solve.
+"""
+from board import Board
+from solver import PropagationSolver, TECHNIQUES
+
+DIFFICULTY_BANDS = ('easy', 'medium', 'hard', 'expert')
+HARD_GUESS_FRACTION = 0.1
+
+
+class Grade:
+    __slots__ = ('band', 'techniques', 'guesses', 'nodes')
+
+    def __init__(self, band, techniques, guesses, nodes):
+        self.band = band
+        self.techniques = tuple(techniques) # Names from solver.TECHNIQUES, in that order
+        self.guesses = guesses
+        self.nodes = nodes
+
+    def to_dict(self):
+        return {
+            'band': self.band,
+            'techniques': list(self.techniques),
+            'guesses': self.guesses,
+            'nodes': self.nodes,
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, Grade) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Grade({self.band!r}, guesses={self.guesses}, nodes={self.nodes})"
+
+
+def band_for(techniques, guesses, cells):
+    if guesses == 0:
+        return 'medium' if 'loop_avoidance' in techniques else 'easy'
+    return 'hard' if guesses <= cells * HARD_GUESS_FRACTION else 'expert'
+
+
+def grade(size, clues):
+    """Grades the puzzle given by `clues` (Board node order, NO_CLUE where hidden)."""
+    board = Board(size)
+    board.clues[:] = clues
+    solver = PropagationSolver(board)
+    solver.solve()
+    techniques = [name for name, count in zip(TECHNIQUES, solver.deductions) if count]
+    return Grade(band_for(techniques, solver.guesses, size * size), techniques,
+                 solver.guesses, solver.nodes)
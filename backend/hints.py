@@ -0,0 +1,178 @@
+"""
+Hints: the next cell a player can fill by logic, and the rule that forces it.
+
+A Hinter is kept on the GameSession (like the CPU player) and tries three
+sources, cheapest first:
+
+  local     the solver's deductions (solver.TECHNIQUES) on the current
+            board, but only at the clues and cells around the last
+            RECENT_CELLS changes: the move just made is usually what
+            unlocked the next one. A few dozen O(1) checks at any size.
+  cached    what the clues force on an empty board, worked out once per
+            puzzle by PropagationSolver.deduce(), in the order it was
+            deduced. The first entry still empty: everything before it is
+            filled, and its reason rests on those. So they are checked
+            first; one the player filled the other way is a mistake, and
+            that is the hint instead ('rule': 'mistake', with the slash
+            the cell should hold).
+  solution  a cell of the solution stored when the puzzle was generated
+            (checked against the clues), next to a recent change when
+            there is one. Needs guessing to see. Nothing is solved here:
+            hints run under the session lock.
+
+While the puzzle is known to be unique, local deductions that disagree
+with the solution are skipped: they follow from a mistake on the board,
+not from the clues.
+"""
+from board import Board, EMPTY, L, R, CELL_SYMBOLS, NO_CLUE
+from solver import PropagationSolver, TECHNIQUES, SATURATION, COMPLETION, LOOP_AVOIDANCE
+
+RECENT_CELLS = 8 # Last changed cells whose neighbourhood is checked first
+
+
+class Hinter:
+    def __init__(self, game):
+        self.game = game
+        self._clues = None # Board clues the cache below was built for
+        self._deductions = None
+        self._solution = None
+        self._trusted = False # Solution is the only one: local hints must agree with it
+
+    def next_hint(self):
+        """
+        {'row', 'col', 'type', 'rule', 'clue', 'source'} for an empty cell
+        (or a wrongly filled one, see 'mistake'), None once the board is full
+        or when nothing is forced and there is no stored solution. `rule` is
+        a solver.TECHNIQUES name, 'mistake' or 'solution'; `clue` is the
+        [r, c] of the clue behind a clue rule.
+        """
+        game = self.game
+        cells = game.board.cells
+        if game.board.filled == len(cells):
+            return None
+        if self._clues != game.board.clues:
+            self._prepare()
+        recent = self._recent()
+
+        for i, v, technique, node in self._local(recent):
+            if not self._trusted or self._solution[i] == v:
+                return self._hint(i, v, TECHNIQUES[technique], node, 'local')
+        for i, v, technique, node in self._deductions:
+            if cells[i] == EMPTY:
+                return self._hint(i, v, TECHNIQUES[technique], node, 'cached')
+            if cells[i] != v: # A premise of everything after it
+                return self._hint(i, v, 'mistake', None, 'cached')
+        if self._solution is None:
+            return None # No stored solution for these clues
+        n = game.size
+        for i in recent:
+            r, c = divmod(i, n)
+            for rr in range(max(r - 1, 0), min(r + 2, n)):
+                for cc in range(max(c - 1, 0), min(c + 2, n)):
+                    if cells[rr * n + cc] == EMPTY:
+                        return self._hint(rr * n + cc, self._solution[rr * n + cc], 'solution', None, 'solution')
+        i = cells.find(EMPTY)
+        return self._hint(i, self._solution[i], 'solution', None, 'solution')
+
+    # ------------------------------------------------------------------ cache
+
+    def _prepare(self):
+        """Clue-only deductions and the stored solution, once per set of clues."""
+        game = self.game
+        board = Board(game.size)
+        board.clues[:] = game.board.clues
+        self._clues = bytes(board.clues)
+        self._deductions = PropagationSolver(board).deduce() or []
+
+        self._solution = None
+        if game.solution is not None:
+            # The generator's solution, unless the clues were changed since
+            board.cells[:] = game.solution
+            if PropagationSolver(board).consistent:
+                self._solution = bytes(game.solution)
+        if self._solution is None and len(self._deductions) == len(board.cells):
+            # Deduction alone fills the grid: that is the solution
+            solution = bytearray(len(board.cells))
+            for i, v, _, _ in self._deductions:
+                solution[i] = v
+            self._solution = bytes(solution)
+        # Unique if the generator said so, or if deduction alone fills the grid
+        self._trusted = self._solution is not None and (
+            game.unique or len(self._deductions) == len(board.cells))
+
+    # ------------------------------------------------------------------ local
+
+    def _recent(self):
+        """The last RECENT_CELLS distinct cells changed, newest first."""
+        recent = []
+        for _, i in reversed(self.game._changes):
+            if i not in recent:
+                recent.append(i)
+                if len(recent) == RECENT_CELLS:
+                    break
+        return recent
+
+    def _local(self, recent):
+        """Deductions (cell, value, technique, node) around the recent cells, clue rules first."""
+        game = self.game
+        board = game.board
+        cells, clues, degrees = board.cells, board.clues, board.degrees
+        n, ns = game.size, game.nodes_size
+        nodes, around = [], []
+        for i in recent:
+            r, c = divmod(i, n)
+            top_left = r * ns + c
+            for node in (top_left, top_left + 1, top_left + ns, top_left + ns + 1):
+                if clues[node] != NO_CLUE and node not in nodes:
+                    nodes.append(node)
+            for rr in range(max(r - 1, 0), min(r + 2, n)):
+                for cc in range(max(c - 1, 0), min(c + 2, n)):
+                    if cells[rr * n + cc] == EMPTY and rr * n + cc not in around:
+                        around.append(rr * n + cc)
+
+        for node in nodes:
+            limit, deg = clues[node], degrees[node]
+            incident = self._incident(node)
+            free = [(i, touching) for i, touching in incident if cells[i] == EMPTY]
+            if not free or deg > limit:
+                continue
+            if deg == limit:
+                for i, touching in free:
+                    yield i, 3 - touching, SATURATION, node # Slash away from the clue
+            elif deg + len(free) == limit:
+                for i, touching in free:
+                    yield i, touching, COMPLETION, node # Slash into the clue
+
+        if around:
+            connected = game._get_connectivity().connected
+            for i in around:
+                (la, lb), (ra, rb) = board.slash_ends(i, L), board.slash_ends(i, R)
+                l_loops, r_loops = connected(la, lb), connected(ra, rb)
+                if l_loops != r_loops:
+                    yield i, R if l_loops else L, LOOP_AVOIDANCE, None
+
+    def _incident(self, node):
+        """(cell, value that touches the node) for the up to four cells around a node."""
+        n, ns = self.game.size, self.game.nodes_size
+        r, c = divmod(node, ns)
+        out = []
+        if r > 0 and c > 0:
+            out.append(((r - 1) * n + c - 1, L)) # Its bottom-right corner
+        if r > 0 and c < n:
+            out.append(((r - 1) * n + c, R)) # Bottom-left
+        if r < n and c > 0:
+            out.append((r * n + c - 1, R)) # Top-right
+        if r < n and c < n:
+            out.append((r * n + c, L)) # Top-left
+        return out
+
+    def _hint(self, i, v, rule, node, source):
+        r, c = divmod(i, self.game.size)
+        return {
+            'row': r,
+            'col': c,
+            'type': CELL_SYMBOLS[v],
+            'rule': rule,
+            'clue': list(divmod(node, self.game.nodes_size)) if node is not None else None,
+            'source': source,
+        }
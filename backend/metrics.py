@@ -0,0 +1,210 @@
+"""
+In-process metrics with a Prometheus text exposition (/api/metrics).
+
+Nothing here is wired in by default: instrument_app() adds request hooks
+and instrument_game() wraps the SlantGame hot paths with timing shims.
+When metrics are off neither is called, so the game and the routes run
+their original code with no added cost. The per-move loop check is only
+wrapped on request (GAME_PER_CALL_PATHS): timing it would slow the solver
+and CPU players down.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Seconds; covers a loop check (~µs) up to a slow generation (~s)
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Counters, gauges and histograms keyed by (name, labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {} # name -> (type, help)
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = [] # callables returning [(name, labels, value)] at scrape time
+
+    def describe(self, name, kind, help_text):
+        self._meta[name] = (kind, help_text)
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=(), buckets=LATENCY_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def gauge(self, collect):
+        """Registers collect() -> [(name, labels, value)], called on every render()."""
+        self._gauges.append(collect)
+
+    def render(self):
+        """Prometheus text format 0.0.4."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            histograms = [(key, (list(h.counts), h.sum, h.count, h.buckets)) for key, h in histograms]
+        gauges = sorted(sample for collect in self._gauges for sample in collect())
+
+        lines = []
+        seen = set()
+
+        def header(name, default_kind):
+            if name not in seen:
+                seen.add(name)
+                kind, help_text = self._meta.get(name, (default_kind, ''))
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for name, labels, value in gauges:
+            header(name, 'gauge')
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), (counts, total, count, buckets) in histograms:
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, n in zip(buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+# ---------------------------------------------------------------- the app
+
+def instrument_app(app, metrics):
+    """Per-route latency histogram and request counter via Flask request hooks."""
+    from flask import g, request
+
+    metrics.describe('slant_http_request_duration_seconds', 'histogram',
+                     'Request latency by route template and method')
+    metrics.describe('slant_http_requests_total', 'counter',
+                     'Requests by route template, method and status code')
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            labels = (('route', rule), ('method', request.method))
+            metrics.observe('slant_http_request_duration_seconds', time.perf_counter() - start, labels)
+            metrics.inc('slant_http_requests_total', labels + (('status', str(response.status_code)),))
+        return response
+
+
+# --------------------------------------------------------------- the game
+
+GAME_HOT_PATHS = {
+    # method name: (metric name, help)
+    'count_solutions': ('slant_count_solutions_seconds', 'Solution counts (count_solutions)'),
+    'detect_cycle_dfs': ('slant_detect_cycle_dfs_seconds', 'Loop scans (detect_cycle_dfs)'),
+    '_generate_valid_puzzle': ('slant_generation_seconds', 'Puzzle generation'),
+}
+
+# Called per candidate move by the CPU players and the backtracking search:
+# a timing wrapper here costs about as much as the check itself, so these
+# are only wrapped when asked for (instrument_game(..., per_call=True)).
+GAME_PER_CALL_PATHS = {
+    'is_cycle_created': ('slant_is_cycle_created_seconds', 'Loop checks (is_cycle_created)'),
+}
+
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+CLUE_BUCKETS = (5, 10, 20, 40, 60, 80, 100, 150, 200, 300, 400)
+
+
+def _timed(method, name, metrics):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            metrics.observe(name, time.perf_counter() - start)
+    return wrapper
+
+
+def _timed_generation(method, name, metrics):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = method(self, *args, **kwargs)
+        metrics.observe(name, time.perf_counter() - start, (('size', str(self.size)),))
+        metrics.observe('slant_generation_attempts', self.generation_attempts, buckets=ATTEMPT_BUCKETS)
+        metrics.observe('slant_generation_clues', self.board.clue_count, (('size', str(self.size)),),
+                        buckets=CLUE_BUCKETS)
+        metrics.inc('slant_generated_puzzles_total', (('unique', 'true' if self.unique else 'false'),))
+        return result
+    return wrapper
+
+
+def instrument_game(cls, metrics, per_call=False):
+    """
+    Replaces the GAME_HOT_PATHS methods on `cls` (plus GAME_PER_CALL_PATHS
+    with `per_call`) with timing wrappers (histogram count = calls).
+    Returns a function that restores the originals.
+    """
+    paths = dict(GAME_HOT_PATHS)
+    if per_call:
+        paths.update(GAME_PER_CALL_PATHS)
+    originals = {}
+    for method_name, (metric, help_text) in paths.items():
+        method = cls.__dict__[method_name]
+        originals[method_name] = method
+        metrics.describe(metric, 'histogram', help_text)
+        wrap = _timed_generation if method_name == '_generate_valid_puzzle' else _timed
+        setattr(cls, method_name, wrap(method, metric, metrics))
+    metrics.describe('slant_generation_attempts', 'histogram', 'Generation attempts per puzzle')
+    metrics.describe('slant_generation_clues', 'histogram', 'Clues per generated puzzle')
+    metrics.describe('slant_generated_puzzles_total', 'counter', 'Generated puzzles by uniqueness')
+
+    def uninstall():
+        for method_name, method in originals.items():
+            setattr(cls, method_name, method)
+    return uninstall
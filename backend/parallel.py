@@ -0,0 +1,204 @@
+"""
+Multi-core solving and solution counting.
+
+PropagationSolver.split() cuts the search tree on its first few guesses
+into independent prefixes; each prefix is searched in a worker process
+from a pickled snapshot of the board (size, clues, cells). Workers share
+two counters for early termination, read through the solver's `cancel`
+hook every CHECK_INTERVAL nodes:
+
+  count  `found` is bumped at every solution; everyone stops once it
+         reaches `limit`. The result is min(found, limit), as in the
+         serial count.
+  solve  `best` is the lowest prefix index that has a solution so far;
+         workers on later prefixes stop. Prefixes are in DFS order, so the
+         lowest one's first solution is exactly what the serial search
+         returns.
+
+Boards smaller than MIN_PARALLEL_CELLS, or that split into fewer than two
+prefixes, are searched serially: the process round trip costs more than
+the search.
+
+Workers are forked, and a fork copies only the calling thread: any lock
+another thread held at that moment stays locked in the child. So the pool
+is only started lazily while the process has a single thread. A threaded
+server calls start() before it starts any thread (app.py does, ahead of
+the puzzle pool, solve jobs and Flask's request threads); otherwise
+searches fall back to the serial solver, which gives the same results.
+"""
+import multiprocessing
+import os
+import threading
+
+from board import Board
+from solver import PropagationSolver, SearchAborted
+
+MIN_PARALLEL_CELLS = 49
+SPLIT_FACTOR = 4 # Aim for this many prefixes per worker so uneven subtrees balance out
+NO_SOLUTION = 2 ** 31 - 1
+
+_found = None # Shared counters, set in each worker by _init_worker
+_best = None
+
+
+def _init_worker(found, best):
+    global _found, _best
+    _found, _best = found, best
+
+
+def _snapshot(game):
+    board = game.board
+    return board.size, bytes(board.clues), bytes(board.cells)
+
+
+def _solver(snapshot):
+    size, clues, cells = snapshot
+    board = Board(size)
+    board.clues[:] = clues
+    board.cells[:] = cells
+    return PropagationSolver(board)
+
+
+class _CountDone:
+    """`cancel` hook: the shared count reached the limit."""
+
+    def __init__(self, limit):
+        self.limit = limit
+
+    def is_set(self):
+        return _found.value >= self.limit
+
+
+class _EarlierSolved:
+    """`cancel` hook: a prefix before ours already has a solution."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def is_set(self):
+        return _best.value < self.index
+
+
+def _tally():
+    with _found.get_lock():
+        _found.value += 1
+
+
+def _count_task(args):
+    snapshot, prefix, limit = args
+    if _found.value >= limit:
+        return
+    solver = _solver(snapshot)
+    solver.cancel = _CountDone(limit)
+    solver.on_solution = _tally
+    try:
+        solver.count_prefix(prefix, limit)
+    except SearchAborted:
+        pass
+
+
+def _solve_task(args):
+    snapshot, index, prefix = args
+    if _best.value < index:
+        return index, None
+    solver = _solver(snapshot)
+    solver.cancel = _EarlierSolved(index)
+    try:
+        solution = solver.solve_prefix(prefix)
+    except SearchAborted:
+        return index, None
+    if solution is not None:
+        with _best.get_lock():
+            if index < _best.value:
+                _best.value = index
+    return index, solution
+
+
+class ParallelSearch:
+    """
+    A process pool plus its shared counters. One search runs at a time;
+    the pool is started on first use and reused across calls.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts the worker pool now (see the module docstring for when to call this)."""
+        if self.workers < 2:
+            return # Searched serially anyway
+        with self._lock:
+            self._start()
+
+    def _can_start(self):
+        """Pool already running, or safe to fork one now (no other threads)."""
+        return self._pool is not None or threading.active_count() == 1
+
+    def _start(self):
+        if self._pool is None:
+            # fork: workers only need board/solver, and spawn would re-run the
+            # importing script (app.py) in every worker
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context('fork' if 'fork' in methods else None)
+            self._found = ctx.Value('q', 0)
+            self._best = ctx.Value('q', NO_SOLUTION)
+            self._pool = ctx.Pool(self.workers, initializer=_init_worker,
+                                  initargs=(self._found, self._best))
+        return self._pool
+
+    def _prefixes(self, game):
+        if game.size * game.size < MIN_PARALLEL_CELLS or self.workers < 2 or not self._can_start():
+            return None
+        prefixes = PropagationSolver(game).split(self.workers * SPLIT_FACTOR)
+        return prefixes if len(prefixes) > 1 else None
+
+    def count(self, game, limit=2):
+        """Same result as PropagationSolver(game).count(limit)."""
+        prefixes = self._prefixes(game)
+        if prefixes is None:
+            return PropagationSolver(game).count(limit)
+        snapshot = _snapshot(game)
+        with self._lock:
+            pool = self._start()
+            self._found.value = 0
+            pool.map(_count_task, [(snapshot, prefix, limit) for prefix in prefixes], chunksize=1)
+            return min(self._found.value, limit)
+
+    def solve(self, game):
+        """Same result as PropagationSolver(game).solve(): rows of 'L'/'R' or None."""
+        prefixes = self._prefixes(game)
+        if prefixes is None:
+            return PropagationSolver(game).solve()
+        snapshot = _snapshot(game)
+        with self._lock:
+            pool = self._start()
+            self._best.value = NO_SOLUTION
+            tasks = [(snapshot, index, prefix) for index, prefix in enumerate(prefixes)]
+            found = [(index, solution) for index, solution in pool.imap_unordered(_solve_task, tasks)
+                     if solution is not None]
+        if not found:
+            return None
+        return PropagationSolver(game).rows(min(found)[1])
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_search():
+    """Process-wide ParallelSearch with one worker per core (PARALLEL_WORKERS env overrides)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            workers = int(os.environ.get('PARALLEL_WORKERS', 0)) or None
+            _default = ParallelSearch(workers)
+        return _default
@@ -0,0 +1,148 @@
+import threading
+from collections import deque
+
+from game_logic import SlantGame
+from grading import DIFFICULTY_BANDS
+
+# Generations in a row that missed a band before the pool stops stocking it
+# for that size (a 3x3 never needs the little guessing 'hard' allows)
+MAX_BAND_MISSES = 20
+
+
+def generate(size, band=None):
+    """Default generator: spread clues for band None, else minimized to `band`."""
+    return SlantGame(size, band=band).export_puzzle()
+
+
+class PuzzlePool:
+    """
+    Keeps a few ready puzzles per board size and difficulty band so
+    /api/new_game does not have to run generation on the request thread.
+
+    Each size has a queue per band in `bands`, stocked with puzzles
+    generated for that band (SlantGame's `band`: unique and graded), plus
+    one (band None) for requests without a band, from the plain generator.
+    A daemon worker tops every queue up to `depth`, always refilling the
+    emptiest first. A puzzle that comes out in another band goes to that
+    band's queue if it has room; after MAX_BAND_MISSES misses in a row a
+    band is given up on for that size.
+
+    take() is O(1); when a queue is empty (or the size not pooled)
+    new_game() counts a miss and falls back to a random puzzle from the
+    on-disk store if one is configured, and only then to inline generation.
+    new_game() returns None only when that can't produce the band either.
+    """
+
+    def __init__(self, sizes=(3, 5, 7, 9), depth=4, generator=None, store=None, bands=DIFFICULTY_BANDS):
+        self.sizes = list(sizes)
+        self.depth = depth
+        self.store = store
+        self.bands = (None,) + tuple(bands)
+        self.generator = generator or generate # (size, band) -> Puzzle
+        self._puzzles = {(size, band): deque() for size in self.sizes for band in self.bands}
+        self._band_misses = dict.fromkeys(self._puzzles, 0)
+        self._unavailable = set() # (size, band) given up on
+        self._hits = {size: 0 for size in self.sizes}
+        self._misses = {}
+        self._store_hits = {}
+        self._generated = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="puzzle-pool", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def take(self, size, band=None):
+        """Returns a pooled Puzzle for `size` (graded `band`, if given), or None when none is ready."""
+        with self._cond:
+            puzzles = self._puzzles.get((size, band))
+            if puzzles:
+                self._hits[size] += 1
+                self._cond.notify()
+                return puzzles.popleft()
+            self._misses[size] = self._misses.get(size, 0) + 1
+            return None
+
+    def new_game(self, size, band=None):
+        puzzle = self.take(size, band)
+        if puzzle is None and self.store is not None:
+            puzzle = self.store.random(size, band)
+            if puzzle is not None:
+                with self._cond:
+                    self._store_hits[size] = self._store_hits.get(size, 0) + 1
+        if puzzle is None:
+            if band is None:
+                return SlantGame(size=size)
+            with self._cond:
+                if (size, band) in self._unavailable:
+                    return None
+            puzzle = self.generator(size, band)
+            if puzzle.grade is None or puzzle.grade.band != band:
+                return None # This size doesn't come out that way
+        return SlantGame(size=size, puzzle=puzzle)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'depth': {size: sum(len(self._puzzles[size, band]) for band in self.bands)
+                          for size in self.sizes},
+                'band_depth': {size: {band or 'any': len(self._puzzles[size, band]) for band in self.bands}
+                               for size in self.sizes},
+                'unavailable': sorted(f"{size}:{band}" for size, band in self._unavailable),
+                'target_depth': self.depth,
+                'hits': dict(self._hits),
+                'misses': dict(self._misses),
+                'store_hits': dict(self._store_hits),
+                'generated': self._generated,
+            }
+
+    def _next_key(self):
+        """(size, band) with the fewest ready puzzles below target, or None if all are full."""
+        wanted = [key for key, puzzles in self._puzzles.items()
+                  if len(puzzles) < self.depth and key not in self._unavailable]
+        if not wanted:
+            return None
+        return min(wanted, key=lambda key: len(self._puzzles[key]))
+
+    def _file(self, key, puzzle):
+        """Queues a generated puzzle under the band it came out in (if there is room)."""
+        size, band = key
+        got = (size, puzzle.grade.band if puzzle.grade is not None else None)
+        if band is None or got == key:
+            self._puzzles[key].append(puzzle)
+            self._band_misses[key] = 0
+            return
+        self._band_misses[key] += 1
+        if self._band_misses[key] >= MAX_BAND_MISSES:
+            self._unavailable.add(key)
+        if got[1] is not None and got in self._puzzles and len(self._puzzles[got]) < self.depth:
+            self._puzzles[got].append(puzzle)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                key = self._next_key()
+                while key is None and not self._stopping:
+                    self._cond.wait()
+                    key = self._next_key()
+                if self._stopping:
+                    return
+            # Generate outside the lock so take() never waits on a puzzle.
+            puzzle = self.generator(*key)
+            with self._cond:
+                self._file(key, puzzle)
+                self._generated += 1
@@ -0,0 +1,282 @@
+"""
+On-disk puzzle library.
+
+One file per board size (slant_<size>.bin) holding a fixed header and then
+fixed-size records, so puzzle i lives at HEADER_SIZE + i * record_size and
+is read straight out of a memory map.
+
+Header (little endian, padded to 32 bytes):
+    magic b'SLNT', version u8, size u8, record_size u16, count u32,
+    base_seed u64  (puzzle i was generated with random.seed(base_seed + i))
+
+Record:
+    flags u8        bit 0: unique, bit 1: graded, bits 2-3: difficulty band
+                    (grading.DIFFICULTY_BANDS index), bits 4-6: techniques
+                    used (one per solver.TECHNIQUES), bit 7: reserved
+    guesses u16, nodes u32   the grade's counts, saturating (version 2+)
+    clues           one nibble per node in Board order, 0xF = no clue
+    solution        one bit per cell in Board order, 1 = 'R', 0 = 'L'
+
+Build a library offline from backend/:
+    python puzzle_store.py build --size 9 --count 100000 --dir puzzles
+    python puzzle_store.py build --size 9 --count 1000 --minimize spread
+"""
+import argparse
+import contextlib
+import io
+import mmap
+import os
+import random
+import struct
+import sys
+
+from board import Puzzle, L, R, NO_CLUE
+from grading import DIFFICULTY_BANDS, Grade
+from solver import TECHNIQUES
+
+MAGIC = b'SLNT'
+VERSION = 2 # Version 1 files (no grade) are still read
+HEADER = struct.Struct('<4sBBHIQ')
+HEADER_SIZE = 32
+NIBBLE_NONE = 0xF
+FLAG_UNIQUE = 1
+FLAG_GRADED = 2
+BAND_SHIFT = 2
+TECHNIQUE_SHIFT = 4
+GRADE = struct.Struct('<HI') # guesses, nodes
+
+
+def record_size(size, version=VERSION):
+    nodes = (size + 1) * (size + 1)
+    grade = GRADE.size if version >= 2 else 0
+    return 1 + grade + (nodes + 1) // 2 + (size * size + 7) // 8
+
+
+def encode_puzzle(puzzle):
+    """Packs a Puzzle into one fixed-size record."""
+    if puzzle.solution is None:
+        raise ValueError("Only puzzles with a known solution can be stored")
+    out = bytearray(record_size(puzzle.size))
+    out[0] = FLAG_UNIQUE if puzzle.unique else 0
+    grade = puzzle.grade
+    if grade is not None:
+        out[0] |= FLAG_GRADED | DIFFICULTY_BANDS.index(grade.band) << BAND_SHIFT
+        for bit, name in enumerate(TECHNIQUES):
+            if name in grade.techniques:
+                out[0] |= 1 << (TECHNIQUE_SHIFT + bit)
+        GRADE.pack_into(out, 1, min(grade.guesses, 0xFFFF), min(grade.nodes, 0xFFFFFFFF))
+
+    offset = 1 + GRADE.size
+    for node, clue in enumerate(puzzle.clues):
+        nibble = NIBBLE_NONE if clue == NO_CLUE else clue
+        if node % 2 == 0:
+            out[offset + node // 2] = nibble
+        else:
+            out[offset + node // 2] |= nibble << 4
+
+    offset += (len(puzzle.clues) + 1) // 2
+    for i, cell in enumerate(puzzle.solution):
+        if cell == R:
+            out[offset + i // 8] |= 1 << (i % 8)
+    return bytes(out)
+
+
+def decode_puzzle(size, record, version=VERSION):
+    """Inverse of encode_puzzle (also reads version 1 records)."""
+    nodes = (size + 1) * (size + 1)
+    flags = record[0]
+    grade = None
+    offset = 1
+    if version >= 2:
+        if flags & FLAG_GRADED:
+            guesses, searched = GRADE.unpack_from(record, 1)
+            techniques = [name for bit, name in enumerate(TECHNIQUES)
+                          if flags >> (TECHNIQUE_SHIFT + bit) & 1]
+            grade = Grade(DIFFICULTY_BANDS[flags >> BAND_SHIFT & 3], techniques, guesses, searched)
+        offset += GRADE.size
+    clues = bytearray(nodes)
+    for node in range(nodes):
+        byte = record[offset + node // 2]
+        nibble = (byte >> 4) if node % 2 else (byte & 0xF)
+        clues[node] = NO_CLUE if nibble == NIBBLE_NONE else nibble
+
+    offset += (nodes + 1) // 2
+    solution = bytearray(size * size)
+    for i in range(size * size):
+        solution[i] = R if record[offset + i // 8] >> (i % 8) & 1 else L
+    return Puzzle(size, clues, solution, unique=bool(flags & FLAG_UNIQUE), grade=grade)
+
+
+def store_path(directory, size):
+    return os.path.join(directory, f"slant_{size}.bin")
+
+
+class PuzzleWriter:
+    """Appends records to a size's file; the header count is finalized on close()."""
+
+    def __init__(self, path, size, base_seed=0):
+        self.size = size
+        self.base_seed = base_seed
+        self.record_size = record_size(size)
+        self.count = 0
+        self.file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        header = HEADER.pack(MAGIC, VERSION, self.size, self.record_size, self.count, self.base_seed)
+        self.file.seek(0)
+        self.file.write(header.ljust(HEADER_SIZE, b'\0'))
+
+    def append(self, puzzle):
+        if puzzle.size != self.size:
+            raise ValueError(f"Puzzle size {puzzle.size} does not match store size {self.size}")
+        self.append_record(encode_puzzle(puzzle))
+
+    def append_record(self, record):
+        if len(record) != self.record_size:
+            raise ValueError("Record size does not match store size")
+        self.file.seek(HEADER_SIZE + self.count * self.record_size)
+        self.file.write(record)
+        self.count += 1
+
+    def close(self):
+        self._write_header()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PuzzleStore:
+    """
+    Read side of the library: random access by (size, index) or by the seed
+    a puzzle was generated with, through one read-only memory map per size.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._maps = {}
+        self._bands = {} # size -> {band: [index, ...]}, built on first use
+
+    def _open(self, size):
+        if size in self._maps:
+            return self._maps[size]
+        path = store_path(self.directory, size)
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+            self._maps[size] = None
+            return None
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, file_size, rec_size, count, base_seed = HEADER.unpack_from(mm, 0)
+        if (magic != MAGIC or version not in (1, VERSION) or file_size != size
+                or rec_size != record_size(size, version)):
+            mm.close()
+            raise ValueError(f"{path} is not a version 1-{VERSION} Slant store for size {size}")
+        count = min(count, (len(mm) - HEADER_SIZE) // rec_size)
+        self._maps[size] = (mm, rec_size, count, base_seed, version)
+        return self._maps[size]
+
+    def count(self, size):
+        entry = self._open(size)
+        return entry[2] if entry else 0
+
+    def get(self, size, index):
+        entry = self._open(size)
+        if entry is None:
+            raise KeyError(f"No stored puzzles for size {size}")
+        mm, rec_size, count, _, version = entry
+        if not 0 <= index < count:
+            raise KeyError(f"Puzzle index {index} out of range for size {size} ({count} stored)")
+        offset = HEADER_SIZE + index * rec_size
+        return decode_puzzle(size, mm[offset:offset + rec_size], version)
+
+    def get_by_seed(self, size, seed):
+        entry = self._open(size)
+        if entry is None:
+            raise KeyError(f"No stored puzzles for size {size}")
+        return self.get(size, seed - entry[3])
+
+    def random(self, size, band=None):
+        """A random stored puzzle, optionally only from one difficulty band; None if there is none."""
+        if band is not None:
+            indices = self.band_indices(size).get(band)
+            return self.get(size, random.choice(indices)) if indices else None
+        count = self.count(size)
+        if not count:
+            return None
+        return self.get(size, random.randrange(count))
+
+    def band_indices(self, size):
+        """{band: [record index, ...]} for the graded puzzles of `size`, from the flag bytes."""
+        if size not in self._bands:
+            entry = self._open(size)
+            bands = {}
+            if entry is not None and entry[4] >= 2:
+                mm, rec_size, count = entry[:3]
+                for index in range(count):
+                    flags = mm[HEADER_SIZE + index * rec_size]
+                    if flags & FLAG_GRADED and flags & FLAG_UNIQUE: # Older builds graded fallbacks too
+                        bands.setdefault(DIFFICULTY_BANDS[flags >> BAND_SHIFT & 3], []).append(index)
+            self._bands[size] = bands
+        return self._bands[size]
+
+    def close(self):
+        for entry in self._maps.values():
+            if entry:
+                entry[0].close()
+        self._maps = {}
+        self._bands = {}
+
+
+def _generate(job):
+    seed, size, minimize = job
+    from game_logic import SlantGame
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return encode_puzzle(SlantGame(size, minimize=minimize).export_puzzle())
+
+
+def build(directory, size, count, base_seed=0, workers=1, minimize=None):
+    """
+    Generates `count` puzzles for `size` into directory/slant_<size>.bin.
+    `minimize` is a game_logic.MINIMIZE_ORDERS name for minimized puzzles
+    (the seed alone does not say which mode a file was built with).
+    """
+    os.makedirs(directory, exist_ok=True)
+    jobs = ((base_seed + i, size, minimize) for i in range(count))
+    with PuzzleWriter(store_path(directory, size), size, base_seed) as writer:
+        if workers > 1:
+            import multiprocessing
+            with multiprocessing.Pool(workers) as pool:
+                for record in pool.imap(_generate, jobs, chunksize=16):
+                    writer.append_record(record)
+        else:
+            for job in jobs:
+                writer.append_record(_generate(job))
+    return count
+
+
+def main(argv=None):
+    from game_logic import MINIMIZE_ORDERS
+    parser = argparse.ArgumentParser(description="Slant puzzle library tools")
+    sub = parser.add_subparsers(dest='command', required=True)
+    b = sub.add_parser('build', help="generate puzzles into a store file")
+    b.add_argument('--size', type=int, required=True)
+    b.add_argument('--count', type=int, required=True)
+    b.add_argument('--dir', default='puzzles')
+    b.add_argument('--seed', type=int, default=0, help="seed of the first puzzle")
+    b.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    b.add_argument('--minimize', choices=MINIMIZE_ORDERS,
+                   help="start from every clue and remove them in this order (minimal unique puzzles)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        build(args.dir, args.size, args.count, args.seed, args.workers, args.minimize)
+        print(f"Wrote {args.count} puzzles of size {args.size} to {store_path(args.dir, args.size)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from solver import PropagationSolver, SearchAborted
+
+# Job states; everything but QUEUED/RUNNING is final
+QUEUED, RUNNING = 'queued', 'running'
+SOLVED, UNSOLVABLE, TIMEOUT, CANCELLED, STALE, FAILED = (
+    'solved', 'unsolvable', 'timeout', 'cancelled', 'stale', 'failed')
+
+
+class SolveJob:
+    """
+    One background solve of a game.
+
+    The solver snapshots the board when the job is created (the caller holds
+    the game's lock), then searches without the lock. The solution is only
+    applied if the game is still at the snapshot's version when the search
+    ends; otherwise the job finishes as 'stale' and the board is untouched.
+    """
+
+    def __init__(self, game, lock, budget, on_solved=None, clock=time.monotonic):
+        self.id = secrets.token_urlsafe(8)
+        self.game = game
+        self.lock = lock
+        self.budget = budget
+        self.on_solved = on_solved
+        self.clock = clock
+        self.version = game.version
+        self.solver = PropagationSolver(game)
+        self.cancel_event = threading.Event()
+        self.status = QUEUED
+        self.error = None
+        self.created = clock()
+        self.started = None
+        self.finished = None
+
+    @property
+    def done(self):
+        return self.status not in (QUEUED, RUNNING)
+
+    def cancel(self):
+        """Asks the search to stop; a queued job never starts."""
+        self.cancel_event.set()
+
+    def run(self):
+        if self.cancel_event.is_set():
+            self._finish(CANCELLED)
+            return
+        self.started = self.clock()
+        self.solver.deadline = self.started + self.budget
+        self.solver.cancel = self.cancel_event
+        self.status = RUNNING
+        try:
+            solution = self.solver.solve()
+        except SearchAborted as e:
+            self._finish(TIMEOUT if e.reason == 'timeout' else CANCELLED)
+            return
+        except Exception as e:
+            self.error = repr(e)
+            self._finish(FAILED)
+            return
+        if solution is None:
+            self._finish(UNSOLVABLE)
+            return
+        with self.lock:
+            if self.cancel_event.is_set():
+                self._finish(CANCELLED)
+            elif self.game.version != self.version:
+                self._finish(STALE) # The board changed while we searched
+            else:
+                self.game.apply_solution(solution)
+                self._finish(SOLVED)
+                if self.on_solved is not None:
+                    self.on_solved(self)
+
+    def _finish(self, status):
+        self.finished = self.clock()
+        self.status = status
+
+    def to_dict(self):
+        end = self.finished if self.finished is not None else self.clock()
+        total = len(self.solver.cells)
+        if self.status == SOLVED:
+            fixed = total
+        elif self.done:
+            fixed = self.solver.max_fixed
+        else:
+            fixed = self.solver.fixed
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'done': self.done,
+            'nodes': self.solver.nodes,
+            'cells_fixed': fixed,
+            'max_cells_fixed': total if self.status == SOLVED else self.solver.max_fixed,
+            'cells_total': total,
+            'elapsed_ms': round((end - self.started) * 1000) if self.started is not None else 0,
+            'budget_ms': round(self.budget * 1000),
+            'error': self.error,
+        }
+
+
+class SolveRunner:
+    """Small thread pool the solve jobs run on, so requests never block on a search."""
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="solve")
+
+    def submit(self, job):
+        self._executor.submit(job.run)
+        return job
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
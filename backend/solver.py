@@ -0,0 +1,600 @@
+import random
+import time
+from collections import OrderedDict
+
+from board import EMPTY, L, R, CELL_SYMBOLS, NO_CLUE
+from connectivity import RollbackUnionFind
+
+
+# How many search nodes between deadline / cancel checks
+CHECK_INTERVAL = 256
+
+
+# Deduction techniques counted in PropagationSolver.deductions, by index:
+# a clue that has all its lines pushes the rest away (saturation), one that
+# needs every remaining neighbour pulls them in (completion), and a slash
+# that would close a loop forces the other one (loop avoidance).
+TECHNIQUES = ('saturation', 'completion', 'loop_avoidance')
+SATURATION, COMPLETION, LOOP_AVOIDANCE = range(len(TECHNIQUES))
+
+
+# Default capacity of a TranspositionTable (entries; LRU beyond that).
+# An entry is a key tuple, a (found, need) tuple and a list node: ~250 bytes.
+TRANSPOSITION_ENTRIES = 200000
+
+_ZOBRIST = {}
+
+def zobrist_keys(size):
+    """
+    Random 64-bit keys per filled cell and per (node, clue still needed)
+    for a board size. Seeded by the size alone so every solver on that size
+    (and every call during one generation) hashes the same state the same
+    way, without touching the global random state generation runs on.
+    """
+    keys = _ZOBRIST.get(size)
+    if keys is None:
+        rng = random.Random(size)
+        ns = size + 1
+        cell_keys = [rng.getrandbits(64) for _ in range(size * size)]
+        # Lines still needed run from -4 (overfull, about to be undone) to 4
+        need_keys = [[rng.getrandbits(64) for _ in range(9)] for _ in range(ns * ns)]
+        keys = _ZOBRIST[size] = (cell_keys, need_keys)
+    return keys
+
+
+class TranspositionTable:
+    """
+    Bounded LRU map from search-state hash to subtree solution count.
+
+    An entry (found, need) means the subtree was searched asking for `need`
+    solutions and returned `found`: exact if found < need, otherwise only a
+    lower bound. Meant to outlive one solver: generation keeps one table
+    across its count_solutions() calls, since adding a clue leaves most deep
+    states (see PropagationSolver.hash) exactly as they were.
+    """
+
+    def __init__(self, max_entries=TRANSPOSITION_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def lookup(self, key, need):
+        """Cached count for `need` solutions, or None."""
+        self.probes += 1
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        found, searched = entry
+        if found < searched:
+            result = min(found, need)
+        elif found >= need:
+            result = need
+        else:
+            return None # Lower bound below what we need now
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return result
+
+    def store(self, key, found, need):
+        entries = self._entries
+        old = entries.get(key)
+        if old is not None and old[0] < old[1]:
+            return # Already exact
+        entries[key] = (found, need)
+        entries.move_to_end(key)
+        self.stores += 1
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
+
+
+class SearchAborted(Exception):
+    """Raised out of a search that hit its deadline or was cancelled."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason # 'timeout' or 'cancelled'
+
+
+class _Frame:
+    """One open guess of PropagationSolver._search: a cell and the values left to try."""
+    __slots__ = ('start', 'need', 'order', 'key', 'option', 'found', 'mark')
+
+    def __init__(self, start, need, order, key):
+        self.start = start
+        self.need = need
+        self.order = order
+        self.key = key # Transposition key, or None
+        self.option = 0 # Index into order of the next value to try
+        self.found = 0
+        self.mark = 0 # Trail length before the current value was assigned
+
+
+class PropagationSolver:
+    """
+    Constraint-propagation search over a snapshot of a SlantGame.
+
+    Works on its own flat arrays (cells, degrees, clues) plus a rollback
+    union-find, so the game itself is never touched while searching.
+    Before every branch it applies the standard Slant deductions until
+    nothing changes:
+      - clue saturation: a clue that already has all its lines pushes every
+        undecided neighbour away, a clue that needs all remaining neighbours
+        pulls them in (covers 0 and 4 clues on an empty board);
+      - loop avoidance: a slash that would join two connected nodes is
+        impossible, so the cell takes the other slash.
+    Every deduction goes on the trail and is popped on backtrack.
+
+    `deadline` (time.monotonic() value) and `cancel` (anything with is_set(),
+    e.g. a threading.Event) may be set before solving; the search then raises
+    SearchAborted when either trips. `nodes` counts branches explored and
+    `max_fixed` is the most cells decided at once so far. `guesses` counts
+    the cells that had to be branched on, and `deductions` how often each of
+    TECHNIQUES fired (grading.py reads these).
+
+    With a TranspositionTable (passed to the constructor; `hash` is only
+    maintained when there is one), counts look subtrees up by the state the
+    rest of the search depends on: which cells are filled, how many lines
+    each open clue (one with an empty cell around it) still needs, and which
+    open nodes are already connected. The first two are kept as an
+    incremental Zobrist `hash`; the connectivity is labelled at lookup
+    (_frontier). Closed clues and the exact slashes behind the frontier
+    don't matter, so different branches that leave the same remaining
+    problem share an entry, and so do successive counts during generation
+    once the clue they differ by is closed.
+    """
+
+    def __init__(self, game, table=None):
+        board = getattr(game, 'board', game) # A SlantGame or a bare Board
+        self.size = n = board.size
+        self.nodes_size = ns = n + 1
+        self.cells = [EMPTY] * (n * n)
+        self.degree = [0] * (ns * ns)
+        self.free = [0] * (ns * ns)
+        self.clue = [-1] * (ns * ns)
+        self.uf = RollbackUnionFind(ns * ns)
+        self.trail = []
+        self.consistent = True
+        self.nodes = 0
+        self.guesses = 0
+        self.deductions = [0] * len(TECHNIQUES)
+        self.deepest = 0
+        self.deadline = None
+        self.cancel = None
+        self.on_solution = None # Called at every solution leaf (parallel.py tallies here)
+        self.reasons = None # List to record (cell, value, technique, node) per deduction, see deduce()
+        self.table = table
+        self.cell_keys, self.need_keys = zobrist_keys(n)
+        self.hash = 0
+
+        # Static geometry: endpoints of each slash, corners of each cell and
+        # the (cell, value) pairs that put a line into each node.
+        self.ends = []
+        self.corners = []
+        self.incident = [[] for _ in range(ns * ns)]
+        for r in range(n):
+            for c in range(n):
+                i = r * n + c
+                tl, tr = r * ns + c, r * ns + c + 1
+                bl, br = tl + ns, tr + ns
+                self.ends.append((None, (tl, br), (bl, tr)))
+                self.corners.append((tl, tr, bl, br))
+                self.incident[tl].append((i, L))
+                self.incident[br].append((i, L))
+                self.incident[bl].append((i, R))
+                self.incident[tr].append((i, R))
+        for node in range(ns * ns):
+            self.free[node] = len(self.incident[node])
+
+        for node, limit in enumerate(board.clues):
+            if limit != NO_CLUE:
+                self.clue[node] = limit
+                self.hash ^= self._need_key(node)
+        # Clued corners per cell: the only nodes whose hash term a move can change
+        self.clued_corners = [tuple(node for node in corners if self.clue[node] >= 0)
+                              for corners in self.corners]
+
+        for i, val in enumerate(board.cells):
+            if val != EMPTY and not self._assign(i, val):
+                self.consistent = False
+        self.trail = []
+        self.given = sum(1 for v in self.cells if v != EMPTY)
+
+    # ------------------------------------------------------------------ state
+
+    def _assign(self, i, v):
+        """Places value v in cell i. Returns False on a loop or clue overflow."""
+        a, b = self.ends[i][v]
+        if self.uf.connected(a, b):
+            return False
+        corners = self.corners[i]
+        hashing = self.table is not None
+        if hashing:
+            clued = self.clued_corners[i]
+            h = self.hash ^ self.cell_keys[i]
+            for node in clued:
+                h ^= self._need_key(node)
+        self.cells[i] = v
+        self.uf.add_edge(a, b)
+        self.degree[a] += 1
+        self.degree[b] += 1
+        for node in corners:
+            self.free[node] -= 1
+        if hashing:
+            for node in clued:
+                h ^= self._need_key(node)
+            self.hash = h
+        self.trail.append(i)
+        for node in self.corners[i]:
+            limit = self.clue[node]
+            if limit >= 0:
+                deg = self.degree[node]
+                if deg > limit or deg + self.free[node] < limit:
+                    return False
+        return True
+
+    def _undo_to(self, mark):
+        trail = self.trail
+        hashing = self.table is not None
+        while len(trail) > mark:
+            i = trail.pop()
+            a, b = self.ends[i][self.cells[i]]
+            self.uf.remove_edge(a, b)
+            corners = self.corners[i]
+            if hashing:
+                clued = self.clued_corners[i]
+                h = self.hash ^ self.cell_keys[i]
+                for node in clued:
+                    h ^= self._need_key(node)
+            self.degree[a] -= 1
+            self.degree[b] -= 1
+            for node in corners:
+                self.free[node] += 1
+            if hashing:
+                for node in clued:
+                    h ^= self._need_key(node)
+                self.hash = h
+            self.cells[i] = EMPTY
+
+    def _need_key(self, node):
+        """Hash term for a clue node: lines it still needs while open, nothing once closed."""
+        limit = self.clue[node]
+        if limit < 0 or self.free[node] == 0:
+            return 0
+        return self.need_keys[node][limit - self.degree[node] + 4]
+
+    def _frontier(self, start):
+        """Which open nodes are already connected, as canonical component labels."""
+        r, c = divmod(start, self.size)
+        free, find = self.free, self.uf.find
+        labels = {}
+        out = []
+        for node in range(r * self.nodes_size + c, len(free)):
+            if free[node]:
+                out.append(labels.setdefault(find(node), len(labels)))
+        return tuple(out)
+
+    def _propagate(self, nodes, cells):
+        """
+        Runs deductions until a fixpoint. `nodes` are clue nodes and `cells`
+        are empty cells whose options need a loop check. Returns False on a
+        contradiction (the caller undoes to its mark).
+        """
+        while nodes or cells:
+            while nodes:
+                node = nodes.pop()
+                limit = self.clue[node]
+                if limit < 0 or self.free[node] == 0:
+                    continue
+                deg = self.degree[node]
+                if deg == limit:
+                    towards = False
+                    self.deductions[SATURATION] += 1
+                elif deg + self.free[node] == limit:
+                    towards = True
+                    self.deductions[COMPLETION] += 1
+                else:
+                    continue
+                for i, touching in self.incident[node]:
+                    if self.cells[i] != EMPTY:
+                        continue
+                    v = touching if towards else 3 - touching
+                    if self.reasons is not None:
+                        self.reasons.append((i, v, COMPLETION if towards else SATURATION, node))
+                    if not self._assign(i, v):
+                        return False
+                    self._queue_around(i, nodes, cells)
+
+            while cells and not nodes:
+                i = cells.pop()
+                if self.cells[i] != EMPTY:
+                    continue
+                (la, lb), (ra, rb) = self.ends[i][L], self.ends[i][R]
+                l_loops = self.uf.connected(la, lb)
+                r_loops = self.uf.connected(ra, rb)
+                if l_loops and r_loops:
+                    return False
+                if l_loops or r_loops:
+                    self.deductions[LOOP_AVOIDANCE] += 1
+                    if self.reasons is not None:
+                        self.reasons.append((i, R if l_loops else L, LOOP_AVOIDANCE, None))
+                    if not self._assign(i, R if l_loops else L):
+                        return False
+                    self._queue_around(i, nodes, cells)
+        return True
+
+    def _queue_around(self, i, nodes, cells):
+        n = self.size
+        nodes.extend(self.corners[i])
+        r, c = divmod(i, n)
+        for rr in range(max(0, r - 1), min(n, r + 2)):
+            for cc in range(max(0, c - 1), min(n, c + 2)):
+                if self.cells[rr * n + cc] == EMPTY:
+                    cells.append(rr * n + cc)
+
+    def _initial_propagation(self):
+        if not self.consistent:
+            return False
+        nodes = [node for node in range(len(self.clue)) if self.clue[node] >= 0]
+        cells = [i for i in range(len(self.cells)) if self.cells[i] == EMPTY]
+        return self._propagate(nodes, cells)
+
+    # ----------------------------------------------------------------- search
+
+    @property
+    def fixed(self):
+        """Cells currently decided (given, deduced or guessed)."""
+        return self.given + len(self.trail)
+
+    @property
+    def max_fixed(self):
+        return self.given + self.deepest
+
+    def _check_limits(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise SearchAborted('cancelled')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchAborted('timeout')
+
+    def _open(self, start, need, randomize, solutions, table):
+        """
+        Enters the search node at cell `start`. Returns (count, None) when it
+        is settled right away (a solution leaf or a table hit), otherwise
+        (None, frame) for the caller to push.
+        """
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self._check_limits()
+        if len(self.trail) > self.deepest:
+            self.deepest = len(self.trail)
+        cells = self.cells
+        total = len(cells)
+        while start < total and cells[start] != EMPTY:
+            start += 1
+        if start == total:
+            if solutions is not None:
+                solutions.append(cells[:])
+            if self.on_solution is not None:
+                self.on_solution()
+            return 1, None
+
+        key = None
+        if table is not None:
+            key = (self.hash, hash(self._frontier(start)))
+            cached = table.lookup(key, need)
+            if cached is not None:
+                return cached, None
+
+        order = [L, R]
+        if randomize:
+            random.shuffle(order)
+        self.guesses += 1
+        return None, _Frame(start, need, order, key)
+
+    def _search(self, start, need, randomize, solutions):
+        """
+        Depth-first count of solutions from cell `start` on, capped at `need`.
+        Each open guess is a _Frame on an explicit stack instead of a Python
+        call, so board size is not limited by the recursion depth.
+        """
+        # Counts only: a hit skips the leaves that solve() and on_solution need
+        table = self.table if solutions is None and self.on_solution is None else None
+        found, frame = self._open(start, need, randomize, solutions, table)
+        if frame is None:
+            return found
+        stack = [frame]
+        while stack:
+            frame = stack[-1]
+            if found is not None: # The child frame just finished
+                self._undo_to(frame.mark)
+                frame.found += found
+                found = None
+            child = None
+            while child is None and frame.found < frame.need and frame.option < 2:
+                v = frame.order[frame.option]
+                frame.option += 1
+                frame.mark = mark = len(self.trail)
+                if self._assign(frame.start, v):
+                    nodes, queue = [], []
+                    self._queue_around(frame.start, nodes, queue)
+                    if self._propagate(nodes, queue):
+                        count, child = self._open(frame.start + 1, frame.need - frame.found,
+                                                  randomize, solutions, table)
+                        if child is not None:
+                            break
+                        frame.found += count
+                self._undo_to(mark)
+            if child is not None:
+                stack.append(child)
+                continue
+            stack.pop()
+            if table is not None:
+                table.store(frame.key, frame.found, frame.need)
+            found = frame.found
+        return found
+
+    def _branch(self, i, v):
+        """Guesses value v for empty cell i and propagates; False on contradiction."""
+        if not self._assign(i, v):
+            return False
+        nodes, queue = [], []
+        self._queue_around(i, nodes, queue)
+        return self._propagate(nodes, queue)
+
+    def split(self, min_count, max_depth=16):
+        """
+        Cuts the search tree into independent subproblems for parallel.py:
+        a list of guess prefixes [(cell, value), ...] in the order _search
+        visits them, so subtree k's solutions all come before subtree k+1's.
+        Goes one guess deeper at a time until there are at least `min_count`
+        prefixes (or the tree runs out). Dead branches are dropped.
+        """
+        if not self._initial_propagation():
+            self._undo_to(0)
+            return []
+        try:
+            for depth in range(1, max_depth + 1):
+                prefixes = []
+                self._split(0, depth, [], prefixes)
+                if len(prefixes) >= min_count or all(len(p) < depth for p in prefixes):
+                    break
+        finally:
+            self._undo_to(0)
+        return prefixes
+
+    def _split(self, start, depth, path, out):
+        cells = self.cells
+        while start < len(cells) and cells[start] != EMPTY:
+            start += 1
+        if start == len(cells) or len(path) == depth:
+            out.append(list(path))
+            return
+        for v in (L, R):
+            mark = len(self.trail)
+            if self._branch(start, v):
+                path.append((start, v))
+                self._split(start + 1, depth, path, out)
+                path.pop()
+            self._undo_to(mark)
+
+    def _enter(self, prefix):
+        """Replays a split() prefix; returns the cell to resume _search from, or None."""
+        if not self._initial_propagation():
+            return None
+        for i, v in prefix:
+            if not self._branch(i, v):
+                return None
+        return prefix[-1][0] + 1 if prefix else 0
+
+    def count_prefix(self, prefix, limit=2):
+        """count() restricted to the subtree under a split() prefix."""
+        try:
+            start = self._enter(prefix)
+            return 0 if start is None else self._search(start, limit, False, None)
+        finally:
+            self._undo_to(0)
+
+    def solve_prefix(self, prefix):
+        """First solution (flat cell codes) under a split() prefix, or None."""
+        solutions = []
+        try:
+            start = self._enter(prefix)
+            if start is not None:
+                self._search(start, 1, False, solutions)
+        finally:
+            self._undo_to(0)
+        return solutions[0] if solutions else None
+
+    def try_remove_clue(self, node):
+        """
+        One clue minimization step. The current clues must have exactly one
+        solution. Drops the clue at `node` and returns True if the puzzle
+        stays unique; otherwise keeps it and returns False.
+
+        Reuses that uniqueness: any second solution must give the node some
+        other degree. So only those degrees are searched, pinned as the clue
+        one at a time, after one shared propagation of the other clues. The
+        Zobrist hash does not follow the clue edits, so this is only for
+        solvers without a table.
+        """
+        value = self.clue[node]
+        self.clue[node] = -1
+        unique = True
+        try:
+            if self._initial_propagation():
+                mark = len(self.trail)
+                for other in range(len(self.incident[node]) + 1):
+                    deg = self.degree[node]
+                    if other == value or deg > other or deg + self.free[node] < other:
+                        continue
+                    self.clue[node] = other
+                    if self._propagate([node], []) and self._search(0, 1, False, None):
+                        unique = False
+                    self._undo_to(mark)
+                    if not unique:
+                        break
+        finally:
+            self._undo_to(0)
+        self.clue[node] = -1 if unique else value
+        return unique
+
+    def rows(self, flat):
+        """Flat cell codes -> rows of 'L'/'R'."""
+        n = self.size
+        symbols = [CELL_SYMBOLS[v] for v in flat]
+        return [symbols[r * n:(r + 1) * n] for r in range(n)]
+
+    def count(self, limit=2):
+        """Number of solutions consistent with the snapshot, capped at limit."""
+        if not self._initial_propagation():
+            return 0
+        try:
+            return self._search(0, limit, False, None)
+        finally:
+            self._undo_to(0)
+
+    def deduce(self):
+        """
+        The deductions alone, no guessing: (cell, value, technique, clue node
+        or None) for every cell they force, in the order they were made, so
+        each one only relies on the ones before it. None on a contradiction.
+        """
+        self.reasons = []
+        try:
+            if not self._initial_propagation():
+                return None
+            return self.reasons
+        finally:
+            self.reasons = None
+            self._undo_to(0)
+
+    def solve(self, randomize=False):
+        """
+        Returns the first solution as a list of rows of 'L'/'R', or None.
+        """
+        if not self._initial_propagation():
+            return None
+        solutions = []
+        try:
+            self._search(0, 1, randomize, solutions)
+        finally:
+            self._undo_to(0)
+        if not solutions:
+            return None
+        return self.rows(solutions[0])
@@ -0,0 +1,112 @@
+"""
+Loop checks and loop cells against a BFS over the cell array, through
+random moves, overwrites, clears, undos and rolled-back batches.
+"""
+import random
+
+import pytest
+
+from board import EMPTY, L, R
+from connectivity import RollbackUnionFind
+from game_logic import SlantGame
+
+
+def slash_ends(n, i, value):
+    r, c = divmod(i, n)
+    if value == L:
+        return r * (n + 1) + c, (r + 1) * (n + 1) + c + 1
+    return (r + 1) * (n + 1) + c, r * (n + 1) + c + 1
+
+
+def reachable(n, cells, a, b, skip=None):
+    """BFS a -> b over the slashes in `cells`, ignoring cell `skip`."""
+    adjacent = {}
+    for i, v in enumerate(cells):
+        if v != EMPTY and i != skip:
+            u, w = slash_ends(n, i, v)
+            adjacent.setdefault(u, []).append(w)
+            adjacent.setdefault(w, []).append(u)
+    seen, queue = {a}, [a]
+    while queue:
+        node = queue.pop()
+        if node == b:
+            return True
+        for nxt in adjacent.get(node, ()):
+            if nxt not in seen:
+                seen.add(nxt)
+                queue.append(nxt)
+    return False
+
+
+def check(game):
+    n = game.size
+    cells = bytes(game.board.cells)
+    degrees = [0] * ((n + 1) ** 2)
+    on_loop = []
+    for i, v in enumerate(cells):
+        r, c = divmod(i, n)
+        for move in 'LR':
+            u, w = slash_ends(n, i, L if move == 'L' else R)
+            assert game.is_cycle_created(r, c, move) == reachable(n, cells, u, w, skip=i), (r, c, move)
+        if v != EMPTY:
+            u, w = slash_ends(n, i, v)
+            degrees[u] += 1
+            degrees[w] += 1
+            if reachable(n, cells, u, w, skip=i):
+                on_loop.append((r, c))
+    assert list(game.board.degrees) == degrees
+    assert game.loop_cells == on_loop
+    assert game.has_loop == bool(on_loop)
+
+
+@pytest.mark.parametrize('size', [4, 5, 6])
+@pytest.mark.parametrize('seed', range(4))
+def test_game_loop_checks_match_bfs(size, seed):
+    rng = random.Random(seed * 7 + size)
+    game = SlantGame(size, generate=False)
+    for _ in range(250):
+        op = rng.random()
+        r, c = rng.randrange(size), rng.randrange(size)
+        if op < 0.6:
+            game.apply_move(r, c, rng.choice('LR'), check_validity=False)
+        elif op < 0.7:
+            game.apply_move(r, c, None, check_validity=False)
+        elif op < 0.9:
+            game.undo()
+        else:
+            # A batch that fails on its last move rolls back through _restore
+            moves = [(rng.randrange(size), rng.randrange(size), rng.choice('LR')) for _ in range(4)]
+            game.apply_moves(moves + [(size, 0, 'L')], atomic=True)
+        check(game)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_union_find_add_remove_rollback(seed):
+    # Edges of a 6x6 grid's slashes, added and removed in and out of order
+    rng = random.Random(seed)
+    n = 6
+    uf = RollbackUnionFind((n + 1) ** 2)
+    cells = [EMPTY] * (n * n)
+    placed = [] # Cells in the order their edges were added
+    for _ in range(400):
+        if placed and rng.random() < 0.45:
+            i = placed.pop() if rng.random() < 0.5 else placed.pop(rng.randrange(len(placed)))
+            uf.remove_edge(*slash_ends(n, i, cells[i]))
+            cells[i] = EMPTY
+        else:
+            i = rng.choice([k for k in range(n * n) if cells[k] == EMPTY] or [None])
+            if i is None:
+                continue
+            cells[i] = rng.choice((L, R))
+            a, b = slash_ends(n, i, cells[i])
+            joined = uf.add_edge(a, b)
+            if not uf.stale:
+                assert joined == (not reachable(n, cells, a, b, skip=i))
+            placed.append(i)
+        if uf.stale and rng.random() < 0.3: # Stay stale for a few moves, as the game does
+            uf.rebuild([slash_ends(n, k, cells[k]) for k in placed])
+        if uf.stale:
+            continue
+        for _ in range(10):
+            a, b = rng.randrange((n + 1) ** 2), rng.randrange((n + 1) ** 2)
+            assert uf.connected(a, b) == reachable(n, cells, a, b)
@@ -0,0 +1,193 @@
+import random
+import time
+
+import pytest
+
+from cpu_ai import GreedyAI, IncrementalAI, MonteCarloAI, VECTORIZE_MIN_SIZE, np
+from game_logic import SlantGame
+
+needs_numpy = pytest.mark.skipif(np is None, reason="NumPy not installed")
+
+
+def midgame(size, seed, clue_fraction=0.4, moves=None):
+    """Clues from a random solution, then random valid moves by both players (mistakes included)."""
+    rng = random.Random(seed)
+    random.seed(seed)
+    solved = SlantGame(size, generate=False)
+    solved.solve_game(randomize=True)
+    degrees = sorted(solved.node_degrees.items())
+    game = SlantGame(size, generate=False)
+    game.constraints = dict(rng.sample(degrees, int(len(degrees) * clue_fraction)))
+    for _ in range(size * size // 2 if moves is None else moves):
+        r, c, t = rng.randrange(size), rng.randrange(size), rng.choice('LR')
+        if game.grid[r][c] is None and game.is_move_valid(r, c, t):
+            game.apply_move(r, c, t, check_validity=False, player=rng.choice(('HUMAN', 'CPU')))
+    return game
+
+
+SIZES = [VECTORIZE_MIN_SIZE - 2, VECTORIZE_MIN_SIZE - 1, VECTORIZE_MIN_SIZE, VECTORIZE_MIN_SIZE + 4]
+
+
+@needs_numpy
+@pytest.mark.parametrize('strategy', [1, 2, 3])
+@pytest.mark.parametrize('size', SIZES)
+def test_batch_scores_match_scalar(size, strategy):
+    for seed in range(3):
+        game = midgame(size, seed)
+        ai = GreedyAI(game, strategy, vectorized=True)
+        evaluate = {1: ai._evaluate_constraint_focused, 2: ai._evaluate_edge_first,
+                    3: ai._evaluate_random_greedy}[strategy]
+        scores, valid = ai._batch_scores()
+        for r in range(size):
+            for c in range(size):
+                for slash, move_type in enumerate('LR'):
+                    ok = game.grid[r][c] is None and game.is_move_valid(r, c, move_type)
+                    assert valid[slash, r, c] == ok, (r, c, move_type)
+                    if game.grid[r][c] is None:
+                        assert scores[slash, r, c] == evaluate(r, c, move_type), (r, c, move_type)
+
+
+@needs_numpy
+@pytest.mark.parametrize('strategy', [1, 2, 3])
+@pytest.mark.parametrize('size', SIZES)
+def test_batch_moves_match_scalar(size, strategy):
+    game = midgame(size, 11, moves=size)
+    assert GreedyAI(game, strategy).vectorized == (size >= VECTORIZE_MIN_SIZE)
+    while True:
+        state = random.getstate()
+        scalar = GreedyAI(game, strategy, vectorized=False).get_best_move()
+        random.setstate(state)
+        assert GreedyAI(game, strategy, vectorized=True).get_best_move() == scalar
+        if scalar is None:
+            break
+        game.apply_move(*scalar, check_validity=False, player='CPU')
+
+
+def check_incremental(ai):
+    """The AI's kept scores, buckets and heap against a fresh full rescoring of the same board."""
+    ai._sync()
+    fresh = IncrementalAI(ai.game, ai.strategy)
+    assert ai._scores == fresh._scores
+    assert ai._buckets == fresh._buckets
+    assert {-s for s in ai._heap} >= set(ai._buckets)
+
+
+@pytest.mark.parametrize('strategy', [1, 2, 3])
+@pytest.mark.parametrize('size', [5, 8])
+def test_incremental_matches_full_rescoring(size, strategy):
+    rng = random.Random(size * 10 + strategy)
+    game = midgame(size, strategy, moves=0)
+    ai = IncrementalAI(game, strategy)
+    for step in range(3 * size * size):
+        roll = rng.random()
+        if roll < 0.3:
+            game.undo()
+        elif roll < 0.4:
+            game.apply_move(rng.randrange(size), rng.randrange(size), None, check_validity=False)
+        else:
+            r, c, t = rng.randrange(size), rng.randrange(size), rng.choice('LR')
+            if game.is_move_valid(r, c, t):
+                game.apply_move(r, c, t, check_validity=False)
+        if step % 3 == 0:
+            check_incremental(ai)
+            state = random.getstate()
+            move = ai.get_best_move()
+            random.setstate(state)
+            assert GreedyAI(game, strategy, vectorized=False).get_best_move() == move
+    check_incremental(ai)
+
+
+def test_incremental_rebuilds_after_clue_changes():
+    game = midgame(6, 1)
+    ai = IncrementalAI(game, 1)
+    ai.get_best_move()
+    game.constraints[(3, 3)] = 0
+    game.apply_move(0, 0, 'L', check_validity=False)
+    check_incremental(ai)
+
+
+class Ticks:
+    """Fake clock: every call is `step` seconds after the previous one."""
+
+    def __init__(self, step):
+        self.step = step
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def tree_size(root):
+    nodes = untried = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        untried += len(node.untried or ())
+        stack.extend(node.children.values())
+    return nodes, untried
+
+
+def test_mcts_stops_at_its_budget():
+    random.seed(1)
+    ai = MonteCarloAI(midgame(6, 1, moves=0), budget_ms=20, clock=Ticks(0.001))
+    assert ai.get_best_move() is not None
+    assert ai.iterations == 20 # One clock reading per iteration after the deadline is set
+
+    ai = MonteCarloAI(midgame(9, 2, moves=0), budget_ms=50)
+    start = time.perf_counter()
+    ai.get_best_move()
+    assert time.perf_counter() - start < 0.5
+    assert ai.iterations > 1
+
+
+@pytest.mark.parametrize('size,seed', [(4, 1), (6, 2), (8, 3)])
+def test_mcts_plays_legal_moves(size, seed):
+    random.seed(seed)
+    game = midgame(size, seed, moves=size)
+    ai = MonteCarloAI(game, budget_ms=5)
+    while True:
+        move = ai.get_best_move()
+        if move is None:
+            break
+        r, c, t = move
+        assert game.grid[r][c] is None and game.is_move_valid(r, c, t)
+        game.apply_move(r, c, t, check_validity=False, player=game.turn)
+        assert (ai.nodes, ai.untried) == tree_size(ai.root)
+    # A pass: full, or no empty cell takes either slash
+    assert all(not game.is_move_valid(r, c, t) for r in range(size) for c in range(size)
+               for t in 'LR' if game.grid[r][c] is None)
+
+
+def test_mcts_passes_on_full_or_blocked_boards():
+    full = midgame(4, 5, moves=0)
+    assert full.solve_game()
+    assert MonteCarloAI(full, budget_ms=5).get_best_move() is None
+
+    blocked = SlantGame(3, generate=False)
+    blocked.constraints = {(r, c): 0 for r in range(4) for c in range(4)} # Nothing fits
+    assert MonteCarloAI(blocked, budget_ms=5).get_best_move() is None
+
+
+def test_mcts_reuses_its_tree():
+    random.seed(4)
+    game = midgame(5, 4, moves=0)
+    ai = MonteCarloAI(game, budget_ms=1, clock=Ticks(0.00001)) # 100 iterations
+    move = ai.get_best_move()
+    i, code = move[0] * 5 + move[1], 'LR'.index(move[2]) + 1
+    reply_node = ai.root.children[(i, code)]
+    (j, reply_code), kept = max(reply_node.children.items(), key=lambda item: item[1].visits)
+    visits = kept.visits
+
+    game.apply_move(*move, check_validity=False, player=game.turn)
+    game.apply_move(j // 5, j % 5, 'LR'[reply_code - 1], check_validity=False, player=game.turn)
+    ai.get_best_move()
+    assert ai.root is kept and kept.parent is None
+    assert kept.visits == visits + ai.iterations
+    assert (ai.nodes, ai.untried) == tree_size(kept)
+
+    # A clear isn't in the tree: start over
+    game.apply_move(j // 5, j % 5, None, check_validity=False, player=game.turn)
+    ai.get_best_move()
+    assert ai.root is not kept and ai.root.visits == ai.iterations
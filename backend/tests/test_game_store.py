@@ -0,0 +1,77 @@
+from game_logic import SlantGame
+from game_store import GameStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def new_game():
+    return SlantGame(3, generate=False)
+
+
+def test_ttl_expiry():
+    clock = Clock()
+    store = GameStore(ttl=60, clock=clock)
+    a = store.create(new_game())
+    clock.now = 30
+    b = store.create(new_game())
+    clock.now = 70 # a idle for 70 s, b for 40 s
+    assert store.get(a.id) is None
+    assert store.get(b.id) is b
+    assert a.closed and not b.closed
+    assert store.stats()['evictions']['ttl'] == 1
+    clock.now = 105 # get() refreshed b at 70
+    assert store.get(b.id) is b
+
+
+def test_lru_eviction_follows_access_order():
+    store = GameStore(max_games=3, clock=Clock())
+    a, b, c = (store.create(new_game()) for _ in range(3))
+    assert store.get(a.id) is a # Now b is the least recently used
+    d = store.create(new_game())
+    assert len(store) == 3
+    assert store.get(b.id) is None and b.closed
+    assert all(store.get(s.id) is s for s in (a, c, d))
+    assert store.stats()['evictions']['lru'] == 1
+
+
+def test_memory_cap():
+    probe = GameStore(clock=Clock()).create(new_game())
+    per_game = probe.estimate_bytes()
+    store = GameStore(max_bytes=per_game * 2, clock=Clock())
+    sessions = [store.create(new_game()) for _ in range(4)]
+    assert len(store) == 2
+    assert [store.get(s.id) is not None for s in sessions] == [False, False, True, True]
+    assert store.stats()['evictions']['memory'] == 2
+    assert store.stats()['approx_bytes'] == per_game * 2
+
+
+def test_create_keeps_the_new_session():
+    store = GameStore(max_bytes=1, clock=Clock())
+    first = store.create(new_game())
+    second = store.create(new_game()) # Over the cap on its own, but just created
+    assert len(store) == 1 and first.closed and not second.closed
+
+
+def test_remove_closes_the_session():
+    store = GameStore(clock=Clock())
+    session = store.create(new_game())
+    assert store.remove(session.id) is session
+    assert session.closed
+    assert store.remove(session.id) is None
+    assert store.stats()['approx_bytes'] == 0
+
+
+def test_estimate_counts_the_search_tree():
+    session = GameStore(clock=Clock()).create(SlantGame(5, generate=False), strategy=4)
+    empty = session.estimate_bytes()
+    ai = session.cpu_ai()
+    ai.budget_ms = 20
+    ai.get_best_move()
+    assert ai.nodes > 1
+    assert session.estimate_bytes() >= empty + ai.nodes * 250 + ai.untried * 64
@@ -0,0 +1,157 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from game_logic import FarthestPointSampler, SlantGame, MINIMIZE_ORDERS
+from solver import PropagationSolver
+
+
+def brute_distances(ns, picked):
+    """Manhattan distance from every node to the nearest picked one (None before any pick)."""
+    if not picked:
+        return None
+    return [min(abs(r - pr) + abs(c - pc) for pr, pc in (divmod(p, ns) for p in picked))
+            for r, c in (divmod(node, ns) for node in range(ns * ns))]
+
+
+def check_sampler(sampler, picked):
+    ns = sampler.nodes_size
+    unpicked = [node for node in range(ns * ns) if node not in picked]
+    expected = brute_distances(ns, picked)
+    if expected is not None:
+        assert sampler.dist == expected
+    assert sorted(node for bucket in sampler.buckets.values() for node in bucket) == unpicked
+    for d, bucket in sampler.buckets.items():
+        assert all(sampler.dist[node] == d for node in bucket)
+        assert all(sampler.slot[node] == i for i, node in enumerate(bucket))
+    assert sampler.remaining == len(unpicked)
+
+
+@pytest.mark.parametrize('nodes_size,seed', [(1, 0), (2, 1), (6, 2), (9, 3), (12, 4)])
+def test_picks_are_farthest(nodes_size, seed):
+    random.seed(seed)
+    sampler = FarthestPointSampler(nodes_size)
+    picked = set()
+    while True:
+        before = brute_distances(nodes_size, picked)
+        node = sampler.pick()
+        if node is None:
+            break
+        assert node not in picked
+        if before is not None:
+            assert before[node] == max(before[other] for other in range(nodes_size ** 2)
+                                       if other not in picked)
+        picked.add(node)
+        check_sampler(sampler, picked)
+    assert len(picked) == nodes_size ** 2
+
+
+def test_take_seeds_the_distances():
+    random.seed(5)
+    sampler = FarthestPointSampler(9)
+    picked = {0, 40, 80, 8}
+    for node in picked:
+        sampler.take(node)
+    sampler.take(40) # Taking twice changes nothing
+    check_sampler(sampler, picked)
+    for _ in range(10):
+        before = brute_distances(9, picked)
+        node = sampler.pick()
+        assert before[node] == max(before[n] for n in range(81) if n not in picked)
+        picked.add(node)
+        check_sampler(sampler, picked)
+
+
+def test_ties_are_broken_at_random():
+    firsts = set()
+    for seed in range(20):
+        random.seed(seed)
+        sampler = FarthestPointSampler(7)
+        sampler.take(24) # Centre: the four corners tie
+        firsts.add(sampler.pick())
+    assert firsts == {0, 6, 42, 48}
+
+
+def generated(size, seed, minimize):
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()): # Generation prints progress
+        return SlantGame(size, minimize=minimize)
+
+
+def without(game, node):
+    """A copy of the game's clues with the clue at `node` dropped."""
+    other = SlantGame(game.size, generate=False)
+    other.constraints = {k: v for k, v in game.constraints.items() if k != node}
+    return other
+
+
+@pytest.mark.parametrize('order', MINIMIZE_ORDERS)
+@pytest.mark.parametrize('size,seed', [(4, 1), (5, 2), (6, 3)])
+def test_minimized_puzzles_are_unique_and_minimal(size, seed, order):
+    game = generated(size, seed, order)
+    assert game.unique
+    assert len(game.constraints) < (size + 1) ** 2
+    assert game.count_solutions(2) == 1
+    solved = without(game, None)
+    assert solved.solve_game()
+    assert bytes(solved.board.cells) == game.solution
+    for node in list(game.constraints):
+        assert without(game, node).count_solutions(2) == 2, node
+
+
+@pytest.mark.parametrize('size,seed', [(4, 4), (5, 5), (6, 6)])
+def test_try_remove_clue_matches_a_fresh_count(size, seed):
+    """Each step reuses the last proof; every answer must match counting from scratch."""
+    random.seed(seed)
+    full = SlantGame(size, generate=False)
+    full.solve_game(randomize=True)
+    game = SlantGame(size, generate=False)
+    game.constraints = dict(full.node_degrees.items())
+    ns = size + 1
+    solver = PropagationSolver(game)
+    nodes = list(range(ns * ns))
+    random.shuffle(nodes)
+    kept = dict(game.constraints.items())
+    for node in nodes:
+        key = divmod(node, ns)
+        fresh = SlantGame(size, generate=False)
+        fresh.constraints = {k: v for k, v in kept.items() if k != key}
+        expected = fresh.count_solutions(2) == 1
+        assert solver.try_remove_clue(node) == expected, key
+        if expected:
+            del kept[key]
+    assert solver.count(2) == 1
+
+
+def test_minimize_clues_checks_its_input():
+    game = generated(4, 7, None)
+    with pytest.raises(ValueError):
+        game.minimize_clues('alphabetical')
+    blank = SlantGame(4, generate=False)
+    with pytest.raises(ValueError):
+        blank.minimize_clues()
+    with pytest.raises(ValueError):
+        SlantGame(4, minimize='alphabetical')
+
+
+def test_minimize_clues_follows_an_explicit_order():
+    random.seed(8)
+    full = SlantGame(5, generate=False)
+    full.solve_game(randomize=True)
+    game = SlantGame(5, generate=False)
+    game.constraints = dict(full.node_degrees.items())
+    game.solution, game.unique = bytes(full.board.cells), True
+    order = sorted(game.constraints, reverse=True)
+
+    # The same greedy pass, counting from scratch at every step
+    kept = dict(game.constraints.items())
+    for node in order:
+        trial = SlantGame(5, generate=False)
+        trial.constraints = {k: v for k, v in kept.items() if k != node}
+        if trial.count_solutions(2) == 1:
+            del kept[node]
+
+    assert game.minimize_clues(order) == 36 - len(kept)
+    assert dict(game.constraints.items()) == kept
@@ -0,0 +1,76 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from board import CELL_SYMBOLS
+from game_logic import SlantGame
+from hints import Hinter
+from solver import PropagationSolver
+
+
+def unique_game(size, seed):
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()): # Generation prints progress
+        game = SlantGame(size, minimize='spread')
+    assert game.unique
+    return game
+
+
+def play(game, hinter):
+    hint = hinter.next_hint()
+    game.apply_move(hint['row'], hint['col'], hint['type'], check_validity=False)
+    return hint
+
+
+@pytest.mark.parametrize('size,seed', [(5, 1), (6, 2), (7, 3)])
+def test_hints_solve_the_puzzle(size, seed):
+    game = unique_game(size, seed)
+    hinter = Hinter(game)
+    while game.board.filled < size * size:
+        hint = play(game, hinter)
+        assert hint['rule'] != 'mistake'
+        assert CELL_SYMBOLS[game.solution[hint['row'] * size + hint['col']]] == hint['type']
+    assert hinter.next_hint() is None
+    assert game.status != "RUNNING"
+
+
+def test_hints_agree_with_solution_despite_mistakes():
+    game = unique_game(7, 4)
+    n = 7
+    rng = random.Random(4)
+    for i in rng.sample(range(n * n), 10):
+        wrong = 'R' if game.solution[i] == 1 else 'L'
+        game.apply_move(i // n, i % n, wrong, check_validity=False)
+    hinter = Hinter(game)
+    for _ in range(20):
+        hint = play(game, hinter)
+        i = hint['row'] * n + hint['col']
+        assert CELL_SYMBOLS[game.solution[i]] == hint['type']
+
+
+def test_wrong_premise_is_reported_as_mistake(monkeypatch):
+    game = unique_game(6, 5)
+    hinter = Hinter(game)
+    hinter.next_hint() # Builds the cache
+    monkeypatch.setattr(hinter, '_recent', lambda: []) # Skip the local checks
+    first, value = hinter._deductions[0][:2]
+    wrong = 'R' if value == 1 else 'L'
+    game.apply_move(first // 6, first % 6, wrong, check_validity=False)
+    hint = hinter.next_hint()
+    assert (hint['row'], hint['col'], hint['type'], hint['rule']) == \
+        (first // 6, first % 6, CELL_SYMBOLS[value], 'mistake')
+
+
+def test_no_solve_without_a_stored_solution(monkeypatch):
+    game = unique_game(6, 6)
+    solution, game.solution = game.solution, None
+    def solve(self, randomize=False):
+        raise AssertionError("hint ran a full solve")
+    monkeypatch.setattr(PropagationSolver, 'solve', solve)
+    hinter = Hinter(game)
+    while (hint := hinter.next_hint()) is not None:
+        assert hint['rule'] != 'solution'
+        assert CELL_SYMBOLS[solution[hint['row'] * 6 + hint['col']]] == hint['type']
+        game.apply_move(hint['row'], hint['col'], hint['type'], check_validity=False)
@@ -0,0 +1,88 @@
+import pytest
+
+from game_logic import SlantGame, ALL_STATE_FIELDS
+
+
+@pytest.mark.parametrize('r,c', [(0, 5), (0, -1), (5, 0), (-1, 2), ('0', 1), (1.0, 1), (None, 0)])
+def test_apply_move_rejects_cells_off_the_board(r, c):
+    game = SlantGame(5, generate=False)
+    with pytest.raises(ValueError):
+        game.apply_move(r, c, 'L', check_validity=False)
+    assert game.board.filled == 0
+    assert game.history == []
+
+
+def test_batch_reports_cells_off_the_board():
+    game = SlantGame(5, generate=False)
+    results = game.apply_moves([(0, 5, 'L'), (4, 4, 'R')])
+    assert results == [(False, "Cell out of range"), (True, None)]
+    assert bytes(game.board.cells).count(0) == 24
+
+
+def test_board_views_are_read_only():
+    game = SlantGame(5, generate=False)
+    with pytest.raises(TypeError):
+        game.grid[0][0] = 'L'
+    with pytest.raises(TypeError):
+        game.owners[0][0] = 'HUMAN'
+    with pytest.raises(TypeError):
+        game.node_degrees[(0, 0)] = 1
+    assert game.board.filled == 0
+    assert list(game.board.degrees) == [0] * 36
+
+
+def test_clue_writes_through_the_view_update_the_game():
+    game = SlantGame(5, generate=False)
+    version = game.version
+    game.constraints[(1, 1)] = 2
+    assert game.board.clue_count == 1 and game.version > version
+    game.apply_move(0, 0, 'L', check_validity=False)
+    game.apply_move(1, 1, 'L', check_validity=False)
+    assert game.board.clues_met == 1
+    version = game.version
+    del game.constraints[(1, 1)]
+    assert game.board.clue_count == 0 and game.board.clues_met == 0 and game.version > version
+
+
+def comparable(game):
+    state = game.to_dict(ALL_STATE_FIELDS)
+    del state['version']
+    return state, game.history, bytes(game.board.adjacency)
+
+
+@pytest.mark.parametrize('bad', [(9, 9, 'L'), (1, 1, 'X'), 'junk'])
+def test_atomic_batch_rolls_back(bad):
+    before = [(3, 3, 'L', 'HUMAN'), (3, 4, 'R', 'CPU'), (0, 1, 'L', 'HUMAN')]
+    batch = [(0, 0, 'R'), (0, 1, 'CLEAR'), (0, 1, 'L'), (1, 0, 'L'), (1, 1, 'R'), (3, 3, 'R'),
+             (3, 4, None), bad, (4, 4, 'L')]
+    game, control = SlantGame(5, generate=False), SlantGame(5, generate=False)
+    for g in (game, control):
+        g.constraints[(1, 1)] = 1
+        for r, c, t, player in before:
+            g.apply_move(r, c, t, check_validity=False, player=player)
+    version = game.version
+
+    results = game.apply_moves(batch, player='CPU', atomic=True)
+    assert [ok for ok, _ in results] == [True] * 7 + [False, False]
+    assert results[-1] == (False, "Skipped")
+    assert comparable(game) == comparable(control)
+    assert game.loop_cells == []
+    connected, expected = game._get_connectivity().connected, control._get_connectivity().connected
+    nodes = range(len(game.board.degrees))
+    assert all(connected(a, b) == expected(a, b) for a in nodes for b in nodes)
+
+    # A client at the pre-batch version sees the rollback as a delta
+    delta = game.to_delta(version)
+    assert not delta['full'] and game.version > version
+    assert all(game.grid[r][c] == v for r, c, v, _ in delta['cells'])
+
+    # The game carries on as if the batch never happened
+    assert game.apply_moves([(0, 0, 'R'), (0, 1, 'L'), (1, 0, 'L'), (1, 1, 'R')], atomic=True) == [(True, None)] * 4
+    assert game.loop_cells
+
+
+def test_non_atomic_batch_keeps_the_good_moves():
+    game = SlantGame(5, generate=False)
+    results = game.apply_moves([(0, 0, 'L'), (9, 9, 'L'), (0, 1, 'R')])
+    assert results == [(True, None), (False, "Cell out of range"), (True, None)]
+    assert game.grid[0][:2] == ['L', 'R']
@@ -0,0 +1,63 @@
+"""ParallelSearch must give exactly the serial solver's counts and first solution."""
+import random
+import threading
+
+import pytest
+
+from game_logic import SlantGame
+from parallel import ParallelSearch
+from solver import PropagationSolver
+
+
+def sparse_puzzle(size, fraction, seed):
+    """Clues on a random `fraction` of the nodes of a random solution: many solutions."""
+    random.seed(seed)
+    game = SlantGame(size, generate=False)
+    game.solve_game(randomize=True)
+    degrees = dict(game.node_degrees.items())
+    nodes = list(degrees)
+    random.shuffle(nodes)
+    puzzle = SlantGame(size, generate=False)
+    puzzle.constraints = {node: degrees[node] for node in nodes[:int(len(nodes) * fraction)]}
+    return puzzle
+
+
+@pytest.fixture(scope='module')
+def search():
+    search = ParallelSearch(2)
+    search.start()
+    yield search
+    search.close()
+
+
+@pytest.mark.parametrize('size,fraction', [(7, 0.3), (7, 0.5), (8, 0.4), (8, 0.6)])
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_serial(search, size, fraction, seed):
+    game = sparse_puzzle(size, fraction, seed * 17 + size)
+    assert search._prefixes(game) is not None # Really split across workers
+    for limit in (1, 2, 100):
+        assert search.count(game, limit) == PropagationSolver(game).count(limit)
+    assert search.solve(game) == PropagationSolver(game).solve()
+
+
+def test_unsolvable_matches_serial(search):
+    game = sparse_puzzle(7, 0.3, 5)
+    node = next(iter(game.constraints))
+    game.constraints = {**dict(game.constraints.items()), node: 4 if game.constraints[node] < 4 else 0}
+    assert search.count(game, 2) == PropagationSolver(game).count(2)
+    assert search.solve(game) == PropagationSolver(game).solve()
+
+
+def test_no_fork_from_a_threaded_process():
+    search = ParallelSearch(2)
+    game = sparse_puzzle(8, 0.4, 3)
+    stop = threading.Event()
+    other = threading.Thread(target=stop.wait)
+    other.start()
+    try:
+        assert search.count(game, 100) == PropagationSolver(game).count(100)
+        assert search._pool is None # Served serially instead of forking
+    finally:
+        stop.set()
+        other.join()
+        search.close()
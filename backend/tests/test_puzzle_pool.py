@@ -0,0 +1,107 @@
+import contextlib
+import io
+import random
+import time
+
+import pytest
+
+from board import Puzzle, NO_CLUE
+from game_logic import SlantGame
+from grading import DIFFICULTY_BANDS, Grade, grade
+from puzzle_pool import PuzzlePool, MAX_BAND_MISSES
+
+
+def quiet(make, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()): # Generation prints progress
+        return make(*args, **kwargs)
+
+
+def fake_puzzle(size, band):
+    return Puzzle(size, bytes([NO_CLUE]) * (size + 1) ** 2, bytes(size * size), band is not None,
+                  Grade(band, [], 0, 0) if band is not None else None)
+
+
+def fake_generator(size, band):
+    """Every band comes out as asked, except 'hard' at size 3, which comes out 'expert'."""
+    if (size, band) == (3, 'hard'):
+        band = 'expert'
+    return fake_puzzle(size, band)
+
+
+def wait_full(pool, timeout=5):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        with pool._cond:
+            if pool._next_key() is None:
+                return
+        time.sleep(0.01)
+    raise AssertionError("pool never filled")
+
+
+def test_fallback_puzzles_are_not_graded(monkeypatch):
+    monkeypatch.setattr(SlantGame, 'count_solutions', lambda self, limit=2, engine=None: 2)
+    random.seed(1)
+    game = quiet(SlantGame, 5)
+    assert not game.unique and game.grade is None
+    assert game.export_puzzle().grade is None
+
+
+@pytest.mark.parametrize('band', DIFFICULTY_BANDS)
+@pytest.mark.parametrize('size', [5, 7])
+def test_generating_for_a_band(size, band):
+    random.seed(size)
+    game = quiet(SlantGame, size, band=band)
+    assert game.unique and game.count_solutions(2) == 1
+    assert game.grade.band == band
+    assert game.grade == grade(size, game.board.clues)
+
+
+def test_band_caps_minimization():
+    random.seed(2)
+    game = quiet(SlantGame, 6, band='easy')
+    clues = dict(game.constraints.items())
+    with pytest.raises(ValueError):
+        SlantGame(4, band='impossible')
+    with pytest.raises(ValueError):
+        game.minimize_clues('spread', band='impossible')
+    # Every clue left is needed to stay easy, or to stay unique
+    easy = SlantGame(6, generate=False)
+    for node in clues:
+        easy.constraints = {k: v for k, v in clues.items() if k != node}
+        assert easy.count_solutions(2) == 2 or grade(6, easy.board.clues).band != 'easy'
+
+
+def test_pool_stocks_every_band():
+    pool = PuzzlePool(sizes=[3, 5], depth=2, generator=fake_generator)
+    pool.start()
+    try:
+        wait_full(pool)
+        depths = pool.stats()['band_depth']
+        assert depths[5] == {'any': 2, 'easy': 2, 'medium': 2, 'hard': 2, 'expert': 2}
+        assert depths[3]['hard'] == 0 and pool.stats()['unavailable'] == ['3:hard']
+        assert pool._band_misses[3, 'hard'] == MAX_BAND_MISSES
+
+        for band in DIFFICULTY_BANDS:
+            assert pool.take(5, band).grade.band == band
+        assert pool.take(5).grade is None
+        wait_full(pool) # Refilled band by band
+        assert pool.stats()['band_depth'][5]['easy'] == 2
+    finally:
+        pool.stop()
+
+
+def test_empty_band_is_generated_inline():
+    pool = PuzzlePool(sizes=[3, 5], depth=2, generator=fake_generator) # Never started
+    game = pool.new_game(5, 'easy')
+    assert game.grade.band == 'easy'
+    assert pool.stats()['misses'] == {5: 1}
+    assert pool.new_game(3, 'hard') is None # Came out as another band
+    assert pool.new_game(9, 'medium').grade.band == 'medium' # Not a pooled size
+
+
+def test_easy_small_board_with_the_real_generator():
+    """The case that used to 404: nothing easy pooled at size 5."""
+    random.seed(3)
+    pool = PuzzlePool(sizes=[5], depth=1)
+    game = quiet(pool.new_game, 5, 'easy')
+    assert game.unique and game.grade.band == 'easy'
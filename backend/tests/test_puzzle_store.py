@@ -0,0 +1,106 @@
+import os
+import random
+
+import pytest
+
+from board import Puzzle, L, R, NO_CLUE
+from grading import DIFFICULTY_BANDS, Grade
+from puzzle_store import (HEADER, HEADER_SIZE, MAGIC, GRADE, FLAG_UNIQUE, PuzzleStore,
+                          PuzzleWriter, encode_puzzle, record_size, store_path)
+from solver import TECHNIQUES
+
+
+def random_puzzle(size, rng, graded=True):
+    nodes = (size + 1) * (size + 1)
+    clues = bytes(rng.choice([NO_CLUE, 0, 1, 2, 3, 4]) for _ in range(nodes))
+    solution = bytes(rng.choice([L, R]) for _ in range(size * size))
+    grade = None
+    if graded:
+        techniques = [name for name in TECHNIQUES if rng.random() < 0.5]
+        grade = Grade(rng.choice(DIFFICULTY_BANDS), techniques, rng.randrange(0x10000),
+                      rng.randrange(2 ** 32))
+    return Puzzle(size, clues, solution, unique=rng.random() < 0.5, grade=grade)
+
+
+def same(a, b):
+    return (a.size, bytes(a.clues), bytes(a.solution), a.unique, a.grade) == \
+        (b.size, bytes(b.clues), bytes(b.solution), b.unique, b.grade)
+
+
+@pytest.mark.parametrize('size', [3, 5, 8])
+def test_round_trip(tmp_path, size):
+    rng = random.Random(size)
+    puzzles = [random_puzzle(size, rng, graded=i % 3 != 0) for i in range(40)]
+    with PuzzleWriter(store_path(tmp_path, size), size, base_seed=1000) as writer:
+        for puzzle in puzzles:
+            writer.append(puzzle)
+
+    store = PuzzleStore(tmp_path)
+    try:
+        assert store.count(size) == len(puzzles)
+        for i, puzzle in enumerate(puzzles):
+            assert same(store.get(size, i), puzzle)
+        assert same(store.get_by_seed(size, 1007), puzzles[7])
+        bands = store.band_indices(size)
+        for band in DIFFICULTY_BANDS:
+            # Graded non-unique records (older builds wrote them) are left out of the bands
+            expected = [i for i, p in enumerate(puzzles)
+                        if p.unique and p.grade is not None and p.grade.band == band]
+            assert bands.get(band, []) == expected
+            if expected:
+                assert store.random(size, band).grade.band == band
+        with pytest.raises(KeyError):
+            store.get(size, len(puzzles))
+    finally:
+        store.close()
+
+
+def test_grade_counts_saturate(tmp_path):
+    puzzle = random_puzzle(4, random.Random(1))
+    puzzle.grade = Grade('expert', [], 70000, 2 ** 40)
+    with PuzzleWriter(store_path(tmp_path, 4), 4) as writer:
+        writer.append(puzzle)
+    store = PuzzleStore(tmp_path)
+    grade = store.get(4, 0).grade
+    store.close()
+    assert (grade.guesses, grade.nodes) == (0xFFFF, 0xFFFFFFFF)
+
+
+def test_reads_version_1(tmp_path):
+    # A version 1 record is a version 2 one without the grade counts and grade flags
+    size = 5
+    rng = random.Random(7)
+    puzzles = [random_puzzle(size, rng, graded=False) for _ in range(10)]
+    rec_size = record_size(size, 1)
+    with open(store_path(tmp_path, size), 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 1, size, rec_size, len(puzzles), 50).ljust(HEADER_SIZE, b'\0'))
+        for puzzle in puzzles:
+            record = encode_puzzle(puzzle)
+            f.write(bytes([record[0] & FLAG_UNIQUE]) + record[1 + GRADE.size:])
+
+    store = PuzzleStore(tmp_path)
+    try:
+        assert store.count(size) == len(puzzles)
+        for i, puzzle in enumerate(puzzles):
+            assert same(store.get(size, i), puzzle)
+        assert same(store.get_by_seed(size, 53), puzzles[3])
+        assert store.band_indices(size) == {}
+        assert store.random(size, 'easy') is None
+        assert store.random(size) is not None
+    finally:
+        store.close()
+
+
+def test_missing_and_mismatched_files(tmp_path):
+    store = PuzzleStore(tmp_path)
+    assert store.count(6) == 0
+    assert store.random(6) is None
+    with pytest.raises(KeyError):
+        store.get(6, 0)
+    # A size 4 file saved under the size 5 name
+    with PuzzleWriter(store_path(tmp_path, 4), 4) as writer:
+        writer.append(random_puzzle(4, random.Random(2)))
+    os.replace(store_path(tmp_path, 4), store_path(tmp_path, 5))
+    with pytest.raises(ValueError):
+        store.count(5)
+    store.close()
@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+
+import solver
+from game_logic import SlantGame
+from solve_jobs import (SolveJob, SolveRunner, SOLVED, UNSOLVABLE, TIMEOUT, CANCELLED, STALE,
+                        QUEUED)
+
+
+def sparse_game(size, seed):
+    """A few clues from a random solution: solvable, but only by guessing."""
+    random.seed(seed)
+    game = SlantGame(size, generate=False)
+    game.solve_game(randomize=True)
+    degrees = dict(game.node_degrees.items())
+    puzzle = SlantGame(size, generate=False)
+    puzzle.constraints = dict(random.sample(sorted(degrees.items()), size))
+    return puzzle
+
+
+def test_solves_and_applies():
+    game = sparse_game(6, 1)
+    solved = []
+    job = SolveJob(game, threading.Lock(), 5.0, on_solved=solved.append)
+    assert job.status == QUEUED and not job.done
+    job.run()
+    assert job.status == SOLVED and solved == [job]
+    assert game.board.filled == 36 and game.board.clues_met == game.board.clue_count
+    state = job.to_dict()
+    assert state['done'] and state['cells_fixed'] == state['cells_total'] == 36
+    assert state['budget_ms'] == 5000
+
+
+def test_unsolvable():
+    game = SlantGame(4, generate=False)
+    game.constraints = {(0, 0): 4}
+    job = SolveJob(game, threading.Lock(), 5.0)
+    job.run()
+    assert job.status == UNSOLVABLE and game.board.filled == 0
+
+
+def test_deadline(monkeypatch):
+    monkeypatch.setattr(solver, 'CHECK_INTERVAL', 1) # Check the clock at every search node
+    game = sparse_game(8, 2)
+    job = SolveJob(game, threading.Lock(), 0.0)
+    job.run()
+    assert job.status == TIMEOUT
+    assert game.board.filled == 0
+    assert job.to_dict()['nodes'] >= 1
+
+
+def test_cancel_before_start():
+    game = sparse_game(6, 3)
+    job = SolveJob(game, threading.Lock(), 5.0)
+    job.cancel()
+    job.run()
+    assert job.status == CANCELLED and job.started is None
+    assert job.solver.nodes == 0 and game.board.filled == 0
+
+
+def test_cancel_while_running():
+    game = sparse_game(6, 4)
+    lock = threading.Lock()
+    job = SolveJob(game, lock, 5.0)
+    with lock: # The search can finish, but not apply its solution
+        thread = threading.Thread(target=job.run)
+        thread.start()
+        job.cancel()
+    thread.join(5)
+    assert job.status == CANCELLED
+    assert game.board.filled == 0
+
+
+def test_stale_when_the_board_changed():
+    game = sparse_game(6, 5)
+    job = SolveJob(game, threading.Lock(), 5.0)
+    game.apply_move(0, 0, 'L', check_validity=False)
+    job.run()
+    assert job.status == STALE
+    assert game.board.filled == 1
+
+
+def test_runner():
+    runner = SolveRunner(workers=1)
+    try:
+        game = sparse_game(6, 6)
+        job = runner.submit(SolveJob(game, threading.Lock(), 5.0))
+        end = time.monotonic() + 5
+        while not job.done and time.monotonic() < end:
+            time.sleep(0.01)
+        assert job.status == SOLVED
+    finally:
+        runner.shutdown()
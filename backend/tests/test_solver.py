@@ -0,0 +1,170 @@
+"""
+Solution counts: the propagation solver against the backtracking engine
+and a brute-force enumeration that shares no code with either.
+"""
+import itertools
+import random
+import sys
+import time
+
+import pytest
+
+from board import EMPTY, L, R
+from game_logic import SlantGame
+from solver import PropagationSolver, TranspositionTable
+
+COUNT_LIMIT = 50
+
+
+def random_puzzle(size, seed, clue_fraction, filled=0):
+    """Clues from a random solution (a fraction of nodes) plus `filled` of its cells given."""
+    random.seed(seed)
+    game = SlantGame(size, generate=False)
+    game.solve_game(randomize=True)
+    degrees = dict(game.node_degrees.items())
+    solution = bytes(game.board.cells)
+    nodes = list(degrees)
+    random.shuffle(nodes)
+    puzzle = SlantGame(size, generate=False)
+    puzzle.constraints = {node: degrees[node] for node in nodes[:int(len(nodes) * clue_fraction)]}
+    for i in random.sample(range(size * size), filled):
+        puzzle.apply_move(i // size, i % size, 'L' if solution[i] == L else 'R', check_validity=False)
+    return puzzle
+
+
+def brute_force_count(game, limit):
+    """Tries every filling of the empty cells; checks clues and loops from scratch."""
+    n, ns = game.size, game.size + 1
+    base = list(game.board.cells)
+    clues = game.board.clues
+    empty = [i for i, v in enumerate(base) if v == EMPTY]
+    count = 0
+    for values in itertools.product((L, R), repeat=len(empty)):
+        cells = list(base)
+        for i, v in zip(empty, values):
+            cells[i] = v
+        degree = [0] * (ns * ns)
+        parent = list(range(ns * ns))
+
+        def find(x):
+            while parent[x] != x:
+                x = parent[x]
+            return x
+
+        loop = False
+        for i, v in enumerate(cells):
+            r, c = divmod(i, n)
+            a, b = (r * ns + c, (r + 1) * ns + c + 1) if v == L else ((r + 1) * ns + c, r * ns + c + 1)
+            degree[a] += 1
+            degree[b] += 1
+            ra, rb = find(a), find(b)
+            if ra == rb:
+                loop = True
+                break
+            parent[ra] = rb
+        if loop:
+            continue
+        if all(limit_ == 255 or degree[node] == limit_ for node, limit_ in enumerate(clues)):
+            count += 1
+            if count >= limit:
+                break
+    return count
+
+
+# (size, clue fraction, cells given): at most 16 empty cells to enumerate
+BOARDS = [(4, 0.3, 0), (4, 0.5, 0), (4, 0.2, 4), (5, 0.4, 9), (5, 0.6, 10), (5, 0.3, 12)]
+
+
+@pytest.mark.parametrize('size,fraction,filled', BOARDS)
+@pytest.mark.parametrize('seed', range(3))
+def test_engines_agree_on_counts(size, fraction, filled, seed):
+    game = random_puzzle(size, seed * 31 + size, fraction, filled)
+    before = bytes(game.board.cells)
+    expected = brute_force_count(game, COUNT_LIMIT)
+    for limit in (1, 2, COUNT_LIMIT):
+        assert game.count_solutions(limit, engine='propagation') == min(expected, limit)
+        assert game.count_solutions(limit, engine='backtrack') == min(expected, limit)
+        assert bytes(game.board.cells) == before # Counting leaves the board as it was
+
+
+# (size, clue fraction): boards with anywhere from a few to hundreds of solutions
+TABLE_BOARDS = [(5, 0.3), (6, 0.35), (7, 0.4), (8, 0.45)]
+
+
+@pytest.mark.parametrize('size,fraction', TABLE_BOARDS)
+@pytest.mark.parametrize('max_entries', [TranspositionTable().max_entries, 64]) # 64: constant eviction
+def test_transposition_table_counts_match(size, fraction, max_entries):
+    game = random_puzzle(size, size, fraction)
+    table = TranspositionTable(max_entries)
+    for limit in (2, 20, 500):
+        assert PropagationSolver(game, table=table).count(limit) == PropagationSolver(game).count(limit)
+    assert table.hits # The table was really used
+
+
+@pytest.mark.parametrize('size', [6, 8])
+def test_transposition_table_shared_across_clues(size):
+    # As in generation: one table for a run of counts, one more clue each time
+    random.seed(size)
+    solved = SlantGame(size, generate=False)
+    solved.solve_game(randomize=True)
+    degrees = dict(solved.node_degrees.items())
+    nodes = list(degrees)
+    random.shuffle(nodes)
+    game = SlantGame(size, generate=False)
+    table = TranspositionTable()
+    for k in range(len(nodes) // 5, len(nodes) // 2):
+        game.constraints = {node: degrees[node] for node in nodes[:k]}
+        assert PropagationSolver(game, table=table).count(50) == PropagationSolver(game).count(50)
+
+
+# Far past the old recursion limit (one Python frame per cell): solved with
+# explicit stacks, without touching sys.setrecursionlimit
+LARGE_TIME_LIMIT = 10.0
+
+
+def fully_clued(size, seed):
+    """A random solution's full degree map as clues: unique, and the solution."""
+    random.seed(seed)
+    solved = SlantGame(size, generate=False)
+    solved.solve_game(randomize=True)
+    game = SlantGame(size, generate=False)
+    game.constraints = dict(solved.node_degrees.items())
+    return game, bytes(solved.board.cells)
+
+
+@pytest.mark.parametrize('engine', ['propagation', 'backtrack'])
+@pytest.mark.parametrize('size', [50, 100])
+def test_large_boards_solve(size, engine):
+    limit = sys.getrecursionlimit()
+    game, solution = fully_clued(size, size)
+    game.engine = engine
+    start = time.perf_counter()
+    assert game.solve_game()
+    assert game.count_solutions(2, engine=engine) == 1
+    assert time.perf_counter() - start < LARGE_TIME_LIMIT
+    assert bytes(game.board.cells) == solution
+    assert not game.detect_cycle_dfs()
+    assert sys.getrecursionlimit() == limit
+
+
+def test_large_sparse_board_solves():
+    game = random_puzzle(50, 3, 0.7)
+    start = time.perf_counter()
+    assert game.solve_game()
+    assert time.perf_counter() - start < LARGE_TIME_LIMIT
+    assert game.board.filled == 2500 and game.board.clues_met == game.board.clue_count
+    assert not game.has_loop
+
+
+def test_large_loop_is_found():
+    n, mid, k = 100, 50, 45
+    game = SlantGame(n, generate=False)
+    moves = []
+    for t in range(k): # The four sides of a diamond around node (mid, mid)
+        moves += [(mid - k + t, mid + t, 'L'), (mid + t, mid + k - 1 - t, 'R'),
+                  (mid + k - 1 - t, mid - 1 - t, 'L'), (mid - 1 - t, mid - k + t, 'R')]
+    game.apply_moves(moves)
+    assert game.has_loop and len(game.loop_cells) == 4 * k
+    assert game.detect_cycle_dfs() and len(game.loop_cells) == 4 * k
+    game.apply_move(mid, mid + k - 1, None, check_validity=False)
+    assert not game.has_loop and not game.detect_cycle_dfs()
@@ -0,0 +1,150 @@
+import copy
+import random
+
+import pytest
+
+from game_logic import SlantGame, CHANGE_LOG_SIZE, STATE_FIELDS, ALL_STATE_FIELDS
+
+
+def blank_game(size, seed):
+    game = SlantGame(size, generate=False)
+    rng = random.Random(seed)
+    for _ in range(size):
+        game.constraints[(rng.randrange(size + 1), rng.randrange(size + 1))] = rng.randint(0, 2)
+    return game
+
+
+def random_moves(game, rng, count):
+    """Moves by both players, clears and undos; no validity checks so every kind of change shows up."""
+    n = game.size
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.15:
+            game.undo()
+        elif roll < 0.25:
+            game.apply_move(rng.randrange(n), rng.randrange(n), None, check_validity=False)
+        else:
+            game.apply_move(rng.randrange(n), rng.randrange(n), rng.choice('LR'),
+                            check_validity=False, player=rng.choice(('HUMAN', 'CPU')))
+
+
+def apply_delta(state, delta):
+    """What a client does with to_delta(): patch its copy of an earlier to_dict()."""
+    if delta['full']:
+        return {k: v for k, v in delta.items() if k != 'full'}
+    assert delta['since'] == state['version']
+    for r, c, value, owner in delta['cells']:
+        state['grid'][r][c] = value
+        state['owners'][r][c] = owner
+    state['node_degrees'].update(delta['node_degrees'])
+    for key in ('version', 'status', 'turn', 'scores', 'loop_cells'):
+        state[key] = delta[key]
+    return state
+
+
+def test_deltas_rebuild_the_current_state():
+    rng = random.Random(7)
+    game = blank_game(6, 7)
+    state = copy.deepcopy(game.to_dict())
+    for _ in range(40):
+        random_moves(game, rng, rng.randint(0, 6))
+        state = apply_delta(state, copy.deepcopy(game.to_delta(state['version'])))
+        assert state == game.to_dict()
+
+
+def test_deltas_from_any_older_version():
+    rng = random.Random(3)
+    game = blank_game(5, 3)
+    snapshots = [copy.deepcopy(game.to_dict())]
+    for _ in range(30):
+        random_moves(game, rng, 2)
+        snapshots.append(copy.deepcopy(game.to_dict()))
+    for old in snapshots:
+        delta = game.to_delta(old['version'])
+        assert not delta['full']
+        assert apply_delta(old, copy.deepcopy(delta)) == game.to_dict()
+
+
+def test_delta_lists_each_changed_cell_once():
+    game = SlantGame(5, generate=False)
+    since = game.version
+    game.apply_move(0, 0, 'L', check_validity=False)
+    game.apply_move(0, 0, 'R', check_validity=False)
+    game.apply_move(4, 4, 'R', check_validity=False)
+    game.undo()
+    delta = game.to_delta(since)
+    assert delta['cells'] == [[0, 0, 'R', 'HUMAN'], [4, 4, None, None]]
+    assert delta['node_degrees'] == {'0,0': 0, '0,1': 1, '1,0': 1, '1,1': 0,
+                                     '4,4': 0, '4,5': 0, '5,4': 0, '5,5': 0}
+
+
+def test_falls_back_to_a_full_snapshot():
+    game = blank_game(5, 1)
+    start = game.version
+    assert game.to_delta(None)['full']
+    assert game.to_delta(game.version + 1)['full'] # From the future
+
+    game.constraints[(0, 0)] = 1 # Clue changes can't be described cell by cell
+    assert game.to_delta(start)['full']
+
+    stale = game.version
+    for k in range(CHANGE_LOG_SIZE + 1):
+        game.apply_move(k % 5, k // 5 % 5, 'LR'[k % 2], check_validity=False)
+    delta = game.to_delta(stale)
+    assert delta['full']
+    assert apply_delta({}, copy.deepcopy(delta)) == game.to_dict()
+    assert not game.to_delta(game.version - 1)['full']
+
+
+def played_game(seed=5):
+    rng = random.Random(seed)
+    game = blank_game(6, seed)
+    random_moves(game, rng, 25)
+    return game
+
+
+def test_fields_picks_keys():
+    game = played_game()
+    assert list(game.to_dict(['turn', 'grid'])) == ['turn', 'grid']
+    assert 'graph' not in game.to_dict()
+    assert set(game.to_dict()) == set(STATE_FIELDS)
+    with pytest.raises(ValueError):
+        game.to_dict(['grid', 'nope'])
+    with pytest.raises(ValueError):
+        game.to_delta(None, ['nope'])
+    assert set(game.to_delta(None, ['scores'])) == {'scores', 'full'}
+
+
+def test_compact_encodes_the_same_state():
+    game = played_game()
+    n, ns = game.size, game.nodes_size
+    full = game.to_dict(ALL_STATE_FIELDS)
+    compact = game.to_dict(ALL_STATE_FIELDS, compact=True)
+    assert compact['compact'] and 'compact' not in full
+
+    rows = [compact['grid'][r * n:(r + 1) * n] for r in range(n)]
+    assert [[None if ch == '.' else ch for ch in row] for row in rows] == full['grid']
+    names = {'.': None, 'H': 'HUMAN', 'C': 'CPU'}
+    assert [names[ch] for ch in compact['owners']] == [o for row in full['owners'] for o in row]
+
+    keys = [f"{r},{c}" for r in range(ns) for c in range(ns)]
+    assert {k: int(ch) for k, ch in zip(keys, compact['constraints']) if ch != '.'} == full['constraints']
+    assert dict(zip(keys, map(int, compact['node_degrees']))) == full['node_degrees']
+    assert [bin(int(ch, 16)).count('1') for ch in compact['graph']] == [len(full['graph'][k]) for k in keys]
+    for field in ('size', 'status', 'turn', 'scores', 'loop_cells', 'version', 'difficulty'):
+        assert compact[field] == full[field]
+
+
+def test_cached_fields_follow_changes():
+    game = SlantGame(5, generate=False)
+    for compact in (False, True):
+        game.to_dict(ALL_STATE_FIELDS, compact) # Fill the cache
+    game.apply_move(2, 3, 'R', check_validity=False)
+    assert game.to_dict(['grid'])['grid'][2][3] == 'R'
+    assert game.to_dict(['grid'], compact=True)['grid'][13] == 'R'
+    assert game.to_dict(['node_degrees'])['node_degrees']['2,4'] == 1
+    assert game.to_dict(['graph'])['graph']['3,3'] == ['2,4']
+
+    game.board.set_clue(0, 3) # Behind the game's back: the clues are compared too
+    assert game.to_dict(['constraints'])['constraints'] == {'0,0': 3}
+    assert game.to_dict(['constraints'], compact=True)['constraints'][0] == '3'
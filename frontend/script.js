@@ -1,5 +1,7 @@
 const API_URL = "http://localhost:5000/api";
 let currentState = null;
+let gameId = null; // Session id returned by /new_game, sent with every request
+let eventSource = null; // /events stream: CPU moves are pushed here in multiplayer mode
 
 // DOM Elements
 const boardEl = document.getElementById('game-board');
@@ -15,7 +17,7 @@ const CELL_SIZE = 60; // Must match CSS
 const GRID_GAP = 2; // Must match CSS
 let currentSize = 5;
 let multiplayerMode = false; // Track multiplayer mode state
-let selectedStrategy = 1; // Track selected greedy strategy (1, 2, or 3)
+let selectedStrategy = 1; // Track selected CPU strategy (1-3 greedy, 4 tree search)
 
 // Init
 document.addEventListener('DOMContentLoaded', () => {
@@ -55,16 +57,70 @@ document.addEventListener('click', () => {
 }, { once: true });
 
 
+// Server state is versioned: requests send the last version we rendered and
+// responses may be a delta ({ full: false, cells: [[r, c, value, owner]], ... }).
+function lastVersion() {
+    return currentState ? currentState.version : undefined;
+}
+
+function mergeState(state) {
+    if (!state || state.full !== false || !currentState) return state;
+    for (const [r, c, value, owner] of state.cells) {
+        currentState.grid[r][c] = value;
+        currentState.owners[r][c] = owner;
+    }
+    Object.assign(currentState.node_degrees, state.node_degrees);
+    currentState.status = state.status;
+    currentState.turn = state.turn;
+    currentState.scores = state.scores;
+    currentState.loop_cells = state.loop_cells;
+    currentState.version = state.version;
+    return currentState;
+}
+
+// Multiplayer: the server plays the CPU's reply itself and pushes it (and
+// every other state change) over Server-Sent Events, so no polling.
+const USE_EVENT_STREAM = typeof EventSource !== 'undefined';
+const SOLVE_POLL_MS = 200; // Progress polling interval for /solve jobs
+
+function openEventStream() {
+    if (eventSource) eventSource.close();
+    eventSource = new EventSource(`${API_URL}/events?game_id=${encodeURIComponent(gameId)}`);
+    eventSource.addEventListener('state', (e) => applyPushedState(JSON.parse(e.data).state));
+    eventSource.addEventListener('cpu_move', (e) => {
+        applyPushedState(JSON.parse(e.data).state);
+        playSound('cpu');
+    });
+    eventSource.addEventListener('cpu_pass', (e) => {
+        applyPushedState(JSON.parse(e.data).state);
+        statusEl.textContent = JSON.parse(e.data).message;
+    });
+}
+
+async function applyPushedState(state) {
+    // Pushes can overlap with the delta we already merged from our own request
+    if (currentState && state.version < currentState.version) return;
+    if (currentState && state.full === false && state.since > currentState.version) {
+        // Missed something: fetch a full snapshot instead
+        const res = await fetch(`${API_URL}/state?game_id=${encodeURIComponent(gameId)}`);
+        state = await res.json();
+    }
+    currentState = mergeState(state);
+    renderBoard(currentState);
+}
+
 async function newGame() {
     playSound('click'); // Feedback
     try {
         const response = await fetch(`${API_URL}/new_game`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ size: currentSize })
+            body: JSON.stringify({ size: currentSize, game_id: gameId })
         });
         const data = await response.json();
+        gameId = data.game_id;
         currentState = data;
+        if (multiplayerMode && USE_EVENT_STREAM) openEventStream();
         renderBoard(data);
         statusEl.textContent = "Player Turn";
     } catch (e) {
@@ -399,7 +455,7 @@ async function handleCellClick(r, c) {
             const res = await fetch(`${API_URL}/move`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ row: r, col: c, type: moveType })
+                body: JSON.stringify({ game_id: gameId, since: lastVersion(), row: r, col: c, type: moveType })
             });
             const data = await res.json();
 
@@ -413,7 +469,7 @@ async function handleCellClick(r, c) {
             }
 
             // Success
-            currentState = data.state;
+            currentState = mergeState(data.state);
             renderBoard(currentState);
 
             playSound('click');
@@ -423,7 +479,8 @@ async function handleCellClick(r, c) {
             // Auto CPU Trigger after small delay (Debounce) - ONLY IN MULTIPLAYER MODE
             if (multiplayerMode && currentState.status === "RUNNING" && currentState.turn === "CPU") {
                 statusEl.textContent = "CPU Turn - Processing...";
-                cpuMoveTimer = setTimeout(triggerCpuMove, 1500); // 1.5s delay
+                // With the event stream the server replies on its own
+                if (!USE_EVENT_STREAM) cpuMoveTimer = setTimeout(triggerCpuMove, 1500); // 1.5s delay
             }
             // In single-player mode, just keep the status as "Your Turn"
             else if (!multiplayerMode && currentState.status === "RUNNING") {
@@ -452,13 +509,12 @@ async function handleCellDblClick(r, c) {
         const res = await fetch(`${API_URL}/move`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ row: r, col: c, type: 'CLEAR' })
+            body: JSON.stringify({ game_id: gameId, since: lastVersion(), row: r, col: c, type: 'CLEAR' })
         });
         const data = await res.json();
 
         if (data.success || !data.error) {
-            currentState = data.state || data; // Handle format diffs if any
-            if (data.state) currentState = data.state;
+            currentState = mergeState(data.state || data); // Handle format diffs if any
 
             renderBoard(currentState);
             playSound('clear');
@@ -647,7 +703,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 const response = await fetch(`${API_URL}/set_strategy`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ strategy: selectedStrategy })
+                    body: JSON.stringify({ game_id: gameId, strategy: selectedStrategy, autoplay: USE_EVENT_STREAM })
                 });
                 const data = await response.json();
 
@@ -673,8 +729,10 @@ document.addEventListener('DOMContentLoaded', () => {
                     if (cpuScoreCard) cpuScoreCard.style.display = 'flex';
                     if (vsDivider) vsDivider.style.display = 'block';
 
-                    // If it's CPU turn, trigger a move
-                    if (currentState && currentState.status === "RUNNING" && currentState.turn === "CPU") {
+                    // If it's CPU turn, trigger a move (the server does it when streaming)
+                    if (USE_EVENT_STREAM) {
+                        openEventStream();
+                    } else if (currentState && currentState.status === "RUNNING" && currentState.turn === "CPU") {
                         setTimeout(triggerCpuMove, 1000);
                     }
 
@@ -706,11 +764,15 @@ async function triggerCpuMove() {
     cpuMoveTimer = null;
     statusEl.textContent = "CPU Processing - Evaluating Moves...";
     try {
-        const response = await fetch(`${API_URL}/cpu_move`, { method: 'POST' });
+        const response = await fetch(`${API_URL}/cpu_move`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ game_id: gameId, since: lastVersion() })
+        });
         const data = await response.json();
 
         if (data.success && data.cpu_move) {
-            currentState = data.state;
+            currentState = mergeState(data.state);
             renderBoard(currentState);
             playSound('cpu');
         } else {
@@ -727,10 +789,14 @@ async function triggerCpuMove() {
 
 async function undoLastMove() {
     try {
-        const response = await fetch(`${API_URL}/undo`, { method: 'POST' });
+        const response = await fetch(`${API_URL}/undo`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ game_id: gameId, since: lastVersion() })
+        });
         const data = await response.json();
         if (data.success) {
-            currentState = data.state;
+            currentState = mergeState(data.state);
             renderBoard(currentState);
             statusEl.textContent = "Last Move Reverted";
             playSound('clear');
@@ -745,16 +811,30 @@ async function undoLastMove() {
 async function solveGame() {
     statusEl.textContent = "Solving Puzzle...";
     try {
-        const response = await fetch(`${API_URL}/solve`, { method: 'POST' });
-        const data = await response.json();
+        // The server solves in the background: start a job, then poll it
+        const response = await fetch(`${API_URL}/solve`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ game_id: gameId })
+        });
+        let job = await response.json();
+        if (job.error) throw new Error(job.error);
+
+        while (!job.done) {
+            await new Promise(resolve => setTimeout(resolve, SOLVE_POLL_MS));
+            const params = `game_id=${encodeURIComponent(gameId)}&since=${lastVersion()}`;
+            job = await (await fetch(`${API_URL}/solve/${job.job_id}?${params}`)).json();
+            if (job.error) throw new Error(job.error);
+            if (!job.done) statusEl.textContent = `Solving Puzzle... ${job.max_cells_fixed}/${job.cells_total} cells`;
+        }
 
-        if (data.success) {
-            currentState = data.state;
-            renderBoard(currentState);
-            statusEl.textContent = data.message || "Puzzle Solved Successfully";
+        currentState = mergeState(job.state);
+        renderBoard(currentState);
+        if (job.status === "solved") {
+            statusEl.textContent = job.message || "Puzzle Solved Successfully";
             playSound('cpu'); // Reuse CPU sound for now (nice sweep)
         } else {
-            statusEl.textContent = data.message || "No Solution Found";
+            statusEl.textContent = job.message || "No Solution Found";
             playSound('error');
         }
     } catch (e) {